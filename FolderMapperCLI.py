@@ -0,0 +1,295 @@
+"""
+Headless Folder Mapper: map one or more folders without opening a window.
+
+    python -m FolderMapperCLI SOURCE [SOURCE ...] [-o OUTPUT] [options]
+
+Several sources are mapped in parallel worker processes (see ``--jobs``).
+
+Exit status: 0 when every folder was mapped, 1 if any map failed, 2 for
+usage errors, 3 if the only problems were empty folders, 130 on Ctrl+C.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from localization.translations import translations
+from utils.batch import map_roots
+from utils.instrumentation import format_summary
+from utils.ordering import SORT_ORDERS
+from utils.writers import COMPRESSIONS, MAP_WRITERS
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_EMPTY = 3
+EXIT_INTERRUPTED = 130
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m FolderMapperCLI",
+        description="Generate text maps of folder structures without the GUI.",
+    )
+    parser.add_argument("sources", nargs="+", metavar="SOURCE", help="folder to map")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=os.path.abspath("./Mapped Folders"),
+        help="folder the maps are written to (default: ./Mapped Folders)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=sorted(MAP_WRITERS),
+        default="txt",
+        help=(
+            "map format: box-drawing text, JSON Lines, CSV, or compact binary"
+            " (default: txt)"
+        ),
+    )
+    parser.add_argument(
+        "-z",
+        "--compress",
+        choices=sorted(COMPRESSIONS),
+        default=None,
+        help="compress maps while writing them (gzip, bzip2 or xz)",
+    )
+    parser.add_argument(
+        "-d",
+        "--depth",
+        type=int,
+        default=None,
+        help="only read folders up to this many levels below each source",
+    )
+    parser.add_argument(
+        "-m",
+        "--max-entries",
+        type=int,
+        default=None,
+        metavar="K",
+        help="list at most K entries per folder, then count the rest",
+    )
+    parser.add_argument(
+        "--sort",
+        choices=SORT_ORDERS,
+        default=None,
+        help=(
+            "sort every folder instead of keeping the filesystem's order: by"
+            " name, natural name (file2 before file10), size or modification"
+            " time (largest/newest first), or by name with subfolders first"
+        ),
+    )
+    parser.add_argument(
+        "--sort-memory",
+        type=int,
+        default=None,
+        metavar="MB",
+        help=(
+            "with --sort, keep the files being sorted to about MB megabytes"
+            " in all, sorting larger folders on disk instead; the budget is"
+            " split between the folders read at once (see --workers and"
+            " --backend). Not applied with --sizes, which holds the whole"
+            " tree in memory"
+        ),
+    )
+    parser.add_argument(
+        "--tmp-dir", default=None, help="folder for the temporary sort files"
+    )
+    parser.add_argument(
+        "-x",
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help=(
+            "skip matching entries without reading them: a gitignore-style"
+            " glob, or a regex prefixed with 're:' (repeatable)"
+        ),
+    )
+    parser.add_argument(
+        "--gitignore",
+        action="store_true",
+        help="also skip whatever the .gitignore files in the tree exclude",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "threads reading directories concurrently (default: 1); with"
+            " --backend async, the most reads kept in flight (default: 64)"
+        ),
+    )
+    parser.add_argument(
+        "--backend",
+        choices=("threads", "async"),
+        default="threads",
+        help=(
+            "directory scanner: a fixed thread pool, or an asyncio scheduler"
+            " that adapts its concurrency to latency (for remote mounts)"
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="folders mapped in parallel processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        action="store_true",
+        help="show total size, file count and newest change of every folder",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=0,
+        metavar="N",
+        help="with --sizes, list the N largest folders at the end of the map",
+    )
+    parser.add_argument(
+        "--duplicates",
+        action="store_true",
+        help=(
+            "also list files with identical content in a _duplicates.txt"
+            " report next to each map"
+        ),
+    )
+    parser.add_argument(
+        "--hash-jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help=(
+            "with --duplicates, processes hashing each folder's files (default:"
+            " one per CPU, or 1 when several folders are mapped in parallel)"
+        ),
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="reuse unchanged directories from the snapshot cache",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help=(
+            "time the directory reads, writes and progress updates of every"
+            " map, print a summary and save it as JSON next to the map"
+        ),
+    )
+    parser.add_argument(
+        "--lang", choices=sorted(translations), default="English", help="map language"
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    args = parser.parse_args(argv)
+    if args.depth is not None and args.depth < 1:
+        parser.error("--depth must be at least 1")
+    if args.max_entries is not None and args.max_entries < 1:
+        parser.error("--max-entries must be at least 1")
+    if args.sort_memory is not None:
+        if args.sort is None:
+            parser.error("--sort-memory needs --sort")
+        if args.sort_memory < 1:
+            parser.error("--sort-memory must be at least 1")
+    if args.hash_jobs is not None and args.hash_jobs < 1:
+        parser.error("--hash-jobs must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
+
+
+def report(done, total, result):
+    if result.ok:
+        print(
+            f"[{done}/{total}] {result.source} -> {result.output_file}"
+            f" ({result.items:,} entries, {result.elapsed:.2f} s)"
+        )
+        if result.stats:
+            print(format_summary("statistics", result.stats))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        os.makedirs(args.output, exist_ok=True)
+    except OSError as e:
+        print(f"error: {args.output}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    sources = []
+    statuses = []
+    for source in args.sources:
+        if os.path.isdir(source):
+            sources.append(source)
+        else:
+            print(f"error: {source}: not a folder", file=sys.stderr)
+            statuses.append(EXIT_ERROR)
+
+    hash_jobs = args.hash_jobs
+    if hash_jobs is None and len(sources) > 1 and args.jobs != 1:
+        # The folders are already spread over the CPUs.
+        hash_jobs = 1
+
+    start = time.perf_counter()
+    try:
+        results = map_roots(
+            sources,
+            args.output,
+            translations,
+            args.lang,
+            processes=args.jobs,
+            progress_callback=None if args.quiet else report,
+            workers=args.workers,
+            use_cache=args.cache,
+            max_depth=args.depth,
+            max_entries=args.max_entries,
+            order=args.sort,
+            sort_memory=args.sort_memory and args.sort_memory << 20,
+            tmp_dir=args.tmp_dir,
+            backend=args.backend,
+            output_format=args.format,
+            compression=args.compress,
+            exclude=args.exclude,
+            gitignore=args.gitignore,
+            show_sizes=args.sizes,
+            top_folders=args.top,
+            duplicates=args.duplicates,
+            hash_processes=hash_jobs,
+            instrument=args.stats,
+            stats_sidecar=args.stats,
+        )
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+    for result in results:
+        if result.empty:
+            print(f"{result.source}: {result.error}", file=sys.stderr)
+            statuses.append(EXIT_EMPTY)
+        elif not result.ok:
+            print(f"error: {result.source}: {result.error}", file=sys.stderr)
+            statuses.append(EXIT_ERROR)
+    if not args.quiet and len(results) > 1:
+        mapped = [r for r in results if r.ok]
+        print(
+            f"{len(mapped)}/{len(results)} folders mapped,"
+            f" {sum(r.items for r in mapped):,} entries"
+            f" in {time.perf_counter() - start:.2f} s"
+        )
+
+    if EXIT_ERROR in statuses:
+        return EXIT_ERROR
+    if EXIT_EMPTY in statuses:
+        return EXIT_EMPTY
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
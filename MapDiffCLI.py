@@ -0,0 +1,102 @@
+"""
+Compare two maps of the same folder and report what changed between them.
+
+    python -m MapDiffCLI OLD_MAP NEW_MAP [-o REPORT] [options]
+
+Maps of any format (text, JSON Lines, CSV, binary, compressed or not) are
+sorted on disk and merged, so even maps of tens of millions of entries are
+compared in a fixed amount of memory.
+
+Exit status: 0 when the maps list the same entries, 1 when they differ,
+2 for usage or read errors.
+"""
+
+import argparse
+import sys
+import time
+
+from localization.translations import translations
+from utils.external_sort import DEFAULT_RUN_SIZE
+from utils.map_diff import diff_maps, diff_report_path
+
+EXIT_SAME = 0
+EXIT_CHANGED = 1
+EXIT_USAGE = 2
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m MapDiffCLI",
+        description="Compare two folder maps and list what changed.",
+    )
+    parser.add_argument("old", metavar="OLD_MAP", help="the earlier map")
+    parser.add_argument("new", metavar="NEW_MAP", help="the later map")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="report file (default: NEW_MAP's name with a _diff.txt suffix)",
+    )
+    parser.add_argument(
+        "--rollup-depth",
+        type=int,
+        default=None,
+        metavar="N",
+        help="only summarize changes for folders up to N levels deep",
+    )
+    parser.add_argument(
+        "--run-size",
+        type=int,
+        default=DEFAULT_RUN_SIZE,
+        metavar="N",
+        help=(
+            "entries of each map sorted in memory before spilling to a"
+            f" temporary file (default: {DEFAULT_RUN_SIZE:,})"
+        ),
+    )
+    parser.add_argument(
+        "--tmp-dir", default=None, help="folder for the temporary sort files"
+    )
+    parser.add_argument(
+        "--lang", choices=sorted(translations), default="English", help="report language"
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    args = parser.parse_args(argv)
+    if args.rollup_depth is not None and args.rollup_depth < 1:
+        parser.error("--rollup-depth must be at least 1")
+    if args.run_size < 1:
+        parser.error("--run-size must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = args.output or diff_report_path(args.new)
+    start = time.perf_counter()
+    try:
+        summary = diff_maps(
+            args.old,
+            args.new,
+            output,
+            translations,
+            args.lang,
+            run_size=args.run_size,
+            rollup_depth=args.rollup_depth,
+            tmp_dir=args.tmp_dir,
+        )
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        return 130
+
+    if not args.quiet:
+        counts = translations[args.lang]["diff_summary"].format(
+            added=summary.added, removed=summary.removed, modified=summary.modified
+        )
+        print(f"{output}: {counts} ({time.perf_counter() - start:.2f} s)")
+    return EXIT_CHANGED if summary.changes else EXIT_SAME
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Compare the thread-pool and asyncio walkers on a simulated remote mount.
+
+    python -m benchmarks.bench_async_walk [--latency MS] [--capacity N]
+
+Every directory read is delayed by ``--latency`` milliseconds. With
+``--capacity``, the simulated server only serves that many reads at full
+speed: past it, reads slow down with the square of the overload, so a
+swamped server gets less done overall, as a thrashing NFS/SMB server
+would. That is where a fixed pool either under-uses the server or swamps
+it, and the adaptive limit of ``async_walk`` should settle near the
+capacity.
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+
+from benchmarks.synthetic_trees import build_tree
+from utils.async_walk import AdaptiveLimit, async_walk
+from utils.file_operations import parallel_walk, read_directory, scandir_walk
+
+
+class LatencyInjector:
+    """A directory reader that sleeps like a remote round-trip first."""
+
+    def __init__(self, latency_ms, capacity=None):
+        self.latency = latency_ms / 1000
+        self.capacity = capacity
+        self.in_flight = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+            load = self.in_flight
+        delay = self.latency
+        if self.capacity and load > self.capacity:
+            delay *= (load / self.capacity) ** 2
+        time.sleep(delay)
+        try:
+            return read_directory(path)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def flatten(listings):
+    return [(l.path, l.depth, l.dirs, l.files) for l in listings]
+
+
+def run(label, walk, expected, baseline):
+    start = time.perf_counter()
+    result = flatten(walk())
+    elapsed = time.perf_counter() - start
+    status = "ok" if result == expected else "MISMATCH"
+    speedup = f"x{baseline / elapsed:6.2f}" if baseline else ""
+    print(f"{label:<24} {elapsed:8.3f} s  {speedup}  {status}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=20.0, help="ms per read")
+    parser.add_argument(
+        "--capacity", type=int, default=None, help="reads served at full speed"
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--max-in-flight", type=int, default=128)
+    parser.add_argument(
+        "--serial", action="store_true", help="also time the serial walker"
+    )
+    args = parser.parse_args()
+
+    reader = LatencyInjector(args.latency, args.capacity)
+    with tempfile.TemporaryDirectory() as root:
+        entries = build_tree(root, args.depth, args.fanout, args.files)
+        expected = flatten(scandir_walk(root))
+        print(
+            f"tree: {entries:,} entries in {len(expected):,} folders,"
+            f" {args.latency} ms/read, capacity {args.capacity or 'unlimited'}"
+        )
+
+        baseline = None
+        if args.serial:
+            baseline = run(
+                "serial", lambda: scandir_walk(root, reader), expected, None
+            )
+        for workers in args.workers:
+            elapsed = run(
+                f"threads, {workers} workers",
+                lambda: parallel_walk(root, workers, reader=reader),
+                expected,
+                baseline,
+            )
+            baseline = baseline or elapsed
+
+        limiter = AdaptiveLimit(maximum=args.max_in_flight)
+        run(
+            f"async, <= {args.max_in_flight} in flight",
+            lambda: async_walk(root, args.max_in_flight, reader, limiter=limiter),
+            expected,
+            baseline,
+        )
+        print(
+            f"adaptive limit: final {limiter.limit:.1f}, peak {limiter.peak:.1f},"
+            f" latency {limiter.baseline * 1000:.1f} ms best"
+            f" / {limiter.smoothed * 1000:.1f} ms smoothed"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Measure the throughput of every map writer, and how fast each format loads.
+
+    python -m benchmarks.bench_formats [--entries N] [--stats] [--compress gz]
+
+Entries are synthesised in memory so only formatting and writing are
+timed. ``--stats`` gives every entry a stat result, so the size and mtime
+fields of the structured formats are filled in as well. ``--compress``
+writes every map through one of the streaming compressors.
+"""
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_trees import entries_of, synthetic_listings
+from utils.writers import (
+    COMPRESSIONS,
+    MAP_WRITERS,
+    format_size,
+    iter_binary_map,
+    map_extension,
+)
+
+
+def with_stats(entries):
+    stat = os.stat_result((0o100644, 0, 0, 1, 0, 0, 4096, 0, 1.7e9, 1.7e9))
+    for entry in entries:
+        entry.stat = stat
+        yield entry
+
+
+def load(output_format, path):
+    """Parse a map back into records; return how many."""
+    if output_format == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            return sum(1 for line in f if json.loads(line))
+    if output_format == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            return sum(1 for row in csv.reader(f))
+    if output_format == "bin":
+        with open(path, "rb") as f:
+            return sum(1 for record in iter_binary_map(f.read()))
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for line in f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--compress", choices=sorted(COMPRESSIONS), default=None)
+    args = parser.parse_args()
+
+    listings = list(synthetic_listings(args.entries))
+    entries = list(entries_of(listings))
+    if args.stats:
+        entries = list(with_stats(entries))
+    count = len(entries)
+    print(
+        f"{count:,} entries{' with stats' if args.stats else ''}"
+        f"{', ' + args.compress + ' compressed' if args.compress else ''}"
+    )
+    print(f"{'format':8s} {'write':>9s} {'entries/s':>12s} {'size':>10s} {'load':>9s}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for output_format, writer_class in MAP_WRITERS.items():
+            output = os.path.join(
+                tmp, "map" + map_extension(output_format, args.compress)
+            )
+            start = time.perf_counter()
+            with writer_class.open(output, compression=args.compress) as f:
+                writer = writer_class(f)
+                writer.write_header("Folder Map of:", "root")
+                writer.write_entries(entries)
+                writer.close()
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(output)
+
+            loaded = float("nan")
+            if not args.compress:
+                start = time.perf_counter()
+                load(output_format, output)
+                loaded = time.perf_counter() - start
+            print(
+                f"{output_format:8s} {elapsed:7.3f} s {count / elapsed:12,.0f}"
+                f" {format_size(size):>10s} {loaded:7.3f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Time the mapper's scan and write paths on synthetic trees against a baseline.
+
+    python -m benchmarks.bench_mapper [--scale S] [--tree-dir DIR]
+        [--trees NAME ...] [--cases NAME ...] [--repeat N]
+        [--save-baseline FILE] [--baseline FILE] [--threshold F]
+
+Four trees are built, the same on every run:
+
+* ``wide``: 100,000 files in one folder;
+* ``deep``: a chain of 2,000 nested folders;
+* ``balanced``: 1,111 folders, 10 per level, with 900 files each (~1M entries);
+* ``roots``: 200 small trees mapped as one batch.
+
+``--scale`` shrinks them all for a quick run (0.1 gives a tenth of the
+entries). Building the trees takes longer than mapping them, so with
+``--tree-dir`` they are kept there and reused while the scale is the same.
+
+Every case runs in a fresh interpreter, so each gets its own peak resident
+set size (including worker processes) and none profits from another's warm
+imports or heap; the time is the best of ``--repeat`` runs. The disk cache
+is warm after the first run, so this measures the mapper, not the disk.
+
+``--save-baseline`` stores the results as JSON; ``--baseline`` compares with
+such a file and exits with status 1 when a case is more than ``--threshold``
+(default 15%) slower or larger than it was. Baselines only compare on the
+same machine and scale.
+
+The reference baseline, ``benchmarks/baseline.json``, was recorded at
+``--scale 0.1`` and is what ``--baseline`` defaults to; without ``--scale``
+the trees are built at the scale of the baseline (1.0 when there is none).
+``--baseline ''`` skips the comparison. Refresh the file after a change that
+is meant to move the numbers, on the machine the comparisons run on:
+
+    python -m benchmarks.bench_mapper --scale 0.1 \
+        --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.memory import peak_rss
+from benchmarks.synthetic_trees import (
+    build_deep_tree,
+    build_roots,
+    build_tree,
+    build_wide_tree,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+TREES = ("wide", "deep", "balanced", "roots")
+TREE_CASES = (
+    "scan",
+    "scan-threads",
+    "scan-async",
+    "txt",
+    "jsonl",
+    "csv",
+    "bin",
+    "txt-gz",
+    "sizes",
+    "sorted",
+    "sorted-bounded",
+)
+ROOTS_CASES = ("batch-serial", "batch-processes")
+SPEC_FILE = "trees.json"
+# Sort memory of the sorted-bounded case, small enough for the wide tree to
+# spill to disk.
+SORT_MEMORY = 4 << 20
+
+
+def tree_specs(scale):
+    def scaled(count):
+        return max(1, round(count * scale))
+
+    return {
+        "wide": {"files": scaled(100_000)},
+        "deep": {"levels": scaled(2_000)},
+        "balanced": {"depth": 3, "fanout": 10, "files_per_dir": scaled(900)},
+        "roots": {"roots": scaled(200), "depth": 2, "fanout": 4, "files_per_dir": 20},
+    }
+
+
+def build_trees(tree_dir, scale, names):
+    """
+    Build the ``names`` trees under ``tree_dir``, reusing those already
+    built at this scale. Returns {tree name: [root paths]}.
+    """
+    specs = tree_specs(scale)
+    spec_file = os.path.join(tree_dir, SPEC_FILE)
+    try:
+        with open(spec_file, encoding="utf-8") as f:
+            built = json.load(f)
+    except (OSError, ValueError):
+        built = {}
+    paths = {}
+    for name in names:
+        root = os.path.join(tree_dir, name)
+        if built.get(name) != specs[name]:
+            shutil.rmtree(root, ignore_errors=True)
+            start = time.perf_counter()
+            spec = specs[name]
+            if name == "wide":
+                build_wide_tree(root, spec["files"])
+            elif name == "deep":
+                build_deep_tree(root, spec["levels"])
+            elif name == "balanced":
+                build_tree(root, spec["depth"], spec["fanout"], spec["files_per_dir"])
+            else:
+                build_roots(
+                    root,
+                    spec["roots"],
+                    spec["depth"],
+                    spec["fanout"],
+                    spec["files_per_dir"],
+                )
+            built[name] = spec
+            with open(spec_file, "w", encoding="utf-8") as f:
+                json.dump(built, f, indent=2)
+            print(f"built {name} in {time.perf_counter() - start:.1f} s")
+        if name == "roots":
+            paths[name] = sorted(
+                os.path.join(root, child) for child in os.listdir(root)
+            )
+        else:
+            paths[name] = [root]
+    return paths
+
+
+def run_case(case, paths, output_dir):
+    """Run ``case`` once over ``paths``; returns the number of entries mapped."""
+    from localization.translations import translations
+    from utils.file_operations import generate_file_hierarchy, iter_tree
+    from utils.ordering import NATURAL
+
+    if case.startswith("batch-"):
+        from utils.batch import map_roots
+
+        processes = 1 if case == "batch-serial" else None
+        results = map_roots(paths, output_dir, translations, "English", processes)
+        return sum(result.items for result in results)
+
+    path = paths[0]
+    if case.startswith("scan"):
+        options = {
+            "scan": {},
+            "scan-threads": {"workers": 8},
+            "scan-async": {"backend": "async"},
+        }[case]
+        return sum(1 for _ in iter_tree(path, **options))
+
+    options = {
+        "txt": {},
+        "jsonl": {"output_format": "jsonl"},
+        "csv": {"output_format": "csv"},
+        "bin": {"output_format": "bin"},
+        "txt-gz": {"compression": "gz"},
+        "sizes": {"show_sizes": True, "top_folders": 10},
+        "sorted": {"order": NATURAL},
+        "sorted-bounded": {"order": NATURAL, "sort_memory": SORT_MEMORY},
+    }[case]
+    output_file = os.path.join(output_dir, "map")
+    return generate_file_hierarchy(
+        path, output_file, translations, "English", **options
+    )
+
+
+def measure(case, paths, repeat):
+    """Run in the child interpreter; prints the case's result as JSON."""
+    best = float("inf")
+    entries = 0
+    for _ in range(repeat):
+        output_dir = tempfile.mkdtemp(prefix="bench-mapper-")
+        try:
+            start = time.perf_counter()
+            entries = run_case(case, paths, output_dir)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    result = {"seconds": best, "entries": entries, "peak_rss": peak_rss(children=True)}
+    print(json.dumps(result))
+
+
+def run_child(case, paths, repeat):
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_mapper",
+            "--child",
+            case,
+            "--repeat",
+            str(repeat),
+            *paths,
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def compare(result, baseline, threshold):
+    """Relative changes in time and memory, and whether either regressed."""
+    changes = []
+    regressed = False
+    for field in ("seconds", "peak_rss"):
+        old, new = baseline.get(field), result.get(field)
+        if old and new:
+            change = new / old - 1
+            changes.append(f"{change:+.0%}")
+            regressed |= change > threshold
+        else:
+            changes.append("")
+    return changes, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scale", type=float, default=None, help="default: the baseline's scale"
+    )
+    parser.add_argument(
+        "--tree-dir", default=None, help="build and keep the trees here"
+    )
+    parser.add_argument("--trees", nargs="+", choices=TREES, default=list(TREES))
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        choices=TREE_CASES + ROOTS_CASES,
+        default=None,
+        help="only run these cases (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save-baseline", metavar="FILE", default=None)
+    parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        default=BASELINE,
+        help="compare with this baseline ('' for none; default: %(default)s)",
+    )
+    parser.add_argument("--threshold", type=float, default=0.15)
+    parser.add_argument("--child", metavar="CASE", help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure(args.child, args.paths, args.repeat)
+        return 0
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+        if args.scale is None:
+            args.scale = stored.get("scale", 1.0)
+        elif stored.get("scale") != args.scale:
+            print(f"warning: the baseline was measured at scale {stored.get('scale')}")
+        baseline = stored.get("results", {})
+    elif args.scale is None:
+        args.scale = 1.0
+
+    tree_dir = args.tree_dir or tempfile.mkdtemp(prefix="bench-trees-")
+    os.makedirs(tree_dir, exist_ok=True)
+    results = {}
+    regressions = []
+    try:
+        paths = build_trees(tree_dir, args.scale, args.trees)
+        print(
+            f"{'case':<24} {'entries':>10} {'seconds':>9} {'entries/s':>11}"
+            f" {'peak MB':>8} {'time':>6} {'memory':>7}"
+        )
+        for tree in args.trees:
+            cases = ROOTS_CASES if tree == "roots" else TREE_CASES
+            for case in cases:
+                if args.cases and case not in args.cases:
+                    continue
+                name = f"{tree}/{case}"
+                result = run_child(case, paths[tree], args.repeat)
+                results[name] = result
+                changes, regressed = ["", ""], False
+                if name in baseline:
+                    changes, regressed = compare(result, baseline[name], args.threshold)
+                if regressed:
+                    regressions.append(name)
+                rate = result["entries"] / result["seconds"]
+                peak = result["peak_rss"] / 2**20 if result["peak_rss"] else 0
+                print(
+                    f"{name:<24} {result['entries']:>10,} {result['seconds']:>9.3f}"
+                    f" {rate:>11,.0f} {peak:>8.1f} {changes[0]:>6} {changes[1]:>7}"
+                )
+    finally:
+        if args.tree_dir is None:
+            shutil.rmtree(tree_dir, ignore_errors=True)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "scale": args.scale,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+    if regressions:
+        print(f"regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
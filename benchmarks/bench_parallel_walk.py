@@ -0,0 +1,62 @@
+"""
+Compare the serial and thread-pool walkers on a synthetic deep/wide tree.
+
+    python -m benchmarks.bench_parallel_walk [--latency MS]
+
+``--latency`` adds a sleep to every directory read to mimic the round-trip
+of a network share, which is where the parallel walker pays off.
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks.synthetic_trees import build_tree
+from utils import file_operations
+from utils.file_operations import parallel_walk, scandir_walk
+
+
+def flatten(listings):
+    return [(l.path, l.depth, l.dirs, l.files) for l in listings]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="ms per read")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    if args.latency:
+        read_directory = file_operations.read_directory
+
+        def slow_read_directory(path):
+            time.sleep(args.latency / 1000)
+            return read_directory(path)
+
+        file_operations.read_directory = slow_read_directory
+
+    with tempfile.TemporaryDirectory() as root:
+        entries = build_tree(root, args.depth, args.fanout, args.files)
+        print(f"tree: {entries:,} entries, latency {args.latency} ms/read")
+
+        start = time.perf_counter()
+        expected = flatten(scandir_walk(root))
+        serial = time.perf_counter() - start
+        print(f"serial      {serial:8.3f} s")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            result = flatten(parallel_walk(root, workers))
+            elapsed = time.perf_counter() - start
+            status = "ok" if result == expected else "MISMATCH"
+            print(
+                f"{workers:3d} workers {elapsed:8.3f} s"
+                f"  x{serial / elapsed:5.2f}  {status}"
+            )
+
+
+if __name__ == "__main__":
+    main()
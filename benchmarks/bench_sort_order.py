@@ -0,0 +1,94 @@
+"""
+Measure what the sort orders add to a mapping run.
+
+    python -m benchmarks.bench_sort_order [--entries N] [--depth D --fanout F]
+
+First one synthetic directory of ``--entries`` names (default 1M, mixed
+text and numbers, as in photo or log folders) is sorted in every order,
+straight from a listing in memory. Then a real tree is built in a temporary
+folder and walked with ``iter_tree`` in every order, against the unsorted
+walk. Sorting by size or time needs a stat per entry, so those orders are
+also compared with an unsorted walk that collects stats.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic_trees import build_tree
+from utils.file_operations import iter_tree
+from utils.ordering import SORT_ORDERS, STAT_ORDERS, natural_key, sorting_reader
+
+
+def synthetic_directory(entries, seed=0):
+    rng = random.Random(seed)
+    stems = ("IMG_", "report ", "log-", "Track ", "invoice_", "README", "data")
+    files = []
+    stats = {}
+    for i in range(entries):
+        name = f"{rng.choice(stems)}{rng.randrange(10**6)}_{i}.{rng.choice('ab')}"
+        files.append(name)
+        size = rng.randrange(1 << 30)
+        stats[name] = os.stat_result((0o100644, 0, 0, 1, 0, 0, size, 0, i, i))
+    return [], files, [], stats
+
+
+def best_of(repeat, function):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    listing = synthetic_directory(args.entries)
+    print(f"one directory of {args.entries:,} entries")
+    baseline = best_of(args.repeat, lambda: list(listing[1]))
+    print(f"{'unsorted':<12} {baseline:8.3f} s")
+    for order in SORT_ORDERS:
+        read = sorting_reader(lambda path: listing, order)
+
+        def run():
+            natural_key.cache_clear()
+            read("")
+
+        elapsed = best_of(args.repeat, run)
+        per_entry = elapsed / args.entries * 1e9
+        print(f"{order:<12} {elapsed:8.3f} s  {per_entry:6.0f} ns/entry")
+
+    with tempfile.TemporaryDirectory() as root:
+        entries = build_tree(root, args.depth, args.fanout, args.files)
+        print(f"\niter_tree over {entries:,} entries on disk")
+
+        def walk(**options):
+            return best_of(
+                args.repeat, lambda: sum(1 for _ in iter_tree(root, **options))
+            )
+
+        plain = walk()
+        with_stats = walk(with_stats=True)
+        print(f"{'unsorted':<12} {plain:8.3f} s")
+        print(f"{'+ stats':<12} {with_stats:8.3f} s")
+        for order in SORT_ORDERS:
+            elapsed = walk(order=order)
+            reference = with_stats if order in STAT_ORDERS else plain
+            print(
+                f"{order:<12} {elapsed:8.3f} s  {elapsed / reference - 1:+7.1%}"
+                f" vs {'stats' if order in STAT_ORDERS else 'unsorted'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
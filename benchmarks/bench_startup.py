@@ -0,0 +1,93 @@
+"""
+Measure how long the window takes to appear.
+
+    python -m benchmarks.bench_startup [--repeat N] [--max-ms MS]
+
+Every run starts a fresh interpreter, as a user launching the app does, and
+reports the time to import the main window's module, to build the window,
+and to its first paint (all widgets built, themed and drawn). With
+``--max-ms``, the exit status is 1 when the best time to first paint is
+slower, so a regression fails a scheduled job. Without a display only the
+import time is measured.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once():
+    """Run in the child interpreter; prints one JSON line of timings in ms."""
+    start = time.perf_counter()
+    import tkinter as tk
+
+    from ui.main_window import FolderMapper
+
+    timings = {"import": (time.perf_counter() - start) * 1000}
+    try:
+        root = tk.Tk()
+    except tk.TclError:  # no display
+        print(json.dumps(timings))
+        return
+    FolderMapper(root)
+    timings["build"] = (time.perf_counter() - start) * 1000
+    root.update()
+    timings["first_paint"] = (time.perf_counter() - start) * 1000
+    root.destroy()
+    print(json.dumps(timings))
+
+
+def run(repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        timings = json.loads(output.splitlines()[-1])
+        timings["process"] = (time.perf_counter() - start) * 1000
+        runs.append(timings)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-ms", type=float, default=None, help="fail above this time to first paint"
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure_once()
+        return 0
+
+    runs = run(args.repeat)
+    print(f"{args.repeat} fresh starts, times in ms")
+    print(f"{'':<12} {'best':>8} {'median':>8}")
+    for name in ("import", "build", "first_paint", "process"):
+        values = [timings[name] for timings in runs if name in timings]
+        if values:
+            print(f"{name:<12} {min(values):8.1f} {statistics.median(values):8.1f}")
+    if "first_paint" not in runs[0]:
+        print("no display: the window was not built")
+        return 0
+    best = min(timings["first_paint"] for timings in runs)
+    if args.max_ms is not None and best > args.max_ms:
+        print(f"first paint took {best:.1f} ms, over the {args.max_ms:.1f} ms limit")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
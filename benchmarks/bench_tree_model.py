@@ -0,0 +1,61 @@
+"""
+Measure the memory cost per entry of CompactTree on a synthetic tree.
+
+    python -m benchmarks.bench_tree_model [--entries N] [--unique-names]
+
+The synthetic tree is built in memory, so no files are created. For
+comparison, a sample of the tree is also kept as a list of dicts, the
+obvious plain-Python representation.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from benchmarks.memory import peak_rss
+from benchmarks.synthetic_trees import entries_of, synthetic_listings
+from utils.tree_model import CompactTree
+
+
+def dict_bytes_per_entry(sample):
+    listings = synthetic_listings(sample, unique_names=True)
+    gc.collect()
+    tracemalloc.start()
+    nodes = [
+        {"name": e.name, "depth": e.depth, "is_dir": e.is_dir, "children": []}
+        for e in entries_of(listings)
+    ]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(nodes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=5_000_000)
+    parser.add_argument("--unique-names", action="store_true")
+    parser.add_argument("--sample", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rss_before = peak_rss()
+    start = time.perf_counter()
+    listings = synthetic_listings(args.entries, unique_names=args.unique_names)
+    tree = CompactTree.from_entries(entries_of(listings))
+    elapsed = time.perf_counter() - start
+    rss_after = peak_rss()
+
+    count = len(tree)
+    print(f"{count:,} entries built in {elapsed:.1f} s ({len(tree.names):,} names)")
+    print(f"CompactTree   {tree.nbytes() / count:7.1f} bytes/entry (accounted)")
+    if rss_before is not None:
+        rss_per_entry = (rss_after - rss_before) / count
+        print(f"              {rss_per_entry:7.1f} bytes/entry (peak RSS)")
+    print(
+        f"list of dicts {dict_bytes_per_entry(args.sample):7.1f} bytes/entry"
+        f" (sample of {args.sample:,}, unique names)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare the line-by-line map writer with the buffered TextMapWriter.
+
+    python -m benchmarks.bench_writers [--entries N]
+
+Listings are synthesised in memory so only the writing is measured.
+"""
+
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_trees import entries_of, synthetic_listings
+from utils.writers import TextMapWriter
+
+
+def legacy_write(f, listings):
+    """The per-line writer generate_file_hierarchy used before TextMapWriter."""
+    for listing in listings:
+        level = listing.depth
+        indent = "│   " * (level - 1) + "├── " if level > 0 else ""
+        f.write(f"{indent}{os.path.basename(listing.path)}/\n")
+        files = listing.files
+        for i, file in enumerate(files):
+            sub_indent = "│   " * level
+            if i == len(files) - 1 and len(listing.dirs) == 0:
+                sub_indent += "└── "
+            else:
+                sub_indent += "├── "
+            f.write(f"{sub_indent}{file}\n")
+
+
+def buffered_write(f, entries):
+    writer = TextMapWriter(f)
+    writer.write_entries(entries)
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    listings = list(synthetic_listings(args.entries))
+    entries = list(entries_of(listings))
+    lines = len(entries)
+    print(f"{lines:,} lines")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = []
+        for name, write, data, buffering in (
+            ("legacy", legacy_write, listings, -1),
+            ("buffered", buffered_write, entries, 1 << 20),
+        ):
+            output = os.path.join(tmp, f"{name}.txt")
+            start = time.perf_counter()
+            with open(output, "w", encoding="utf-8", buffering=buffering) as f:
+                write(f, data)
+            elapsed = time.perf_counter() - start
+            outputs.append(output)
+            print(f"{name:9s} {elapsed:7.3f} s  {lines / elapsed:12,.0f} lines/s")
+        same = filecmp.cmp(*outputs, shallow=False)
+        print("outputs identical" if same else "OUTPUTS DIFFER")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss(children=False):
+    """
+    Peak resident set size in bytes of this process, or None where it can't
+    be read. With ``children``, the peak of any of its finished child
+    processes counts too.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if children:
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak if sys.platform == "darwin" else peak * 1024  # kB on Linux
@@ -0,0 +1,105 @@
+import os
+
+from utils.file_operations import DirListing, TreeEntry
+
+
+def build_tree(root, depth, fanout, files_per_dir, file_size=0):
+    """
+    Create a synthetic directory tree under ``root``.
+
+    Every directory down to ``depth`` levels holds ``files_per_dir`` files of
+    ``file_size`` bytes and ``fanout`` subdirectories. Returns the number of
+    entries (files and directories) created below ``root``.
+    """
+    os.makedirs(root, exist_ok=True)
+    payload = b"x" * file_size
+    created = 0
+    stack = [(root, 0)]
+    while stack:
+        path, level = stack.pop()
+        for i in range(files_per_dir):
+            with open(os.path.join(path, f"file_{i:05d}.dat"), "wb") as f:
+                f.write(payload)
+        created += files_per_dir
+        if level < depth:
+            for i in range(fanout):
+                child = os.path.join(path, f"dir_{i:04d}")
+                os.mkdir(child)
+                stack.append((child, level + 1))
+            created += fanout
+    return created
+
+
+def synthetic_listings(
+    entries, fanout=8, files_per_dir=40, max_depth=6, unique_names=False
+):
+    """
+    Yield pre-order ``DirListing``s of a balanced in-memory tree with about
+    ``entries`` entries, without touching the disk. With ``unique_names``
+    every file name is distinct instead of repeating in every folder.
+    """
+    produced = 0
+    serial = 0
+    stack = [("root", 0)]
+    while stack and produced < entries:
+        path, depth = stack.pop()
+        dirs = [f"dir_{i:04d}" for i in range(fanout)] if depth < max_depth else []
+        if unique_names:
+            files = [f"file_{serial + i:09d}.dat" for i in range(files_per_dir)]
+            serial += files_per_dir
+        else:
+            files = [f"file_{i:05d}.dat" for i in range(files_per_dir)]
+        produced += len(dirs) + len(files)
+        yield DirListing(path, depth, dirs, files)
+        for name in reversed(dirs):
+            stack.append((f"{path}/{name}", depth + 1))
+
+
+def entries_of(listings):
+    """Lazily yield the ``iter_tree`` entries matching ``listings``."""
+    for listing in listings:
+        name = os.path.basename(listing.path)
+        yield TreeEntry(listing.path, name, listing.depth, True, False)
+        last = len(listing.files) - 1 if not listing.dirs else -1
+        for i, file in enumerate(listing.files):
+            path = f"{listing.path}/{file}"
+            yield TreeEntry(path, file, listing.depth + 1, False, i == last)
+
+
+def build_wide_tree(root, files):
+    """One directory holding ``files`` empty files; returns ``files``."""
+    os.makedirs(root, exist_ok=True)
+    for i in range(files):
+        open(os.path.join(root, f"file_{i:07d}.dat"), "wb").close()
+    return files
+
+
+def build_deep_tree(root, levels, files_per_dir=1):
+    """
+    A chain of ``levels`` nested directories, each with ``files_per_dir``
+    files. Names are a single character so 2,000 levels stay under the 4 KB
+    path limit of Linux; returns the number of entries created.
+    """
+    os.makedirs(root, exist_ok=True)
+    path = root
+    created = 0
+    for _ in range(levels):
+        for i in range(files_per_dir):
+            open(os.path.join(path, f"f{i}"), "wb").close()
+        path = os.path.join(path, "d")
+        os.mkdir(path)
+        created += files_per_dir + 1
+    return created
+
+
+def build_roots(root, roots, depth, fanout, files_per_dir):
+    """
+    ``roots`` small ``build_tree`` trees side by side under ``root``, as
+    mapped in one batch. Returns their paths.
+    """
+    paths = []
+    for i in range(roots):
+        path = os.path.join(root, f"root_{i:04d}")
+        build_tree(path, depth, fanout, files_per_dir)
+        paths.append(path)
+    return paths
@@ -22,10 +22,24 @@ translations = {
         "settings": "Settings",
         "dark_mode": "Dark Mode",
         "apply": "Apply",
-        "user_guide": """,
-        'empty_folder': "The selected folder is empty.",
-        'empty_folder_error': "The selected folder is empty. Please choose a folder with content to map.",
-        'error_generating_map': "Error generating folder map"
+        "empty_folder": "The selected folder is empty.",
+        "empty_folder_error": "The selected folder is empty. Please choose a folder with content to map.",
+        "error_generating_map": "Error generating folder map",
+        "files": "files",
+        "largest_folders": "Largest folders:",
+        "more_entries": "… and {count:,} more",
+        "map_cancelled": "Mapping cancelled: this map is incomplete.",
+        "map_diff": "Map Diff:",
+        "diff_summary": "{added:,} added, {removed:,} removed, {modified:,} modified",
+        "changed_folders": "Changed folders:",
+        "diff_generated": "Map comparison written to:",
+        "duplicate_files": "Duplicate files in",
+        "duplicate_group": "{count} copies of {size}, {wasted} reclaimable",
+        "duplicates_summary": "{groups:,} sets of duplicates, {copies:,} extra copies, {wasted} reclaimable",
+        "no_duplicates": "No duplicate files found.",
+        "duplicates_read": "{size} read in {seconds:.2f} s, {rate}/s",
+        "duplicates_generated": "Duplicates report written to:",
+        "user_guide": """
 How to use Folder Mapper:
 
 1. Select Input Folder: Click the "Select Input" button to choose the folder you want to map.
@@ -65,10 +79,24 @@ Additional Features:
         "settings": "Impostazioni",
         "dark_mode": "Modalità Scura",
         "apply": "Applica",
-        "user_guide": """,
-        'empty_folder': "La cartella selezionata è vuota.",
-        'empty_folder_error': "La cartella selezionata è vuota. Per favore, scegli una cartella con contenuto da mappare.",
-        'error_generating_map': "Errore nella generazione della mappa della cartella"
+        "empty_folder": "La cartella selezionata è vuota.",
+        "empty_folder_error": "La cartella selezionata è vuota. Per favore, scegli una cartella con contenuto da mappare.",
+        "error_generating_map": "Errore nella generazione della mappa della cartella",
+        "files": "file",
+        "largest_folders": "Cartelle più grandi:",
+        "more_entries": "… e altri {count:,}",
+        "map_cancelled": "Mappatura annullata: questa mappa è incompleta.",
+        "map_diff": "Confronto Mappe:",
+        "diff_summary": "{added:,} aggiunti, {removed:,} rimossi, {modified:,} modificati",
+        "changed_folders": "Cartelle modificate:",
+        "diff_generated": "Confronto delle mappe salvato in:",
+        "duplicate_files": "File duplicati in",
+        "duplicate_group": "{count} copie da {size}, {wasted} recuperabili",
+        "duplicates_summary": "{groups:,} gruppi di duplicati, {copies:,} copie in più, {wasted} recuperabili",
+        "no_duplicates": "Nessun file duplicato trovato.",
+        "duplicates_read": "{size} letti in {seconds:.2f} s, {rate}/s",
+        "duplicates_generated": "Report dei duplicati salvato in:",
+        "user_guide": """
 Come usare Folder Mapper:
 
 1. Seleziona Cartella di Input: Clicca il pulsante "Seleziona Input" per scegliere la cartella da mappare.
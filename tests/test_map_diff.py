@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from localization.translations import translations
+from utils.file_operations import generate_file_hierarchy
+from utils.map_diff import diff_maps
+from utils.writers import map_extension
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "src"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "main.py").write_text("print('hello')\n")
+    (root / "README.md").write_text("# readme\n")
+    os.utime(root / "pkg" / "main.py", (1_700_000_000, 1_700_000_000))
+    return root
+
+
+def write_map(tree, output_file, lang="English", output_format="txt", **options):
+    generate_file_hierarchy(
+        str(tree),
+        str(output_file),
+        translations,
+        lang,
+        output_format=output_format,
+        **options,
+    )
+    return str(output_file)
+
+
+def test_text_maps_in_different_languages_have_no_changes(tree, tmp_path):
+    english = write_map(tree, tmp_path / "en.txt", "English", show_sizes=True)
+    italian = write_map(tree, tmp_path / "it.txt", "Italiano", show_sizes=True)
+
+    summary = diff_maps(
+        english, italian, str(tmp_path / "diff.txt"), translations, "English"
+    )
+
+    assert summary.changes == 0
+
+
+@pytest.mark.parametrize("output_format", ["jsonl", "csv", "bin"])
+def test_structured_maps_report_changed_file_as_modified(
+    tree, tmp_path, output_format
+):
+    extension = map_extension(output_format)
+    old = write_map(tree, tmp_path / f"old{extension}", output_format=output_format)
+    (tree / "pkg" / "main.py").write_text("print('hello, world')\n")
+    new = write_map(tree, tmp_path / f"new{extension}", output_format=output_format)
+
+    report = tmp_path / "diff.txt"
+    summary = diff_maps(old, new, str(report), translations, "English")
+
+    assert (summary.added, summary.removed, summary.modified) == (0, 0, 1)
+    assert "~ pkg/main.py" in report.read_text(encoding="utf-8")
@@ -0,0 +1,76 @@
+import csv
+import json
+import os
+
+import pytest
+
+from localization.translations import translations
+from utils.file_operations import generate_file_hierarchy
+from utils.writers import KIND_FILE, iter_binary_map
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "src"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "main.py").write_text("print('hello')\n")
+    (root / "README.md").write_text("# readme\n")
+    os.utime(root / "pkg" / "main.py", (1_700_000_000.5, 1_700_000_000.5))
+    return root
+
+
+def write_map(tree, tmp_path, output_format, **options):
+    output_file = str(tmp_path / f"map.{output_format}")
+    generate_file_hierarchy(
+        str(tree),
+        output_file,
+        translations,
+        "English",
+        output_format=output_format,
+        **options,
+    )
+    return output_file
+
+
+def file_stats(output_file, output_format):
+    """{relative path: (size, mtime)} of the files of a structured map."""
+    if output_format == "jsonl":
+        with open(output_file, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        return {
+            r["path"]: (r.get("size"), r.get("mtime"))
+            for r in records
+            if r["type"] == "file"
+        }
+    if output_format == "csv":
+        with open(output_file, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        return {
+            r["path"]: (
+                int(r["size"]) if r["size"] else None,
+                float(r["mtime"]) if r["mtime"] else None,
+            )
+            for r in rows
+            if r["type"] == "file"
+        }
+    with open(output_file, "rb") as f:
+        data = f.read()
+    return {
+        path: stat if stat is not None else (None, None)
+        for kind, _, _, path, stat, _, _ in iter_binary_map(data)
+        if kind == KIND_FILE
+    }
+
+
+@pytest.mark.parametrize("output_format", ["jsonl", "csv", "bin"])
+@pytest.mark.parametrize("options", [{}, {"show_sizes": True}])
+def test_structured_maps_carry_file_size_and_mtime(
+    tree, tmp_path, output_format, options
+):
+    output_file = write_map(tree, tmp_path, output_format, **options)
+    stats = file_stats(output_file, output_format)
+
+    main = os.stat(tree / "pkg" / "main.py")
+    assert stats["pkg/main.py"] == (main.st_size, main.st_mtime)
+    readme = os.stat(tree / "README.md")
+    assert stats["README.md"] == (readme.st_size, readme.st_mtime)
@@ -1,16 +1,31 @@
 import os
 import sys
-import subprocess
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import logging
-from PIL import Image, ImageTk
-import webbrowser
-from utils.file_operations import generate_file_hierarchy_threaded
+from utils.file_operations import (
+    build_reader,
+    generate_file_hierarchy_threaded,
+    unique_output_path,
+)
+from utils.instrumentation import MappingStats
+from utils.jobs import MappingJob
+from utils.ordering import SORT_ORDERS
+from utils.progress import ProgressChannel, format_eta
 from utils.settings import load_settings, save_settings
+from utils.writers import COMPRESSIONS, MAP_WRITERS, map_extension
 from localization.translations import translations
 from typing import Dict, Any
 
+TOP_FOLDERS = 10
+NO_COMPRESSION = "-"
+NO_ORDER = "-"
+# Maps larger than this open in the built-in viewer instead of an editor.
+VIEWER_THRESHOLD = 64 * 1024 * 1024
+EXCLUDE_SEPARATOR = ";"
+ICON_SIZE = 16
+
 
 class FolderMapper:
     def __init__(self, master: tk.Tk):
@@ -20,6 +35,8 @@ class FolderMapper:
         self.master = master
         self.master.title("Folder Mapper")
         self.master.resizable(False, False)
+        # Stay hidden while building, so the first paint is the finished window
+        self.master.withdraw()
 
         # ===== Initialize variables =====
         self.settings = self.load_settings()
@@ -30,16 +47,51 @@ class FolderMapper:
         )
         self.dark_mode = tk.BooleanVar(value=self.settings.get("dark_mode", False))
         self.auto_open = tk.BooleanVar(value=True)
+        self.use_cache = tk.BooleanVar(value=self.settings.get("use_cache", False))
+        self.show_sizes = tk.BooleanVar(value=self.settings.get("show_sizes", False))
+        self.save_stats = tk.BooleanVar(value=self.settings.get("save_stats", False))
+        self.find_duplicates = tk.BooleanVar(
+            value=self.settings.get("find_duplicates", False)
+        )
+        self.exclude_patterns = tk.StringVar(
+            value=EXCLUDE_SEPARATOR.join(self.settings.get("exclude", []))
+        )
+        self.use_gitignore = tk.BooleanVar(
+            value=self.settings.get("use_gitignore", False)
+        )
+        # 0 means no limit
+        self.max_depth = tk.IntVar(value=self.settings.get("max_depth", 0))
+        self.max_entries = tk.IntVar(value=self.settings.get("max_entries", 0))
+        self.output_format = tk.StringVar(
+            value=self.settings.get("output_format", "txt")
+        )
+        if self.output_format.get() not in MAP_WRITERS:
+            self.output_format.set("txt")
+        self.compression = tk.StringVar(
+            value=self.settings.get("compression") or NO_COMPRESSION
+        )
+        if self.compression.get() not in COMPRESSIONS:
+            self.compression.set(NO_COMPRESSION)
+        self.sort_order = tk.StringVar(value=self.settings.get("order") or NO_ORDER)
+        if self.sort_order.get() not in SORT_ORDERS:
+            self.sort_order.set(NO_ORDER)
         self.last_generated_file: str | None = None
+        self.job: MappingJob | None = None
+        self.can_open_map = True
+        self.progress: ProgressChannel | None = None
 
         self.style = ttk.Style()
-        self.icon_images: Dict[str, ImageTk.PhotoImage] = {}
+        self.icon_images: Dict[str, tk.PhotoImage] = {}
+        self.changelog_window: tk.Toplevel | None = None
 
         # ===== Initialize the interface =====
         self.load_icons()
+        # Styles are set before any widget exists, so nothing is restyled
+        self.configure_styles()
         self.create_widgets()
         self.update_language()
-        self.apply_theme()
+        self.update_widget_colors()
+        self.master.deiconify()
 
         # ===== Set default paths =====
         self.default_input_path = os.path.expanduser("~")
@@ -140,6 +192,33 @@ class FolderMapper:
         )
         self.output_entry.grid(row=1, column=1, pady=5, sticky="ew")
 
+        # Output format
+        self.format_combobox = ttk.Combobox(
+            io_frame,
+            textvariable=self.output_format,
+            values=list(MAP_WRITERS),
+            state="readonly",
+            width=6,
+        )
+        self.format_combobox.grid(row=1, column=2, padx=(5, 0), pady=5)
+        self.format_combobox.bind(
+            "<<ComboboxSelected>>",
+            lambda e: self.update_setting("output_format", self.output_format),
+        )
+
+        # Output compression
+        self.compression_combobox = ttk.Combobox(
+            io_frame,
+            textvariable=self.compression,
+            values=[NO_COMPRESSION, *COMPRESSIONS],
+            state="readonly",
+            width=4,
+        )
+        self.compression_combobox.grid(row=1, column=3, padx=(5, 0), pady=5)
+        self.compression_combobox.bind(
+            "<<ComboboxSelected>>", lambda e: self.update_compression()
+        )
+
     def create_action_buttons(self) -> None:
         """
         🎬 Create action buttons: Map Folder, Open Output Folder, and Auto-open checkbox
@@ -165,6 +244,27 @@ class FolderMapper:
         )
         self.open_output_button.pack(side=tk.LEFT, padx=(0, 5))
 
+        self.view_map_button = ttk.Button(
+            self.actions_frame,
+            text="View Map",
+            command=self.view_generated_file,
+        )
+        self.view_map_button.pack(side=tk.LEFT, padx=5)
+
+        self.browse_button = ttk.Button(
+            self.actions_frame,
+            text="Browse Folder",
+            command=self.browse_folder,
+        )
+        self.browse_button.pack(side=tk.LEFT, padx=5)
+
+        self.compare_button = ttk.Button(
+            self.actions_frame,
+            text="Compare Maps…",
+            command=self.compare_maps,
+        )
+        self.compare_button.pack(side=tk.LEFT, padx=5)
+
         self.auto_open_check = ttk.Checkbutton(
             self.actions_frame,
             text="Auto-open file on completion",
@@ -173,6 +273,113 @@ class FolderMapper:
         )
         self.auto_open_check.pack(side=tk.LEFT, padx=5)
 
+        # Frame for mapping options
+        self.options_frame = ttk.Frame(self.main_frame)
+        self.options_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.use_cache_check = ttk.Checkbutton(
+            self.options_frame,
+            text="Incremental re-mapping (snapshot cache)",
+            variable=self.use_cache,
+            command=lambda: self.update_setting("use_cache", self.use_cache),
+        )
+        self.use_cache_check.pack(side=tk.LEFT)
+
+        self.show_sizes_check = ttk.Checkbutton(
+            self.options_frame,
+            text="Show folder sizes",
+            variable=self.show_sizes,
+            command=lambda: self.update_setting("show_sizes", self.show_sizes),
+        )
+        self.show_sizes_check.pack(side=tk.LEFT, padx=5)
+
+        self.save_stats_check = ttk.Checkbutton(
+            self.options_frame,
+            text="Save run statistics",
+            variable=self.save_stats,
+            command=lambda: self.update_setting("save_stats", self.save_stats),
+        )
+        self.save_stats_check.pack(side=tk.LEFT, padx=5)
+
+        self.find_duplicates_check = ttk.Checkbutton(
+            self.options_frame,
+            text="Find duplicates",
+            variable=self.find_duplicates,
+            command=lambda: self.update_setting(
+                "find_duplicates", self.find_duplicates
+            ),
+        )
+        self.find_duplicates_check.pack(side=tk.LEFT, padx=5)
+
+        # Exclusion patterns
+        self.exclude_frame = ttk.Frame(self.main_frame)
+        self.exclude_frame.pack(fill=tk.X, pady=(0, 10))
+        self.exclude_frame.columnconfigure(1, weight=1)
+
+        self.exclude_label = ttk.Label(self.exclude_frame, text="Exclude:")
+        self.exclude_label.grid(row=0, column=0, padx=(0, 5), sticky="w")
+
+        self.exclude_entry = ttk.Entry(
+            self.exclude_frame, textvariable=self.exclude_patterns
+        )
+        self.exclude_entry.grid(row=0, column=1, sticky="ew")
+        self.exclude_entry.bind("<FocusOut>", lambda e: self.update_exclusions())
+
+        self.use_gitignore_check = ttk.Checkbutton(
+            self.exclude_frame,
+            text="Honor .gitignore",
+            variable=self.use_gitignore,
+            command=lambda: self.update_setting("use_gitignore", self.use_gitignore),
+        )
+        self.use_gitignore_check.grid(row=0, column=2, padx=(5, 0))
+
+        # Depth and per-folder entry limits (0 = unlimited)
+        self.limits_frame = ttk.Frame(self.main_frame)
+        self.limits_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.max_depth_label = ttk.Label(self.limits_frame, text="Max depth:")
+        self.max_depth_label.pack(side=tk.LEFT)
+        self.max_depth_spinbox = ttk.Spinbox(
+            self.limits_frame,
+            from_=0,
+            to=999,
+            width=5,
+            textvariable=self.max_depth,
+            command=lambda: self.update_setting("max_depth", self.max_depth),
+        )
+        self.max_depth_spinbox.pack(side=tk.LEFT, padx=(5, 15))
+
+        self.max_entries_label = ttk.Label(
+            self.limits_frame, text="Max entries per folder:"
+        )
+        self.max_entries_label.pack(side=tk.LEFT)
+        self.max_entries_spinbox = ttk.Spinbox(
+            self.limits_frame,
+            from_=0,
+            to=1_000_000,
+            increment=100,
+            width=8,
+            textvariable=self.max_entries,
+            command=lambda: self.update_setting("max_entries", self.max_entries),
+        )
+        self.max_entries_spinbox.pack(side=tk.LEFT, padx=(5, 15))
+
+        # Sort order of every folder ("-" keeps the filesystem's order)
+        self.sort_order_label = ttk.Label(self.limits_frame, text="Order:")
+        self.sort_order_label.pack(side=tk.LEFT)
+        self.sort_order_combobox = ttk.Combobox(
+            self.limits_frame,
+            textvariable=self.sort_order,
+            values=[NO_ORDER, *SORT_ORDERS],
+            state="readonly",
+            width=10,
+        )
+        self.sort_order_combobox.pack(side=tk.LEFT, padx=5)
+        self.sort_order_combobox.bind(
+            "<<ComboboxSelected>>",
+            lambda e: self.update_setting("order", self.sort_order),
+        )
+
     def create_bottom_widgets(self) -> None:
         """
         👇 Create bottom widgets: Close button and developer support link
@@ -226,6 +433,51 @@ class FolderMapper:
         """
         print(f"Auto-open updated. New value: {self.auto_open.get()}")
 
+    def update_exclusions(self) -> list[str]:
+        """
+        🚫 Parse and persist the exclusion patterns typed by the user
+        """
+        patterns = [
+            p.strip()
+            for p in self.exclude_patterns.get().split(EXCLUDE_SEPARATOR)
+            if p.strip()
+        ]
+        if patterns != self.settings.get("exclude", []):
+            self.settings["exclude"] = patterns
+            self.save_settings()
+        return patterns
+
+    def read_limit(self, key: str, variable: tk.IntVar) -> int | None:
+        """
+        🔢 Read a limit spinbox, persisting it; ``None`` when unlimited
+        """
+        try:
+            value = max(variable.get(), 0)
+        except tk.TclError:
+            value = 0
+        variable.set(value)
+        if value != self.settings.get(key, 0):
+            self.update_setting(key, variable)
+        return value or None
+
+    def update_compression(self) -> str | None:
+        """
+        🗜️ Persist the chosen output compression; ``None`` when disabled
+        """
+        compression = self.compression.get()
+        compression = None if compression == NO_COMPRESSION else compression
+        if compression != self.settings.get("compression"):
+            self.settings["compression"] = compression
+            self.save_settings()
+        return compression
+
+    def update_setting(self, key: str, variable: tk.Variable) -> None:
+        """
+        🗃️ Persist a mapping option when its widget changes
+        """
+        self.settings[key] = variable.get()
+        self.save_settings()
+
     def generate_map(self) -> None:
         """
         🗺️ Generate the folder map
@@ -237,26 +489,134 @@ class FolderMapper:
             os.makedirs(output_folder)
 
         folder_name = os.path.basename(source_folder)
-        output_file = os.path.join(output_folder, f"{folder_name}_map.txt")
-
-        counter = 1
-        while os.path.exists(output_file):
-            output_file = os.path.join(
-                output_folder, f"{folder_name}_map_{counter}.txt"
-            )
-            counter += 1
+        output_format = self.output_format.get()
+        compression = self.update_compression()
+        output_file = unique_output_path(
+            output_folder, folder_name, map_extension(output_format, compression)
+        )
 
         self.last_generated_file = output_file
+        # Binary and compressed maps have no viewer to open them with.
+        self.can_open_map = not MAP_WRITERS[output_format].binary and not compression
 
+        self.map_button.config(state=tk.DISABLED)
         self.show_progress_bar()
+        # The worker thread only writes into the channel; Tk reads it back
+        # on its own thread through root.after polling.
+        self.job = MappingJob()
+        self.progress = ProgressChannel()
+        self.progress.start_polling(
+            self.master, self.update_progress, self.on_map_generation_complete
+        )
         generate_file_hierarchy_threaded(
             source_folder,
             output_file,
             translations,
             self.current_language.get(),
-            self.update_progress,
-            self.on_map_generation_complete,
+            self.progress.report,
+            self.progress.finish,
+            job=self.job,
+            output_format=output_format,
+            compression=compression,
+            use_cache=self.use_cache.get(),
+            show_sizes=self.show_sizes.get(),
+            top_folders=TOP_FOLDERS if self.show_sizes.get() else 0,
+            exclude=self.update_exclusions(),
+            gitignore=self.use_gitignore.get(),
+            max_depth=self.read_limit("max_depth", self.max_depth),
+            max_entries=self.read_limit("max_entries", self.max_entries),
+            order=self.selected_order(),
+            stats=MappingStats() if self.save_stats.get() else None,
+            stats_sidecar=True,
+            duplicates=self.find_duplicates.get(),
+        )
+
+    def selected_order(self) -> str | None:
+        """
+        🔤 The chosen sort order; ``None`` keeps the filesystem's order
+        """
+        order = self.sort_order.get()
+        return None if order == NO_ORDER else order
+
+    def browse_folder(self) -> None:
+        """
+        🌳 Explore the input folder interactively, one folder at a time
+        """
+        source_folder = self.source_folder.get() or self.default_input_path
+        if not os.path.isdir(source_folder):
+            messagebox.showerror("Error", "Input folder does not exist.")
+            return
+        from ui.tree_browser import TreeBrowser
+
+        lang = self.current_language.get()
+        TreeBrowser(
+            self.master,
+            source_folder,
+            reader=build_reader(
+                source_folder,
+                exclude=self.update_exclusions(),
+                gitignore=self.use_gitignore.get(),
+                max_entries=self.read_limit("max_entries", self.max_entries),
+                order=self.selected_order(),
+            ),
+            labels=translations[lang],
+            lang=lang,
+            dark_mode=self.dark_mode.get(),
+        )
+
+    def compare_maps(self) -> None:
+        """
+        🆚 Compare two maps in the background and show what changed
+        """
+        from ui.map_viewer import MapViewer
+        from utils.map_diff import diff_maps, diff_report_path
+
+        lang = self.current_language.get()
+        output_folder = self.output_folder.get() or self.default_output_path
+        old_map = filedialog.askopenfilename(
+            title="Earlier map" if lang == "English" else "Mappa precedente",
+            initialdir=output_folder,
         )
+        if not old_map:
+            return
+        new_map = filedialog.askopenfilename(
+            title="Later map" if lang == "English" else "Mappa successiva",
+            initialdir=os.path.dirname(old_map),
+        )
+        if not new_map:
+            return
+        report = diff_report_path(new_map)
+
+        def on_complete(success, message):
+            self.compare_button.config(state=tk.NORMAL)
+            if not success:
+                messagebox.showerror(translations[lang]["error"], message)
+                return
+            messagebox.showinfo(
+                translations[lang]["success"],
+                f"{translations[lang]['diff_generated']}\n{report}\n\n{message}",
+            )
+            MapViewer(self.master, report, lang=lang, dark_mode=self.dark_mode.get())
+
+        def target():
+            try:
+                summary = diff_maps(old_map, new_map, report, translations, lang)
+            except Exception as e:
+                channel.finish(False, str(e))
+                return
+            channel.finish(
+                True,
+                translations[lang]["diff_summary"].format(
+                    added=summary.added,
+                    removed=summary.removed,
+                    modified=summary.modified,
+                ),
+            )
+
+        self.compare_button.config(state=tk.DISABLED)
+        channel = ProgressChannel()
+        channel.start_polling(self.master, lambda snapshot: None, on_complete)
+        threading.Thread(target=target, daemon=True).start()
 
     def show_progress_bar(self) -> None:
         """
@@ -265,14 +625,78 @@ class FolderMapper:
         self.progress_bar = ttk.Progressbar(
             self.main_frame, orient=tk.HORIZONTAL, length=300, mode="determinate"
         )
-        self.progress_bar.pack(pady=10, fill=tk.X)
+        self.progress_bar.pack(pady=(10, 0), fill=tk.X)
+        self.progress_label = ttk.Label(self.main_frame, anchor="center")
+        self.progress_label.pack(pady=(0, 10), fill=tk.X)
 
-    def update_progress(self, value: float) -> None:
+        lang = self.current_language.get()
+        self.job_frame = ttk.Frame(self.main_frame)
+        self.job_frame.pack(pady=(0, 10))
+        self.pause_button = ttk.Button(
+            self.job_frame,
+            text="Pause" if lang == "English" else "Pausa",
+            command=self.toggle_pause,
+        )
+        self.pause_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.stop_button = ttk.Button(
+            self.job_frame,
+            text="Stop" if lang == "English" else "Interrompi",
+            command=self.stop_map,
+            image=self.icon_images.get("terminate_icon"),
+            compound=tk.LEFT,
+        )
+        self.stop_button.pack(side=tk.LEFT)
+
+    def hide_progress_bar(self) -> None:
+        """
+        🧹 Remove the progress widgets and get ready for the next run
+        """
+        self.progress_bar.destroy()
+        self.progress_label.destroy()
+        self.job_frame.destroy()
+        self.map_button.config(state=tk.NORMAL)
+        self.job = None
+        self.progress = None
+
+    def toggle_pause(self) -> None:
+        """
+        ⏯️ Pause the running map at the next folder, or resume it
+        """
+        lang = self.current_language.get()
+        if self.job.paused:
+            self.job.resume()
+            self.pause_button.config(text="Pause" if lang == "English" else "Pausa")
+        else:
+            self.job.pause()
+            self.pause_button.config(
+                text="Resume" if lang == "English" else "Riprendi"
+            )
+
+    def stop_map(self) -> None:
+        """
+        ⏹️ Cancel the running map; its partial file is deleted by the worker
+        """
+        self.job.cancel()
+        # The worker stops at the next folder boundary and cleans up on its
+        # own; the window doesn't wait for it.
+        self.progress.detach()
+        self.hide_progress_bar()
+
+    def update_progress(self, snapshot) -> None:
         """
-        📈 Update the progress bar value
+        📈 Update the progress bar value, speed and ETA
         """
-        self.progress_bar["value"] = value
-        self.master.update_idletasks()
+        lang = self.current_language.get()
+        self.progress_bar["value"] = snapshot.percent
+        self.progress_label.config(
+            text=(
+                f"{snapshot.processed:,} "
+                + ("items" if lang == "English" else "elementi")
+                + f" · {snapshot.rate:,.0f}/s · "
+                + ("ETA" if lang == "English" else "Tempo rimanente")
+                + f" {format_eta(snapshot.eta)}"
+            )
+        )
 
     def on_map_generation_complete(
         self, success: bool, error_message: str | None
@@ -280,13 +704,17 @@ class FolderMapper:
         """
         🏁 Handle the completion of map generation
         """
-        self.progress_bar.pack_forget()
+        self.hide_progress_bar()
         if success:
-            messagebox.showinfo(
-                translations[self.current_language.get()]["success"],
-                f"{translations[self.current_language.get()]['map_generated']}\n{self.last_generated_file}",
-            )
-            if self.auto_open.get():
+            from utils.duplicates import duplicates_path
+
+            labels = translations[self.current_language.get()]
+            message = f"{labels['map_generated']}\n{self.last_generated_file}"
+            report = duplicates_path(self.last_generated_file)
+            if self.find_duplicates.get() and os.path.exists(report):
+                message += f"\n\n{labels['duplicates_generated']}\n{report}"
+            messagebox.showinfo(labels["success"], message)
+            if self.auto_open.get() and self.can_open_map:
                 self.open_generated_file()
         else:
             messagebox.showerror(
@@ -298,6 +726,8 @@ class FolderMapper:
         """
         📂 Open the output folder in the file explorer
         """
+        import subprocess
+
         output_folder = self.output_folder.get() or self.default_output_path
         if os.path.exists(output_folder):
             if sys.platform == "win32":
@@ -313,8 +743,12 @@ class FolderMapper:
         """
         📄 Open the generated map file
         """
+        import subprocess
+
         if self.last_generated_file and os.path.exists(self.last_generated_file):
-            if sys.platform == "win32":
+            if os.path.getsize(self.last_generated_file) > VIEWER_THRESHOLD:
+                self.view_generated_file()
+            elif sys.platform == "win32":
                 os.startfile(self.last_generated_file)
             elif sys.platform == "darwin":  # macOS
                 subprocess.Popen(["open", self.last_generated_file])
@@ -325,6 +759,30 @@ class FolderMapper:
                 "Error", "No file has been generated yet or the file does not exist."
             )
 
+    def view_generated_file(self) -> None:
+        """
+        🔍 Open the generated map in the built-in viewer
+        """
+        if not self.last_generated_file or not os.path.exists(
+            self.last_generated_file
+        ):
+            messagebox.showerror(
+                "Error", "No file has been generated yet or the file does not exist."
+            )
+        elif not self.can_open_map:
+            messagebox.showerror(
+                "Error", "Binary and compressed maps can't be shown in the viewer."
+            )
+        else:
+            from ui.map_viewer import MapViewer
+
+            MapViewer(
+                self.master,
+                self.last_generated_file,
+                lang=self.current_language.get(),
+                dark_mode=self.dark_mode.get(),
+            )
+
     def show_changelog(self) -> None:
         """
         📜 Show the changelog in a new window
@@ -336,6 +794,10 @@ class FolderMapper:
         - Version 1.3: Added dark mode toggle.
         - Version 1.4: Moved 'Support the developer' to the bottom center.
         """
+        if self.changelog_window and self.changelog_window.winfo_exists():
+            self.changelog_window.deiconify()
+            self.changelog_window.lift()
+            return
         changelog_window = tk.Toplevel(self.master)
         changelog_window.title("Changelog")
         changelog_window.geometry("400x300")
@@ -344,6 +806,7 @@ class FolderMapper:
         changelog_label.insert(tk.END, changelog_text)
         changelog_label.config(state=tk.DISABLED)
         changelog_label.pack(expand=True, fill=tk.BOTH)
+        self.changelog_window = changelog_window
 
     def show_user_guide(self) -> None:
         """
@@ -379,6 +842,8 @@ class FolderMapper:
         """
         🔗 Open the developer's Ko-fi page in a web browser
         """
+        import webbrowser
+
         webbrowser.open_new("https://ko-fi.com/antoniobertuccio")
 
     # ===== UTILITY METHODS =====
@@ -393,9 +858,18 @@ class FolderMapper:
             print(f"Error loading settings: {e}")
             return {}
 
+    def save_settings(self) -> None:
+        """
+        💾 Save application settings
+        """
+        save_settings(self.settings)
+
     def load_icons(self) -> None:
         """
         🖼️ Load application icons
+
+        Tk reads the pre-sized 16 px PNGs directly; without them the full-size
+        artwork is shrunk by Tk itself, which is slower and coarser.
         """
         try:
             icon_files = {
@@ -403,11 +877,17 @@ class FolderMapper:
                 "input_icon": "assets/folder-mapper-input-icon.png",
                 "output_icon": "assets/folder-mapper-output-icon.png",
                 "exit_icon": "assets/folder-mapper-exit-icon.png",
+                "terminate_icon": "assets/folder-mapper-terminate-icon.png",
             }
             for key, path in icon_files.items():
-                self.icon_images[key] = ImageTk.PhotoImage(
-                    Image.open(path).resize((16, 16), Image.Resampling.LANCZOS)
-                )
+                small_path = path.replace(".png", f"-{ICON_SIZE}.png")
+                if os.path.exists(small_path):
+                    image = tk.PhotoImage(file=small_path)
+                else:
+                    image = tk.PhotoImage(file=path)
+                    factor = max(1, image.width() // ICON_SIZE)
+                    image = image.subsample(factor, factor)
+                self.icon_images[key] = image
         except Exception as e:
             print(f"Error loading icons: {e}")
 
@@ -434,6 +914,15 @@ class FolderMapper:
                 "Open Output Folder" if lang == "English" else "Apri Cartella di Output"
             )
         )
+        self.view_map_button.config(
+            text="View Map" if lang == "English" else "Visualizza Mappa"
+        )
+        self.browse_button.config(
+            text="Browse Folder" if lang == "English" else "Esplora Cartella"
+        )
+        self.compare_button.config(
+            text="Compare Maps…" if lang == "English" else "Confronta Mappe…"
+        )
         self.auto_open_check.config(
             text=(
                 "Auto-open file on completion"
@@ -441,6 +930,49 @@ class FolderMapper:
                 else "Apri file automaticamente al completamento"
             )
         )
+        self.use_cache_check.config(
+            text=(
+                "Incremental re-mapping (snapshot cache)"
+                if lang == "English"
+                else "Rimappatura incrementale (cache snapshot)"
+            )
+        )
+        self.exclude_label.config(
+            text="Exclude:" if lang == "English" else "Escludi:"
+        )
+        self.use_gitignore_check.config(
+            text="Honor .gitignore" if lang == "English" else "Rispetta .gitignore"
+        )
+        self.max_depth_label.config(
+            text="Max depth:" if lang == "English" else "Profondità massima:"
+        )
+        self.max_entries_label.config(
+            text=(
+                "Max entries per folder:"
+                if lang == "English"
+                else "Elementi massimi per cartella:"
+            )
+        )
+        self.sort_order_label.config(
+            text="Order:" if lang == "English" else "Ordine:"
+        )
+        self.show_sizes_check.config(
+            text=(
+                "Show folder sizes"
+                if lang == "English"
+                else "Mostra dimensioni cartelle"
+            )
+        )
+        self.save_stats_check.config(
+            text=(
+                "Save run statistics"
+                if lang == "English"
+                else "Salva statistiche di esecuzione"
+            )
+        )
+        self.find_duplicates_check.config(
+            text="Find duplicates" if lang == "English" else "Trova duplicati"
+        )
         self.link_button.config(
             text=(
                 "☕ Support the developer"
@@ -453,6 +985,13 @@ class FolderMapper:
         """
         🎨 Apply the current theme (light or dark) to all UI elements
         """
+        self.configure_styles()
+        self.update_widget_colors()
+
+    def configure_styles(self) -> None:
+        """
+        🎨 Set the ttk styles for the current theme
+        """
         if self.dark_mode.get():
             self.style.theme_use("clam")
             bg_color = "#2E2E2E"
@@ -469,33 +1008,32 @@ class FolderMapper:
         self.style.configure("TButton", background=bg_color, foreground=fg_color)
         self.style.configure("TEntry", fieldbackground=entry_bg, foreground=fg_color)
         self.style.configure("TCheckbutton", background=bg_color, foreground=fg_color)
-
         self.master.configure(bg=bg_color)
-        self.main_frame.configure(style="TFrame")
-        self.link_button.configure(
-            foreground="light blue" if self.dark_mode.get() else "blue"
-        )
-
-        # Update all widgets
-        for widget in self.master.winfo_children():
-            self._update_widget_colors(widget)
 
-    def _update_widget_colors(self, widget):
+    def update_widget_colors(self) -> None:
         """
-        🖌️ Recursively update colors of all widgets
-        """
-        widget_type = widget.winfo_class()
-        if widget_type in ("Frame", "Label", "Button"):
-            widget.configure(bg=self.style.lookup("TFrame", "background"))
-        if widget_type in ("Label", "Button"):
-            widget.configure(fg=self.style.lookup("TLabel", "foreground"))
-        if widget_type == "Entry":
-            widget.configure(
-                readonlybackground=self.style.lookup("TEntry", "fieldbackground")
-            )
+        🖌️ Recolor the plain Tk widgets in one pass over the widget tree
 
-        for child in widget.winfo_children():
-            self._update_widget_colors(child)
+        ttk widgets follow the styles by themselves; the colors are looked up
+        once instead of once per widget.
+        """
+        self.link_button.configure(
+            foreground="light blue" if self.dark_mode.get() else "blue"
+        )
+        bg_color = self.style.lookup("TFrame", "background")
+        fg_color = self.style.lookup("TLabel", "foreground")
+        entry_bg = self.style.lookup("TEntry", "fieldbackground")
+        pending = self.master.winfo_children()
+        while pending:
+            widget = pending.pop()
+            widget_type = widget.winfo_class()
+            if widget_type in ("Frame", "Label", "Button"):
+                widget.configure(bg=bg_color)
+            if widget_type in ("Label", "Button"):
+                widget.configure(fg=fg_color)
+            if widget_type == "Entry":
+                widget.configure(readonlybackground=entry_bg)
+            pending.extend(widget.winfo_children())
 
 
 # Main function to start the app
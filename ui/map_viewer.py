@@ -0,0 +1,268 @@
+import tkinter as tk
+from tkinter import ttk
+from tkinter.font import nametofont
+
+from ui.components import ThemedWindow
+from utils.line_index import LineIndex
+
+# Chunks indexed per event-loop turn while the viewer is already on screen.
+INDEX_CHUNKS_PER_STEP = 16
+
+
+class MapViewer(ThemedWindow):
+    """
+    🔍 Built-in viewer for maps too large for a text editor.
+
+    The file is memory-mapped and indexed by ``LineIndex``; the Text widget
+    only ever holds the lines that fit in the window, re-rendered as the
+    view moves, so a multi-GB map opens at once and stays responsive while
+    the rest of it is indexed in the background.
+    """
+
+    def __init__(self, master, path, lang="English", dark_mode=False):
+        super().__init__(master)
+        self.lang = lang
+        self.index = LineIndex(path, build=False)
+        self.index.index_more(1)
+        self.top = 0
+        self.current_line = None
+        self.title(path)
+        self.geometry("900x600")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.search_text = tk.StringVar()
+        self.goto_text = tk.StringVar()
+        self.match_case = tk.BooleanVar(value=True)
+
+        self.create_widgets(dark_mode)
+        self.bind_keys()
+        self.after_idle(self.render)
+        if not self.index.complete:
+            self.after(1, self.index_step)
+
+    # ===== WIDGET CREATION METHODS =====
+
+    def create_widgets(self, dark_mode):
+        """
+        🏗️ Create the toolbar, the text view and its scrollbars
+        """
+        english = self.lang == "English"
+        toolbar = ttk.Frame(self, padding=5)
+        toolbar.pack(fill=tk.X)
+
+        ttk.Label(toolbar, text="Line:" if english else "Riga:").pack(side=tk.LEFT)
+        self.goto_entry = ttk.Entry(toolbar, textvariable=self.goto_text, width=10)
+        self.goto_entry.pack(side=tk.LEFT, padx=(5, 15))
+        self.goto_entry.bind("<Return>", lambda e: self.goto_line())
+
+        ttk.Label(toolbar, text="Find:" if english else "Cerca:").pack(side=tk.LEFT)
+        self.search_entry = ttk.Entry(
+            toolbar, textvariable=self.search_text, width=30
+        )
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind("<Return>", lambda e: self.find())
+        self.search_entry.bind("<Shift-Return>", lambda e: self.find(backwards=True))
+        ttk.Button(
+            toolbar,
+            text="◀",
+            width=3,
+            command=lambda: self.find(backwards=True),
+        ).pack(side=tk.LEFT)
+        ttk.Button(toolbar, text="▶", width=3, command=self.find).pack(side=tk.LEFT)
+        ttk.Checkbutton(
+            toolbar,
+            text="Match case" if english else "Maiuscole/minuscole",
+            variable=self.match_case,
+        ).pack(side=tk.LEFT, padx=5)
+
+        self.status_label = ttk.Label(toolbar, anchor="e")
+        self.status_label.pack(side=tk.RIGHT)
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        body.rowconfigure(0, weight=1)
+        body.columnconfigure(0, weight=1)
+
+        self.text = tk.Text(
+            body,
+            wrap=tk.NONE,
+            font="TkFixedFont",
+            background="#4A4A4A" if dark_mode else "white",
+            foreground="white" if dark_mode else "black",
+            insertwidth=0,
+        )
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.text.tag_configure("current", background="#FFE08A", foreground="black")
+        self.text.tag_configure("match", background="#F2A93B", foreground="black")
+
+        # The vertical scrollbar moves through the whole file, not through
+        # the handful of lines held by the Text widget.
+        self.vscroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.on_scroll)
+        self.vscroll.grid(row=0, column=1, sticky="ns")
+        hscroll = ttk.Scrollbar(body, orient=tk.HORIZONTAL, command=self.text.xview)
+        hscroll.grid(row=1, column=0, sticky="ew")
+        self.text.configure(xscrollcommand=hscroll.set)
+
+        self.text.bind("<Configure>", lambda e: self.render())
+
+    def bind_keys(self):
+        """
+        ⌨️ Route scrolling and shortcuts to the virtual view
+        """
+        for widget in (self, self.text):
+            widget.bind("<MouseWheel>", self.on_mousewheel)
+            widget.bind("<Button-4>", lambda e: self.scroll_by(-3))
+            widget.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.text.bind("<Up>", lambda e: self.scroll_by(-1))
+        self.text.bind("<Down>", lambda e: self.scroll_by(1))
+        self.text.bind("<Prior>", lambda e: self.scroll_by(-self.visible_lines()))
+        self.text.bind("<Next>", lambda e: self.scroll_by(self.visible_lines()))
+        self.text.bind("<Control-Home>", lambda e: self.scroll_to(0))
+        self.text.bind("<Control-End>", lambda e: self.scroll_to(len(self.index)))
+        self.bind("<Control-f>", lambda e: self.search_entry.focus_set())
+        self.bind("<Control-g>", lambda e: self.goto_entry.focus_set())
+        self.bind("<F3>", lambda e: self.find())
+        self.bind("<Shift-F3>", lambda e: self.find(backwards=True))
+
+    # ===== VIEW METHODS =====
+
+    def visible_lines(self) -> int:
+        linespace = nametofont("TkFixedFont").metrics("linespace")
+        return max(self.text.winfo_height() // linespace, 1)
+
+    def render(self) -> None:
+        """
+        🖼️ Show the lines from ``self.top`` that fit in the window
+        """
+        rows = self.visible_lines()
+        total = len(self.index)
+        self.top = max(0, min(self.top, total - rows))
+        lines = self.index.lines(self.top, rows)
+
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        if self.current_line is not None and 0 <= self.current_line - self.top < rows:
+            row = self.current_line - self.top + 1
+            self.text.tag_add("current", f"{row}.0", f"{row}.end")
+        needle = self.search_text.get()
+        if needle:
+            self.highlight(needle)
+        self.text.configure(state=tk.DISABLED)
+
+        if total:
+            self.vscroll.set(self.top / total, min((self.top + rows) / total, 1.0))
+        self.update_status()
+
+    def highlight(self, needle: str) -> None:
+        start = "1.0"
+        count = tk.IntVar()
+        while True:
+            start = self.text.search(
+                needle,
+                start,
+                stopindex=tk.END,
+                count=count,
+                nocase=not self.match_case.get(),
+            )
+            if not start or not count.get():
+                break
+            end = f"{start}+{count.get()}c"
+            self.text.tag_add("match", start, end)
+            start = end
+
+    def update_status(self) -> None:
+        english = self.lang == "English"
+        total = len(self.index)
+        status = f"{self.top + 1 if total else 0:,}/{total:,}"
+        if not self.index.complete:
+            percent = self.index.indexed / self.index.size * 100
+            status += (" · indexing" if english else " · indicizzazione") + (
+                f" {percent:.0f}%"
+            )
+        self.status_label.config(text=status)
+
+    def scroll_to(self, line: int) -> None:
+        self.top = line
+        self.render()
+
+    def scroll_by(self, lines: int) -> str:
+        self.scroll_to(self.top + lines)
+        return "break"
+
+    def on_scroll(self, action, amount, unit=None) -> None:
+        """
+        📜 Translate scrollbar commands into a new top line
+        """
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(amount) * len(self.index)))
+        elif unit == tk.PAGES:
+            self.scroll_by(int(amount) * self.visible_lines())
+        else:
+            self.scroll_by(int(amount))
+
+    def on_mousewheel(self, event) -> str:
+        # Windows reports multiples of 120 per notch, macOS single steps.
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll_by(-3 * delta)
+
+    def show_line(self, line: int) -> None:
+        """Bring ``line`` into view a few rows from the top and mark it."""
+        self.current_line = line
+        self.scroll_to(line - min(3, self.visible_lines() // 3))
+
+    def goto_line(self) -> None:
+        """
+        ↪️ Jump to the line number typed in the toolbar
+        """
+        try:
+            line = int(self.goto_text.get().replace(",", "").strip()) - 1
+        except ValueError:
+            self.bell()
+            return
+        if line >= len(self.index) and not self.index.complete:
+            self.index.index_more()
+        self.show_line(max(0, min(line, len(self.index) - 1)))
+
+    def find(self, backwards: bool = False) -> None:
+        """
+        🔎 Jump to the next (or previous) line containing the search text
+        """
+        needle = self.search_text.get()
+        if not needle:
+            return
+        if self.current_line is not None:
+            start = self.current_line
+        else:
+            start = self.top - 1 if not backwards else self.top
+        self.config(cursor="watch")
+        self.update_idletasks()
+        try:
+            line = self.index.search(
+                needle,
+                start,
+                ignore_case=not self.match_case.get(),
+                backwards=backwards,
+            )
+        finally:
+            self.config(cursor="")
+        if line is None:
+            self.bell()
+            self.render()
+        else:
+            self.show_line(line)
+
+    def index_step(self) -> None:
+        """
+        ⏳ Index a few more chunks, then yield to the event loop
+        """
+        if not self.winfo_exists():
+            return
+        done = self.index.index_more(INDEX_CHUNKS_PER_STEP)
+        self.render()
+        if not done:
+            self.after(1, self.index_step)
+
+    def close(self) -> None:
+        self.index.close()
+        self.destroy()
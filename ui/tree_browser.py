@@ -0,0 +1,234 @@
+import os
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from ui.components import ThemedWindow
+from utils.lazy_tree import DirectoryLoader, iter_expanded
+from utils.writers import TextMapWriter
+
+
+class TreeBrowser(ThemedWindow):
+    """
+    🌳 Interactive, collapsible view of a folder tree.
+
+    A folder is only read when it is expanded, on a background thread, so
+    browsing a huge share costs the folders actually looked at. Listings
+    are kept in an LRU ``DirectoryCache``; collapsing a folder drops its
+    rows, and expanding it again is served from the cache. The expanded
+    part of the tree can be exported as a text map.
+    """
+
+    def __init__(
+        self,
+        master,
+        start_path,
+        reader=None,
+        labels=None,
+        lang="English",
+        dark_mode=False,
+        cache=None,
+    ):
+        super().__init__(master)
+        self.start_path = start_path
+        self.labels = labels or {}
+        self.lang = lang
+        self.loader = DirectoryLoader(reader, cache)
+        # Path of every folder row, and the row of every folder by path.
+        self.paths = {}
+        self.items = {}
+        # What each expanded folder shows: (dirs, files, omitted).
+        self.shown = {}
+
+        self.title(start_path)
+        self.geometry("600x700")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.create_widgets(dark_mode)
+
+        root = self.add_folder("", start_path, start_path)
+        self.tree.item(root, open=True)
+        self.expand(root)
+        self.loader.start_polling(self, self.on_loaded)
+
+    # ===== WIDGET CREATION METHODS =====
+
+    def create_widgets(self, dark_mode):
+        """
+        🏗️ Create the toolbar and the tree view
+        """
+        english = self.lang == "English"
+        toolbar = ttk.Frame(self, padding=5)
+        toolbar.pack(fill=tk.X)
+        ttk.Button(
+            toolbar,
+            text="Export View…" if english else "Esporta Vista…",
+            command=self.export_view,
+        ).pack(side=tk.LEFT)
+        ttk.Button(
+            toolbar,
+            text="Refresh" if english else "Aggiorna",
+            command=self.refresh_selected,
+        ).pack(side=tk.LEFT, padx=5)
+        self.status_label = ttk.Label(toolbar, anchor="e")
+        self.status_label.pack(side=tk.RIGHT)
+
+        style = ttk.Style()
+        style.configure(
+            "Browser.Treeview",
+            background="#4A4A4A" if dark_mode else "white",
+            fieldbackground="#4A4A4A" if dark_mode else "white",
+            foreground="white" if dark_mode else "black",
+        )
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        body.rowconfigure(0, weight=1)
+        body.columnconfigure(0, weight=1)
+        self.tree = ttk.Treeview(body, show="tree", style="Browser.Treeview")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.tree.bind("<<TreeviewOpen>>", lambda e: self.expand(self.tree.focus()))
+        self.tree.bind("<<TreeviewClose>>", lambda e: self.collapse(self.tree.focus()))
+        self.bind("<F5>", lambda e: self.refresh_selected())
+
+    # ===== TREE METHODS =====
+
+    def add_folder(self, parent, path, name):
+        item = self.tree.insert(parent, tk.END, text=f"📁 {name}")
+        self.paths[item] = path
+        self.items[path] = item
+        self.add_placeholder(item)
+        return item
+
+    def add_placeholder(self, item, text=None):
+        if text is None:
+            text = "Loading…" if self.lang == "English" else "Caricamento…"
+        self.tree.insert(item, tk.END, text=text)
+
+    def expand(self, item, force=False):
+        """
+        📂 Show a folder's content, reading it in the background if needed
+        """
+        path = self.paths.get(item)
+        if path is None:
+            return
+        listing = self.loader.request(path, force)
+        if listing is not None:
+            self.populate(item, listing)
+        self.update_status()
+
+    def collapse(self, item):
+        """
+        📁 Drop a folder's rows; its listing stays in the cache
+        """
+        path = self.paths.get(item)
+        if path is None:
+            return
+        self.shown.pop(path, None)
+        self.forget_children(item)
+        self.add_placeholder(item)
+        self.update_status()
+
+    def forget_children(self, item):
+        for child in self.tree.get_children(item):
+            path = self.paths.pop(child, None)
+            if path is not None:
+                self.items.pop(path, None)
+                self.shown.pop(path, None)
+                self.forget_children(child)
+        self.tree.delete(*self.tree.get_children(item))
+
+    def populate(self, item, listing):
+        """
+        🗂️ Fill an expanded folder with its subfolders, then its files
+        """
+        path = self.paths[item]
+        dirs, files, descend = listing[:3]
+        omitted = listing[4] if len(listing) > 4 else 0
+        self.forget_children(item)
+        for name in descend:
+            self.add_folder(item, os.path.join(path, name), name)
+        for name in files:
+            self.tree.insert(item, tk.END, text=f"📄 {name}")
+        if omitted:
+            more = self.labels.get("more_entries", "… and {count:,} more")
+            self.tree.insert(item, tk.END, text=more.format(count=omitted))
+        self.shown[path] = (descend, files, omitted)
+
+    def on_loaded(self, path, listing):
+        item = self.items.get(path)
+        # The folder may have been collapsed while it was being read.
+        if item is None or not self.tree.item(item, "open"):
+            self.update_status()
+            return
+        if listing is None:
+            self.forget_children(item)
+            self.add_placeholder(
+                item,
+                "⚠ Can't read this folder"
+                if self.lang == "English"
+                else "⚠ Impossibile leggere la cartella",
+            )
+        else:
+            self.populate(item, listing)
+        self.update_status()
+
+    def refresh_selected(self):
+        """
+        🔄 Re-read the selected folder, bypassing the cache
+        """
+        item = self.tree.focus() or self.items[self.start_path]
+        if item not in self.paths:
+            item = self.tree.parent(item)
+        if self.tree.item(item, "open"):
+            self.expand(item, force=True)
+
+    def update_status(self):
+        english = self.lang == "English"
+        cache = self.loader.cache
+        status = (
+            f"{len(self.shown):,} {'open' if english else 'aperte'}"
+            f" · cache {len(cache):,}/{cache.capacity:,}"
+        )
+        if self.loader.pending:
+            status += f" · {'loading' if english else 'caricamento'}"
+            status += f" {self.loader.pending:,}"
+        self.status_label.config(text=status)
+
+    # ===== EXPORT =====
+
+    def export_view(self):
+        """
+        💾 Write the expanded part of the tree as a text map
+        """
+        output_file = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=TextMapWriter.extension,
+            initialfile=os.path.basename(self.start_path) + TextMapWriter.extension,
+            filetypes=[("Text", "*" + TextMapWriter.extension)],
+        )
+        if not output_file:
+            return
+        try:
+            with TextMapWriter.open(output_file) as f:
+                writer = TextMapWriter(f, labels=self.labels)
+                writer.write_header(
+                    self.labels.get("folder_map_of", "Folder Map of:"),
+                    self.start_path,
+                )
+                writer.write_entries(iter_expanded(self.start_path, self.shown.get))
+                writer.close()
+        except OSError as e:
+            messagebox.showerror(self.labels.get("error", "Error"), str(e), parent=self)
+            return
+        messagebox.showinfo(
+            self.labels.get("success", "Success"),
+            f"{self.labels.get('map_generated', '')}\n{output_file}",
+            parent=self,
+        )
+
+    def close(self):
+        self.loader.close()
+        self.destroy()
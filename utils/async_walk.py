@@ -0,0 +1,187 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.file_operations import DirListing, read_directory
+
+DEFAULT_MAX_IN_FLIGHT = 64
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit for directory reads that follows their latency.
+
+    Reads completing close to the best latency seen so far (within
+    ``tolerance`` times it) raise the limit: by one per read until the
+    first slowdown, then by one per ``limit`` reads. When the smoothed
+    latency drifts above that, the limit shrinks by 10%: a server that slows
+    down as requests pile up is backed off from, one that keeps up is given
+    more. The limit stays between ``minimum`` and ``maximum``.
+
+    Only used from the event loop thread, so it needs no locking.
+    """
+
+    def __init__(
+        self, initial=8, minimum=2, maximum=DEFAULT_MAX_IN_FLIGHT, tolerance=1.5
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.baseline = None
+        self.smoothed = None
+        self.peak = self.limit
+        self._since_decrease = 0
+        self._congested = False
+        self._waiters = deque()
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled.
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency):
+        self.in_flight -= 1
+        self._observe(latency)
+        self._wake()
+
+    def _observe(self, latency):
+        if self.baseline is None:
+            self.baseline = self.smoothed = latency
+        else:
+            # The baseline follows the fastest reads, but creeps up slowly so
+            # a lasting change in the server's speed is eventually accepted.
+            drift = (latency - self.baseline) / 1000
+            self.baseline = min(latency, self.baseline + drift)
+            self.smoothed += (latency - self.smoothed) / 5
+        self._since_decrease += 1
+        if self.smoothed > self.baseline * self.tolerance:
+            if self._since_decrease >= self.limit:
+                self.limit = max(self.minimum, self.limit * 0.9)
+                self._since_decrease = 0
+                self._congested = True
+        else:
+            step = 1 / self.limit if self._congested else 1
+            self.limit = min(self.maximum, self.limit + step)
+            self.peak = max(self.peak, self.limit)
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+def async_walk(
+    start_path,
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    reader=None,
+    max_depth=None,
+    max_prefetch=None,
+    limiter=None,
+):
+    """
+    Same listings, in the same order, as ``scandir_walk``, read by an
+    asyncio scheduler that keeps a bounded, self-tuning number of reads in
+    flight.
+
+    Meant for high-latency mounts, where a fixed thread pool is either too
+    small to cover the round-trips or large enough to swamp the server.
+    The standard library has no asynchronous ``scandir``, so every read
+    still runs on a thread of an executor with ``max_in_flight`` threads;
+    the event loop decides how many of them may be busy through an
+    ``AdaptiveLimit`` (pass ``limiter`` to supply or inspect one). As in
+    ``parallel_walk``, at most ``max_prefetch`` reads are kept ahead of
+    the consumer.
+    """
+    reader = reader or read_directory
+    if max_prefetch is None:
+        max_prefetch = max_in_flight * 256
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(
+        max_workers=max_in_flight, thread_name_prefix="folder-mapper-async"
+    )
+    loop.set_default_executor(executor)
+    if limiter is None:
+        limiter = AdaptiveLimit(maximum=max_in_flight)
+    lock = threading.Lock()
+    futures = {}
+    closed = False
+
+    def schedule(path, depth):
+        with lock:
+            if closed or len(futures) >= max_prefetch:
+                return
+            futures[path] = asyncio.run_coroutine_threadsafe(read(path, depth), loop)
+
+    async def read(path, depth):
+        await limiter.acquire()
+        start = time.monotonic()
+        try:
+            result = await loop.run_in_executor(None, reader, path)
+        finally:
+            limiter.release(time.monotonic() - start)
+        if result is not None and (max_depth is None or depth + 1 < max_depth):
+            for name in result[2]:
+                schedule(os.path.join(path, name), depth + 1)
+        return result
+
+    async def cancel_all():
+        current = asyncio.current_task()
+        tasks = [t for t in asyncio.all_tasks() if t is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    thread = threading.Thread(
+        target=loop.run_forever, name="folder-mapper-async-loop", daemon=True
+    )
+    thread.start()
+    try:
+        stack = [(start_path, 0)]
+        while stack:
+            path, depth = stack.pop()
+            with lock:
+                future = futures.pop(path, None)
+            if future is None:
+                future = asyncio.run_coroutine_threadsafe(read(path, depth), loop)
+            result = future.result()
+            if result is None:
+                continue
+            dirs, files, descend = result[:3]
+            yield DirListing(
+                path, depth, dirs, files, *result[3:], descend=descend
+            )
+            if max_depth is None or depth + 1 < max_depth:
+                for name in reversed(descend):
+                    stack.append((os.path.join(path, name), depth + 1))
+            else:
+                for name in descend:
+                    child = os.path.join(path, name)
+                    yield DirListing(child, depth + 1, [], [], truncated=True)
+    finally:
+        with lock:
+            closed = True
+            futures.clear()
+        asyncio.run_coroutine_threadsafe(cancel_all(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        executor.shutdown(wait=False, cancel_futures=True)
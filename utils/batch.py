@@ -0,0 +1,140 @@
+import os
+import time
+
+from utils.file_operations import (
+    EmptyFolderError,
+    generate_file_hierarchy,
+    unique_output_path,
+)
+from utils.instrumentation import MappingStats
+from utils.writers import map_extension
+
+
+class RootResult:
+    """Outcome of mapping one root in a batch."""
+
+    __slots__ = (
+        "source",
+        "output_file",
+        "items",
+        "elapsed",
+        "error",
+        "empty",
+        "stats",
+    )
+
+    def __init__(
+        self,
+        source,
+        output_file,
+        items=0,
+        elapsed=0.0,
+        error=None,
+        empty=False,
+        stats=None,
+    ):
+        self.source = source
+        self.output_file = output_file
+        self.items = items
+        self.elapsed = elapsed
+        self.error = error
+        self.empty = empty
+        # MappingStats.as_dict() of an instrumented run
+        self.stats = stats
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _map_root(source, output_file, translations, lang, options):
+    """Worker entry point: map ``source`` and report instead of raising."""
+    start = time.perf_counter()
+    options = dict(options)
+    stats = MappingStats() if options.pop("instrument", False) else None
+    try:
+        items = generate_file_hierarchy(
+            source, output_file, translations, lang, stats=stats, **options
+        )
+    except EmptyFolderError as e:
+        # Nothing was written: drop the file reserved by map_roots.
+        try:
+            os.remove(output_file)
+        except OSError:
+            pass
+        elapsed = time.perf_counter() - start
+        return RootResult(source, None, elapsed=elapsed, error=str(e), empty=True)
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        return RootResult(source, output_file, elapsed=elapsed, error=str(e))
+    elapsed = time.perf_counter() - start
+    stats = stats.as_dict() if stats is not None else None
+    return RootResult(source, output_file, items, elapsed, stats=stats)
+
+
+def map_roots(
+    sources,
+    output_folder,
+    translations,
+    lang,
+    processes=None,
+    progress_callback=None,
+    **options,
+):
+    """
+    Map every folder in ``sources`` to its own file in ``output_folder``.
+
+    Roots are spread over a ``ProcessPoolExecutor`` with ``processes``
+    workers (one per CPU by default), so several maps are built in parallel
+    instead of sharing one interpreter's GIL; ``processes=1`` maps them one
+    after another in this process. ``options`` are passed on to
+    ``generate_file_hierarchy``, except ``instrument``, which gives every run
+    a ``MappingStats`` returned in its result's ``stats``.
+    ``progress_callback(done, total, result)``
+    is called as each root finishes. Returns the ``RootResult`` of every
+    root, in the order of ``sources``.
+    """
+    extension = map_extension(
+        options.get("output_format", "txt"), options.get("compression")
+    )
+    jobs = []
+    for source in sources:
+        folder_name = os.path.basename(os.path.normpath(source))
+        output_file = unique_output_path(output_folder, folder_name, extension)
+        # Claim the name now, so two roots with the same folder name
+        # mapped at the same time can't pick the same file.
+        open(output_file, "w").close()
+        jobs.append((source, output_file))
+
+    results = {}
+
+    def finished(index, result):
+        results[index] = result
+        if progress_callback:
+            progress_callback(len(results), len(jobs), result)
+
+    if processes == 1 or len(jobs) <= 1:
+        for index, (source, output_file) in enumerate(jobs):
+            finished(
+                index, _map_root(source, output_file, translations, lang, options)
+            )
+        return [results[i] for i in range(len(jobs))]
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {
+            executor.submit(
+                _map_root, source, output_file, translations, lang, options
+            ): index
+            for index, (source, output_file) in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                source, output_file = jobs[index]
+                result = RootResult(source, output_file, error=str(e))
+            finished(index, result)
+    return [results[i] for i in range(len(jobs))]
@@ -0,0 +1,251 @@
+import hashlib
+import os
+import stat as stat_module
+import time
+from itertools import groupby
+from operator import itemgetter
+
+from utils.external_sort import ExternalSorter
+from utils.writers import format_size, map_stem
+
+# Bytes hashed at each end of a file in the partial stage; files up to twice
+# this size are then hashed whole, so no full stage is needed for them.
+PARTIAL_BYTES = 4096
+READ_BUFFER_SIZE = 1 << 20
+# Candidate files hashed per round, and per task sent to a worker process.
+BATCH_FILES = 4096
+TASK_CHUNK = 16
+
+
+def duplicates_path(output_file):
+    """Report of a map: ``a.b_map_1.txt.gz`` -> ``a.b_map_1_duplicates.txt``."""
+    return map_stem(output_file) + "_duplicates.txt"
+
+
+def _hasher():
+    # OpenSSL's SHA-256 uses the CPU's SHA instructions where there are any,
+    # which makes it faster than BLAKE2 on most current machines.
+    return hashlib.sha256()
+
+
+def partial_digest(task):
+    """
+    ``(digest, bytes read)`` of the first and last ``PARTIAL_BYTES`` of the
+    file of ``task``, a ``(path, size)`` pair; the digest is ``None`` if the
+    file can't be read.
+    """
+    path, size = task
+    try:
+        with open(path, "rb", buffering=0) as f:
+            head = f.read(PARTIAL_BYTES if size > 2 * PARTIAL_BYTES else size)
+            digest = _hasher()
+            digest.update(head)
+            read = len(head)
+            if size > 2 * PARTIAL_BYTES:
+                f.seek(-PARTIAL_BYTES, os.SEEK_END)
+                tail = f.read(PARTIAL_BYTES)
+                digest.update(tail)
+                read += len(tail)
+    except OSError:
+        return None, 0
+    return digest.digest(), read
+
+
+def full_digest(task):
+    """
+    ``(digest, bytes read)`` of the whole file of ``task``, read into one
+    reused ``READ_BUFFER_SIZE`` buffer; the digest is ``None`` if the file
+    can't be read.
+    """
+    path, size = task
+    digest = _hasher()
+    buffer = bytearray(READ_BUFFER_SIZE)
+    view = memoryview(buffer)
+    read = 0
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                digest.update(view[:n])
+                read += n
+    except OSError:
+        return None, read
+    return digest.digest(), read
+
+
+class DuplicateSummary:
+    """Outcome of a duplicate search."""
+
+    __slots__ = ("groups", "copies", "wasted", "bytes_read", "elapsed")
+
+    def __init__(self):
+        self.groups = 0
+        # Files beyond the first of each group, and the bytes they take.
+        self.copies = 0
+        self.wasted = 0
+        self.bytes_read = 0
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self):
+        """Bytes hashed per second."""
+        return self.bytes_read / self.elapsed if self.elapsed else 0.0
+
+
+class DuplicateFinder:
+    """
+    Find files with identical content among those a mapping run lists.
+
+    ``collect`` passes the run's ``TreeEntry`` stream through unchanged,
+    noting every regular file (entries need their ``stat``). The files are
+    then grouped by size through an ``ExternalSorter``, largest first, so
+    even trees of millions of files are grouped in bounded memory. Only
+    same-size files are read: first their ``PARTIAL_BYTES`` at each end,
+    and only files that still collide are hashed whole. Hard links to one
+    file count once, and files smaller than ``min_size`` are skipped.
+
+    Hashing runs in a pool of ``processes`` worker processes (one per CPU by
+    default; ``1`` hashes in this process), a batch of candidates at a time.
+    A ``MappingJob`` passed as ``job`` is checked between batches.
+    """
+
+    def __init__(self, processes=None, min_size=1, tmp_dir=None, job=None):
+        self.processes = processes
+        self.min_size = min_size
+        self.job = job
+        self._sorter = ExternalSorter(tmp_dir=tmp_dir)
+
+    def collect(self, entries):
+        add = self._sorter.add
+        min_size = self.min_size
+        is_regular = stat_module.S_ISREG
+        for entry in entries:
+            stat = entry.stat
+            if (
+                not entry.is_dir
+                and stat is not None
+                and is_regular(stat.st_mode)
+                and stat.st_size >= min_size
+            ):
+                add((-stat.st_size, stat.st_dev, stat.st_ino, entry.path))
+            yield entry
+
+    def _size_groups(self):
+        """Yield ``(size, paths)`` for every size shared by distinct files."""
+        for negative_size, records in groupby(self._sorter, key=itemgetter(0)):
+            paths = []
+            inodes = set()
+            for _, device, inode, path in records:
+                # Windows leaves st_ino at 0 in scandir stats.
+                if inode:
+                    if (device, inode) in inodes:
+                        continue
+                    inodes.add((device, inode))
+                paths.append(path)
+            if len(paths) > 1:
+                yield -negative_size, paths
+
+    def _batches(self):
+        batch = []
+        files = 0
+        for size, paths in self._size_groups():
+            batch.append((size, paths))
+            files += len(paths)
+            if files >= BATCH_FILES:
+                yield batch
+                batch = []
+                files = 0
+        if batch:
+            yield batch
+
+    def find(self, summary=None):
+        """
+        Yield ``(size, paths)`` for every set of identical files, largest
+        first, counting the bytes read into ``summary``.
+        """
+        summary = summary if summary is not None else DuplicateSummary()
+        executor = None
+        hash_map = map
+        if self.processes != 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            executor = ProcessPoolExecutor(max_workers=self.processes)
+
+            def hash_map(function, tasks):
+                return executor.map(function, tasks, chunksize=TASK_CHUNK)
+
+        def split(groups, function):
+            # Regroup each group's files by their digest under ``function``.
+            tasks = [(path, size) for size, paths in groups for path in paths]
+            results = iter(hash_map(function, tasks))
+            for size, paths in groups:
+                by_digest = {}
+                for path in paths:
+                    digest, read = next(results)
+                    summary.bytes_read += read
+                    if digest is not None:
+                        by_digest.setdefault(digest, []).append(path)
+                for same in by_digest.values():
+                    if len(same) > 1:
+                        yield size, same
+
+        try:
+            for batch in self._batches():
+                if self.job is not None:
+                    self.job.checkpoint()
+                candidates = list(split(batch, partial_digest))
+                small = [g for g in candidates if g[0] <= 2 * PARTIAL_BYTES]
+                large = [g for g in candidates if g[0] > 2 * PARTIAL_BYTES]
+                # The partial digest of a small file already covers all of it.
+                confirmed = small + list(split(large, full_digest))
+                confirmed.sort(key=lambda group: -group[0])
+                yield from confirmed
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            self.close()
+
+    def write_report(self, report_file, start_path, labels):
+        """
+        Write every set of identical files to ``report_file``, largest first,
+        and return the ``DuplicateSummary``. ``labels`` is the language's
+        translations entry.
+        """
+        summary = DuplicateSummary()
+        start = time.perf_counter()
+        with open(report_file, "w", encoding="utf-8") as f:
+            f.write(f"{labels['duplicate_files']} {start_path}\n" + "=" * 50 + "\n")
+            for size, paths in self.find(summary):
+                wasted = size * (len(paths) - 1)
+                summary.groups += 1
+                summary.copies += len(paths) - 1
+                summary.wasted += wasted
+                group = labels["duplicate_group"].format(
+                    count=len(paths), size=format_size(size), wasted=format_size(wasted)
+                )
+                f.write(f"\n{group}\n")
+                for path in sorted(paths):
+                    f.write(f"    {path}\n")
+            summary.elapsed = time.perf_counter() - start
+            if not summary.groups:
+                f.write(f"\n{labels['no_duplicates']}\n")
+            f.write("\n" + format_summary(summary, labels) + "\n")
+        return summary
+
+    def close(self):
+        """Drop the collected files and delete the sort's temporary files."""
+        self._sorter.close()
+
+
+def format_summary(summary, labels):
+    counts = labels["duplicates_summary"].format(
+        groups=summary.groups, copies=summary.copies, wasted=format_size(summary.wasted)
+    )
+    read = labels["duplicates_read"].format(
+        size=format_size(summary.bytes_read),
+        seconds=summary.elapsed,
+        rate=format_size(summary.throughput),
+    )
+    return f"{counts} ({read})"
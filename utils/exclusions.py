@@ -0,0 +1,241 @@
+import os
+import re
+
+GITIGNORE = ".gitignore"
+REGEX_PREFIX = "re:"
+
+
+def _translate(pattern):
+    """Translate a gitignore-style glob into a regex for a ``/``-separated path."""
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                i += 2
+                if i < n and pattern[i] == "/":
+                    parts.append("(?:.*/)?")
+                    i += 1
+                else:
+                    parts.append(".*")
+                continue
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                content = pattern[i + 1 : end].replace("\\", "\\\\")
+                if content[0] in "!^":
+                    content = "^" + content[1:]
+                parts.append(f"[{content}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return "".join(parts)
+
+
+class Rule:
+    """One parsed ignore pattern."""
+
+    __slots__ = ("regex", "negate", "dir_only", "anchored")
+
+    def __init__(self, regex, negate, dir_only, anchored):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        self.anchored = anchored
+
+    @classmethod
+    def parse(cls, line):
+        """Parse a gitignore line; ``None`` for blanks and comments."""
+        line = line.rstrip("\n\r")
+        if not line.endswith("\\ "):
+            line = line.rstrip(" ")
+        if not line or line.startswith("#"):
+            return None
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+        # A slash anywhere but at the end ties the pattern to its base
+        # folder; otherwise it matches a name at any level below it.
+        anchored = "/" in line
+        return cls(_translate(line.lstrip("/")), negate, dir_only, anchored)
+
+
+class RuleSet:
+    """
+    The rules of one ignore file, compiled once.
+
+    Without ``!`` negations, every rule is folded into at most four combined
+    regexes (by name or by path, for any entry or folders only), so an entry
+    costs a handful of regex calls however many patterns there are. With
+    negations, rules are checked last to first and the first match wins,
+    as git does.
+    """
+
+    def __init__(self, rules):
+        self.rules = [
+            (re.compile(r.regex).fullmatch, r.negate, r.dir_only, r.anchored)
+            for r in rules
+        ]
+        self._combined = None
+        if not any(r.negate for r in rules):
+            self._combined = tuple(
+                self._combine(
+                    r for r in rules if (r.anchored, r.dir_only) == (anchored, dir_only)
+                )
+                for anchored in (False, True)
+                for dir_only in (False, True)
+            )
+
+    @staticmethod
+    def _combine(rules):
+        regexes = [r.regex for r in rules]
+        if not regexes:
+            return None
+        return re.compile("|".join(f"(?:{r})" for r in regexes)).fullmatch
+
+    @classmethod
+    def from_lines(cls, lines):
+        return cls([rule for rule in map(Rule.parse, lines) if rule is not None])
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def match(self, rel_path, name, is_dir):
+        """``True`` to exclude, ``False`` to re-include, ``None`` if no rule matches."""
+        if self._combined is not None:
+            name_any, name_dir, path_any, path_dir = self._combined
+            if (
+                (name_any and name_any(name))
+                or (path_any and path_any(rel_path))
+                or (is_dir and name_dir and name_dir(name))
+                or (is_dir and path_dir and path_dir(rel_path))
+            ):
+                return True
+            return None
+        for fullmatch, negate, dir_only, anchored in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if fullmatch(rel_path if anchored else name):
+                return not negate
+        return None
+
+
+class ExclusionRules:
+    """
+    Decide which entries a mapping run skips, and prune them while walking.
+
+    ``patterns`` use gitignore syntax relative to the mapped folder (``*.log``,
+    ``build/``, ``/docs/*.tmp``, ``**/cache``, ``!keep.log``), and a pattern
+    starting with ``re:`` is a regular expression searched in the entry's
+    relative path. With ``use_gitignore``, every ``.gitignore`` met on the
+    way applies to its own folder and below (deeper files win), and ``.git``
+    folders are skipped.
+    """
+
+    def __init__(self, patterns=(), use_gitignore=False):
+        patterns = [p.strip() for p in patterns if p and p.strip()]
+        regexes = [
+            p[len(REGEX_PREFIX) :] for p in patterns if p.startswith(REGEX_PREFIX)
+        ]
+        globs = [p for p in patterns if not p.startswith(REGEX_PREFIX)]
+        if use_gitignore:
+            globs.append(".git/")
+        self.user_rules = RuleSet.from_lines(globs)
+        self.regex = None
+        if regexes:
+            self.regex = re.compile("|".join(f"(?:{r})" for r in regexes)).search
+        self.use_gitignore = use_gitignore
+        # Relative folder path -> chain of (base, RuleSet) from the .gitignore
+        # files above and in it. Only folders holding a .gitignore are stored.
+        self._chains = {"": ()}
+
+    def __bool__(self):
+        return bool(self.user_rules or self.regex or self.use_gitignore)
+
+    def _chain(self, path, rel_dir, files):
+        parent = rel_dir
+        while parent not in self._chains:
+            parent = parent.rpartition("/")[0]
+        chain = self._chains[parent]
+        if self.use_gitignore and GITIGNORE in files:
+            gitignore = os.path.join(path, GITIGNORE)
+            try:
+                with open(gitignore, encoding="utf-8", errors="replace") as f:
+                    rules = RuleSet.from_lines(f)
+            except OSError:
+                rules = None
+            if rules:
+                chain = chain + ((rel_dir, rules),)
+                self._chains[rel_dir] = chain
+        return chain
+
+    def excluded(self, rel_dir, name, is_dir, chain):
+        rel_path = f"{rel_dir}/{name}" if rel_dir else name
+        if self.regex and self.regex(rel_path):
+            return True
+        if self.user_rules:
+            verdict = self.user_rules.match(rel_path, name, is_dir)
+            if verdict is not None:
+                return verdict
+        for base, rules in reversed(chain):
+            relative = rel_path[len(base) + 1 :] if base else rel_path
+            verdict = rules.match(relative, name, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def folder_filter(self, path, start_path):
+        """
+        ``excluded(name, is_dir)`` for the entries of the folder ``path``, for
+        readers that filter entries as they scan instead of wrapping a reader.
+        """
+        root_prefix = os.path.join(start_path, "")
+        rel_dir = path[len(root_prefix) :] if len(path) > len(start_path) else ""
+        if os.sep != "/":
+            rel_dir = rel_dir.replace(os.sep, "/")
+        gitignore = self.use_gitignore and os.path.isfile(
+            os.path.join(path, GITIGNORE)
+        )
+        chain = self._chain(path, rel_dir, (GITIGNORE,) if gitignore else ())
+        excluded = self.excluded
+        return lambda name, is_dir: excluded(rel_dir, name, is_dir, chain)
+
+    def wrap_reader(self, reader, start_path):
+        """Wrap ``reader`` so excluded entries are neither listed nor read."""
+        root_prefix = os.path.join(start_path, "")
+        sep = os.sep
+        excluded = self.excluded
+
+        def read(path):
+            result = reader(path)
+            if result is None:
+                return None
+            dirs, files, descend = result[:3]
+            rel_dir = path[len(root_prefix) :] if len(path) > len(start_path) else ""
+            if sep != "/":
+                rel_dir = rel_dir.replace(sep, "/")
+            chain = self._chain(path, rel_dir, files)
+            kept_dirs = [d for d in dirs if not excluded(rel_dir, d, True, chain)]
+            kept_files = [f for f in files if not excluded(rel_dir, f, False, chain)]
+            if descend is dirs:
+                descend = kept_dirs
+            else:
+                kept = set(kept_dirs)
+                descend = [d for d in descend if d in kept]
+            return (kept_dirs, kept_files, descend) + result[3:]
+
+        return read
@@ -0,0 +1,180 @@
+import heapq
+import os
+import pickle
+import sys
+import tempfile
+from itertools import islice
+
+# Records held in memory at once, and records pickled together in a run file.
+DEFAULT_RUN_SIZE = 250_000
+BLOCK_SIZE = 1_000
+# Runs merged at once; more are first merged into longer runs.
+MAX_FAN_IN = 64
+
+
+def _write_run(records, runs_file, block_size=BLOCK_SIZE):
+    """Append ``records`` to ``runs_file`` as a run; returns its byte range."""
+    runs_file.seek(0, os.SEEK_END)
+    start = runs_file.tell()
+    records = iter(records)
+    while True:
+        block = list(islice(records, block_size))
+        if not block:
+            break
+        pickle.dump(block, runs_file, pickle.HIGHEST_PROTOCOL)
+    return start, runs_file.tell()
+
+
+def _read_run(runs_file, run):
+    # Runs read side by side share the file, so each seeks to its own block.
+    position, end = run
+    load = pickle.load
+    while position < end:
+        runs_file.seek(position)
+        block = load(runs_file)
+        position = runs_file.tell()
+        yield from block
+
+
+class ExternalSorter:
+    """
+    Sort more records than fit in memory, holding about ``run_size`` of them
+    at a time.
+
+    Records given to ``add``/``extend`` are sorted in runs of ``run_size``
+    that are pickled one after another to a temporary file (one per sorter,
+    however many runs it holds); iterating the sorter then streams them
+    back through ``heapq.merge`` a block at a time. With more than
+    ``MAX_FAN_IN`` runs, neighbouring runs are first merged into longer
+    ones. Records that fit in a single run never touch the disk. Records
+    must be picklable; the sort is stable, and a sorter is iterated once.
+
+    With ``memory_limit``, a run is also spilled once the records held add
+    up to that many bytes, as estimated by ``sizeof(record)``; pass a cheap
+    estimate for records that ``sys.getsizeof`` measures only shallowly.
+    Runs are then written in blocks small enough for the ``MAX_FAN_IN``
+    blocks a merge holds to fit in the limit too; otherwise a merge holds
+    one block of ``BLOCK_SIZE`` records per run.
+    """
+
+    def __init__(
+        self,
+        key=None,
+        run_size=DEFAULT_RUN_SIZE,
+        tmp_dir=None,
+        memory_limit=None,
+        sizeof=sys.getsizeof,
+    ):
+        self.key = key
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+        self.memory_limit = memory_limit
+        self.sizeof = sizeof
+        self.count = 0
+        self._chunk = []
+        self._chunk_bytes = 0
+        self._runs = []
+        self._runs_file = None
+        self._block_size = BLOCK_SIZE
+
+    @property
+    def spilled(self):
+        """Whether any records went to disk."""
+        return bool(self._runs)
+
+    @property
+    def held_bytes(self):
+        """Estimated bytes of the records held in memory (with ``memory_limit``)."""
+        return self._chunk_bytes
+
+    def spill(self):
+        """Move the records held in memory to a run on disk, before iterating."""
+        if self._chunk:
+            self._spill()
+
+    def add(self, record):
+        self._chunk.append(record)
+        self.count += 1
+        if self.memory_limit is not None:
+            self._chunk_bytes += self.sizeof(record)
+            if self._chunk_bytes >= self.memory_limit:
+                self._spill()
+                return
+        if len(self._chunk) >= self.run_size:
+            self._spill()
+
+    def extend(self, records):
+        if self.memory_limit is not None:
+            for record in records:
+                self.add(record)
+            return
+        records = iter(records)
+        while True:
+            room = self.run_size - len(self._chunk)
+            before = len(self._chunk)
+            self._chunk.extend(islice(records, room))
+            self.count += len(self._chunk) - before
+            if len(self._chunk) < self.run_size:
+                return
+            self._spill()
+
+    def _spill(self):
+        if self._runs_file is None:
+            self._runs_file = tempfile.TemporaryFile(dir=self.tmp_dir)
+        if self.memory_limit is not None and self._chunk_bytes:
+            record_bytes = self._chunk_bytes / len(self._chunk)
+            blocks = int(self.memory_limit / (MAX_FAN_IN * record_bytes))
+            self._block_size = min(max(blocks, 1), BLOCK_SIZE)
+        self._chunk.sort(key=self.key)
+        self._runs.append(_write_run(self._chunk, self._runs_file, self._block_size))
+        self._chunk = []
+        self._chunk_bytes = 0
+
+    def __iter__(self):
+        key = self.key
+        try:
+            if not self._runs:
+                self._chunk.sort(key=key)
+                yield from self._chunk
+                return
+            if self._chunk:
+                self._spill()
+            while len(self._runs) > MAX_FAN_IN:
+                # Merge neighbouring runs so equal records keep their order.
+                source = self._runs_file
+                self._runs_file = tempfile.TemporaryFile(dir=self.tmp_dir)
+                merged = []
+                try:
+                    for start in range(0, len(self._runs), MAX_FAN_IN):
+                        group = self._runs[start : start + MAX_FAN_IN]
+                        runs = [_read_run(source, run) for run in group]
+                        stream = heapq.merge(*runs, key=key)
+                        merged.append(
+                            _write_run(stream, self._runs_file, self._block_size)
+                        )
+                finally:
+                    source.close()
+                self._runs = merged
+            runs = [_read_run(self._runs_file, run) for run in self._runs]
+            yield from heapq.merge(*runs, key=key)
+        finally:
+            self.close()
+
+    def close(self):
+        """Drop the records and delete the run file."""
+        if self._runs_file is not None:
+            self._runs_file.close()
+            self._runs_file = None
+        self._runs = []
+        self._chunk = []
+        self._chunk_bytes = 0
+
+
+def external_sort(records, key=None, run_size=DEFAULT_RUN_SIZE, tmp_dir=None):
+    """
+    Yield ``records`` sorted by ``key`` in bounded memory; see
+    ``ExternalSorter``.
+    """
+    sorter = ExternalSorter(key, run_size, tmp_dir)
+    sorter.extend(records)
+    yield from sorter
@@ -1,6 +1,27 @@
+import logging
 import os
 import threading
 import traceback
+from functools import partial
+from itertools import chain, islice
+
+from utils.exclusions import ExclusionRules
+from utils.instrumentation import stats_path
+from utils.jobs import MappingCancelled
+from utils.ordering import (
+    DIRS_FIRST,
+    STAT_ORDERS,
+    SortedNames,
+    external_sorting_reader,
+    sorting_reader,
+)
+from utils.writers import (
+    COMPRESSIONS,
+    DEFAULT_BUFFER_SIZE,
+    MAP_WRITERS,
+    compression_for,
+    map_extension,
+)
 
 
 class EmptyFolderError(Exception):
@@ -9,45 +30,794 @@ class EmptyFolderError(Exception):
     pass
 
 
+class DirListing:
+    """
+    One directory read by a walker: its path, depth and child names, plus
+    their stat results when the reader collected them. ``descend`` is the
+    part of ``dirs`` the walker goes into (all but symlinks), in the same
+    order. ``omitted`` counts entries left out by a per-directory cap;
+    ``truncated`` marks a directory below the depth limit, which is listed
+    without being read.
+    """
+
+    __slots__ = (
+        "path",
+        "depth",
+        "dirs",
+        "files",
+        "stats",
+        "omitted",
+        "truncated",
+        "descend",
+    )
+
+    def __init__(
+        self,
+        path,
+        depth,
+        dirs,
+        files,
+        stats=None,
+        omitted=0,
+        truncated=False,
+        descend=None,
+    ):
+        self.path = path
+        self.depth = depth
+        self.dirs = dirs
+        self.files = files
+        self.stats = stats
+        self.omitted = omitted
+        self.truncated = truncated
+        self.descend = dirs if descend is None else descend
+
+
+class TreeEntry:
+    """
+    One file or folder yielded by ``iter_tree``. ``depth`` is 0 for the
+    root; ``is_last`` marks the last entry drawn under its parent, and
+    ``stat`` is only filled in when stats were requested. Folders rendered
+    from an aggregated ``CompactTree`` carry ``totals``: (bytes, file count,
+    newest mtime) of their whole subtree.
+
+    A folder at the depth limit has ``truncated`` set, since its content
+    wasn't read. Entries cut by a per-directory cap are stood for by one
+    summary entry, a non-folder whose ``omitted`` is how many were left out.
+    """
+
+    __slots__ = (
+        "path",
+        "name",
+        "depth",
+        "is_dir",
+        "is_last",
+        "stat",
+        "totals",
+        "omitted",
+        "truncated",
+    )
+
+    def __init__(
+        self,
+        path,
+        name,
+        depth,
+        is_dir,
+        is_last,
+        stat=None,
+        totals=None,
+        omitted=0,
+        truncated=False,
+    ):
+        self.path = path
+        self.name = name
+        self.depth = depth
+        self.is_dir = is_dir
+        self.is_last = is_last
+        self.stat = stat
+        self.totals = totals
+        self.omitted = omitted
+        self.truncated = truncated
+
+
+def read_directory(path, with_stats=False, limit=None):
+    """
+    Read ``path`` with a single ``os.scandir`` pass.
+
+    Returns ``(dirs, files, descend)`` in filesystem order, classified the
+    same way ``os.walk`` does: symlinks to directories are listed in ``dirs``
+    but left out of ``descend``. With ``with_stats`` a fourth item maps every
+    name to its ``DirEntry.stat(follow_symlinks=False)`` result, which is
+    free on Windows and one ``lstat`` elsewhere. Returns ``None`` if the
+    directory can't be read, which ``os.walk`` also silently skips.
+
+    With ``limit``, only the first ``limit`` entries are classified and
+    stat'ed; the rest are just counted, and the count is returned as a
+    fifth item (after ``stats``, which is then ``None`` unless requested).
+    """
+    dirs = []
+    files = []
+    descend = dirs
+    stats = {} if with_stats else None
+    omitted = 0
+    try:
+        with os.scandir(path) as scan:
+            it = scan if limit is None else islice(scan, limit)
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry.name)
+                    if entry.is_symlink():
+                        if descend is dirs:
+                            descend = dirs[:-1]
+                    elif descend is not dirs:
+                        descend.append(entry.name)
+                else:
+                    files.append(entry.name)
+                if with_stats:
+                    try:
+                        stats[entry.name] = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        pass
+            if limit is not None:
+                omitted = sum(1 for _ in scan)
+    except OSError:
+        return None
+    if omitted:
+        return dirs, files, descend, stats, omitted
+    if with_stats:
+        return dirs, files, descend, stats
+    return dirs, files, descend
+
+
+def read_directory_with_stats(path):
+    return read_directory(path, True)
+
+
+def capping_reader(reader, max_entries, dirs_first=False):
+    """
+    Wrap ``reader`` so a directory keeps only its first ``max_entries``
+    entries, files first as the map draws them (subfolders first with
+    ``dirs_first``), and reports how many it dropped. Dropped subfolders
+    are never read.
+    """
+
+    def read(path):
+        result = reader(path)
+        if result is None:
+            return None
+        dirs, files, descend = result[:3]
+        stats = result[3] if len(result) > 3 else None
+        omitted = result[4] if len(result) > 4 else 0
+        excess = len(dirs) + len(files) - max_entries
+        if excess <= 0:
+            return result
+        if dirs_first:
+            kept_dirs = dirs[:max_entries]
+            files = files[: max_entries - len(kept_dirs)]
+        else:
+            files = files[:max_entries]
+            kept_dirs = dirs[: max_entries - len(files)]
+        if descend is dirs:
+            descend = kept_dirs
+        else:
+            kept = set(kept_dirs)
+            descend = [d for d in descend if d in kept]
+        return kept_dirs, files, descend, stats, omitted + excess
+
+    return read
+
+
+def build_reader(
+    start_path,
+    reader=None,
+    with_stats=False,
+    exclude=(),
+    gitignore=False,
+    max_entries=None,
+    order=None,
+    stats=None,
+    sort_memory=None,
+    tmp_dir=None,
+):
+    """
+    Directory reader applying the exclusions, sort order and per-directory
+    cap of a map of ``start_path`` on top of ``reader`` (``read_directory``
+    by default). Entries are sorted before the cap, so a capped folder
+    keeps the first entries in ``order``. With ``stats``, a
+    ``MappingStats``, the reads themselves are timed.
+
+    ``sort_memory`` bounds the bytes a folder's files may take while being
+    sorted: larger folders are sorted on disk in ``tmp_dir``; see
+    ``external_sorting_reader``. It only applies to the default reader, as
+    a custom one already holds the whole listing in memory.
+    """
+    rules = ExclusionRules(exclude, gitignore)
+    if reader is None and order and sort_memory:
+        reader = external_sorting_reader(
+            start_path,
+            order,
+            sort_memory,
+            rules or None,
+            max_entries,
+            tmp_dir,
+            with_stats,
+        )
+        return stats.wrap_reader(reader) if stats is not None else reader
+    if reader is None and max_entries and not rules and not order:
+        # Nothing to filter or sort first: the reader itself stops at the cap
+        # and merely counts the remaining entries.
+        reader = partial(read_directory, with_stats=with_stats, limit=max_entries)
+        return stats.wrap_reader(reader) if stats is not None else reader
+    if reader is None:
+        needs_stats = with_stats or order in STAT_ORDERS
+        reader = read_directory_with_stats if needs_stats else read_directory
+    if stats is not None:
+        reader = stats.wrap_reader(reader)
+    if rules:
+        reader = rules.wrap_reader(reader, start_path)
+    if order:
+        reader = sorting_reader(reader, order, keep_stats=with_stats)
+    if max_entries:
+        reader = capping_reader(reader, max_entries, order == DIRS_FIRST)
+    return reader
+
+
+def scandir_walk(start_path, reader=None, max_depth=None):
+    """
+    Walk ``start_path`` top-down in the same order as ``os.walk``, reading
+    every directory exactly once and yielding a ``DirListing`` for each.
+    ``reader`` replaces ``read_directory``, e.g. with a snapshot cache.
+    Directories ``max_depth`` levels below ``start_path`` are yielded as
+    truncated listings without being read.
+    """
+    reader = reader or read_directory
+    stack = [(start_path, 0)]
+    while stack:
+        path, depth = stack.pop()
+        result = reader(path)
+        if result is None:
+            continue
+        dirs, files, descend = result[:3]
+        yield DirListing(path, depth, dirs, files, *result[3:], descend=descend)
+        if max_depth is None or depth + 1 < max_depth:
+            for name in reversed(descend):
+                stack.append((os.path.join(path, name), depth + 1))
+        else:
+            for name in descend:
+                child = os.path.join(path, name)
+                yield DirListing(child, depth + 1, [], [], truncated=True)
+
+
+def parallel_walk(
+    start_path, workers=8, max_prefetch=None, reader=None, max_depth=None
+):
+    """
+    Same listings, in the same order, as ``scandir_walk``, but directories
+    are read concurrently by a pool of ``workers`` threads.
+
+    Each finished read queues its subdirectories straight away, so the pool
+    runs ahead of the consumer; results are handed back in the serial
+    pre-order, which keeps the output identical to a serial run. At most
+    ``max_prefetch`` reads are kept in flight or waiting to be consumed;
+    past that the consumer reads the directory it needs itself.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    reader = reader or read_directory
+    if max_prefetch is None:
+        max_prefetch = workers * 256
+    lock = threading.Lock()
+    futures = {}
+    closed = False
+    executor = ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="folder-mapper-scan"
+    )
+
+    def schedule(path, depth):
+        with lock:
+            if closed or len(futures) >= max_prefetch:
+                return
+            futures[path] = executor.submit(read_and_schedule, path, depth)
+
+    def read_and_schedule(path, depth):
+        result = reader(path)
+        if result is not None and (max_depth is None or depth + 1 < max_depth):
+            for name in result[2]:
+                schedule(os.path.join(path, name), depth + 1)
+        return result
+
+    try:
+        stack = [(start_path, 0)]
+        while stack:
+            path, depth = stack.pop()
+            with lock:
+                future = futures.pop(path, None)
+            if future is None:
+                result = read_and_schedule(path, depth)
+            else:
+                result = future.result()
+            if result is None:
+                continue
+            dirs, files, descend = result[:3]
+            yield DirListing(
+                path, depth, dirs, files, *result[3:], descend=descend
+            )
+            if max_depth is None or depth + 1 < max_depth:
+                for name in reversed(descend):
+                    stack.append((os.path.join(path, name), depth + 1))
+            else:
+                for name in descend:
+                    child = os.path.join(path, name)
+                    yield DirListing(child, depth + 1, [], [], truncated=True)
+    finally:
+        with lock:
+            closed = True
+            futures.clear()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def walk_directories(
+    start_path,
+    workers=1,
+    reader=None,
+    max_depth=None,
+    backend="threads",
+    max_prefetch=None,
+):
+    """
+    Pick the walker: serial for one worker, a thread pool above, or with
+    ``backend="async"`` the latency-adaptive ``async_walk``, which then
+    keeps up to ``workers`` reads in flight (``DEFAULT_MAX_IN_FLIGHT`` if
+    ``workers`` is 1). ``max_prefetch`` bounds the concurrent walkers' read
+    ahead; see ``parallel_walk``.
+    """
+    if backend == "async":
+        from utils.async_walk import async_walk
+
+        workers = concurrent_reads(workers, backend)
+        return async_walk(start_path, workers, reader, max_depth, max_prefetch)
+    if workers and workers > 1:
+        return parallel_walk(start_path, workers, max_prefetch, reader, max_depth)
+    return scandir_walk(start_path, reader, max_depth)
+
+
+def concurrent_reads(workers=1, backend="threads"):
+    """
+    How many reads the walker ``walk_directories`` picks runs at once,
+    ahead of its consumer; 0 for the serial walker.
+    """
+    if backend == "async":
+        from utils.async_walk import DEFAULT_MAX_IN_FLIGHT
+
+        return DEFAULT_MAX_IN_FLIGHT if not workers or workers == 1 else workers
+    return workers if workers and workers > 1 else 0
+
+
+def unique_output_path(output_folder, folder_name, extension=".txt"):
+    """
+    Return ``<folder_name>_map<extension>`` in ``output_folder``, or the
+    first free ``<folder_name>_map_N<extension>`` if it's taken. A name is
+    taken while a map of any format has its stem, since the reports
+    written next to a map (``_stats.json``, ``_duplicates.txt``) are named
+    after the stem alone.
+    """
+    stem = os.path.join(output_folder, f"{folder_name}_map")
+    counter = 1
+    while _map_exists(stem):
+        stem = os.path.join(output_folder, f"{folder_name}_map_{counter}")
+        counter += 1
+    return stem + extension
+
+
+def _map_exists(stem):
+    return any(
+        os.path.exists(stem + map_extension(output_format, compression))
+        for output_format in MAP_WRITERS
+        for compression in (None, *COMPRESSIONS)
+    )
+
+
+def _file_entries(path, files, depth, last, stats):
+    if isinstance(files, SortedNames) and files.with_stats:
+        for i, (file, stat) in enumerate(files.items()):
+            yield TreeEntry(
+                os.path.join(path, file), file, depth, False, i == last, stat
+            )
+        return
+    for i, file in enumerate(files):
+        yield TreeEntry(
+            os.path.join(path, file),
+            file,
+            depth,
+            False,
+            i == last,
+            stats.get(file) if stats is not None else None,
+        )
+
+
+def iter_tree(
+    start_path,
+    workers=1,
+    reader=None,
+    max_depth=None,
+    exclude=(),
+    with_stats=False,
+    progress_callback=None,
+    gitignore=False,
+    max_entries=None,
+    job=None,
+    backend="threads",
+    order=None,
+    stats=None,
+    sort_memory=None,
+    tmp_dir=None,
+):
+    """
+    Lazily yield a ``TreeEntry`` for every folder and file under
+    ``start_path``, root first, in the order the map draws them: each
+    folder is followed by its files, then by its subfolders.
+
+    ``order`` (one of ``SORT_ORDERS``) sorts every folder's entries instead
+    of keeping the filesystem's order, so maps of the same tree are
+    identical on every run and machine. With ``dirs-first``, a folder's
+    files come after its subfolders; they are held back until the walk
+    has left the last subfolder. With ``sort_memory``, the files being
+    sorted take about that many bytes in all: the budget is split evenly
+    between the folders a concurrent walker reads ahead (at most one per
+    read it runs at once), the folder being yielded and, with
+    ``dirs-first``, the files held back. A folder needing more than its
+    share is sorted on disk in ``tmp_dir``, so even a folder of millions of
+    files is mapped in bounded memory; see ``build_reader``.
+
+    Only the directories being walked are held in memory, so arbitrarily
+    large trees stream in constant space. ``workers`` and ``backend`` pick
+    the walker; see ``walk_directories``. Entries matching ``exclude`` (or a
+    ``.gitignore`` when ``gitignore`` is set) are pruned as each directory
+    is read, so excluded folders are never opened; see ``ExclusionRules``.
+
+    ``max_depth`` stops descending that many levels below ``start_path``;
+    deeper folders are listed but never read. ``max_entries`` keeps the
+    first entries of each directory and yields one summary entry counting
+    the rest, which are neither stat'ed nor walked into.
+
+    A ``MappingJob`` passed as ``job`` is checked before each directory, so
+    the walk can be paused there or stopped with ``MappingCancelled``.
+
+    ``progress_callback(processed, estimated_total)`` is called once per
+    directory; the total is estimated from the entries seen so far, assuming
+    every directory still to be read holds the average seen per directory.
+
+    ``stats``, a ``MappingStats``, times and counts the directory reads.
+    """
+    dirs_first = order == DIRS_FIRST
+    max_prefetch = None
+    if reader is None and order and sort_memory:
+        # Read no further ahead than the reads running at once.
+        max_prefetch = concurrent_reads(workers, backend)
+        sort_memory = max(sort_memory // (max_prefetch + 1 + dirs_first), 1)
+    reader = build_reader(
+        start_path,
+        reader,
+        with_stats,
+        exclude,
+        gitignore,
+        max_entries,
+        order,
+        stats,
+        sort_memory,
+        tmp_dir,
+    )
+    # With dirs_first: (depth, entries, bytes held in memory) of the files of
+    # the folders being walked, innermost last, each released once its
+    # folder's subtree is done.
+    held_files = []
+    held_bytes = 0
+    processed_items = 0
+    seen_items = 0
+    scanned_dirs = 0
+    pending_dirs = 0
+    # Last subfolder and stats of the most recent listing at each depth: in
+    # pre-order that listing is the parent of whatever comes next.
+    last_dirs = []
+    parent_stats = []
+
+    listings = walk_directories(
+        start_path, workers, reader, max_depth, backend, max_prefetch
+    )
+    for listing in listings:
+        if job is not None:
+            job.checkpoint()
+        depth = listing.depth
+        while held_files and held_files[-1][0] >= depth:
+            _, file_entries, held = held_files.pop()
+            held_bytes -= held
+            yield from file_entries
+        path = listing.path
+        name = os.path.basename(path)
+        if depth == 0:
+            stat = os.stat(path) if with_stats else None
+            yield TreeEntry(path, name, 0, True, True, stat)
+        else:
+            stats = parent_stats[depth - 1]
+            stat = stats.get(name) if stats is not None else None
+            is_last = name == last_dirs[depth - 1]
+            yield TreeEntry(
+                path, name, depth, True, is_last, stat, truncated=listing.truncated
+            )
+            processed_items += 1
+            pending_dirs -= 1
+        if listing.truncated:
+            continue
+
+        del last_dirs[depth:], parent_stats[depth:]
+        # Symlinked folders are listed but neither followed nor drawn.
+        dirs = listing.descend
+        files = listing.files
+        omitted = listing.omitted
+        files_last = dirs_first and (files or omitted)
+        last_dirs.append(dirs[-1] if dirs and not files_last else None)
+        stats = listing.stats
+        parent_stats.append(stats)
+
+        last = len(files) - 1 if (not dirs or dirs_first) and not omitted else -1
+        child_depth = depth + 1
+        file_entries = _file_entries(path, files, child_depth, last, stats)
+        if omitted:
+            summary = TreeEntry(
+                path, "…", child_depth, False, not dirs or dirs_first, omitted=omitted
+            )
+            file_entries = chain(file_entries, (summary,))
+        if dirs_first and dirs:
+            held = 0
+            if isinstance(files, SortedNames):
+                # Held-back files share one part of the sort budget; past it
+                # they wait on disk.
+                held = files.held_bytes
+                if held_bytes + held > sort_memory:
+                    files.spill()
+                    held = 0
+            held_bytes += held
+            held_files.append((depth, file_entries, held))
+        else:
+            yield from file_entries
+
+        scanned_dirs += 1
+        processed_items += len(files) + omitted
+        seen_items += len(files) + len(dirs) + omitted
+        pending_dirs += len(dirs)
+        if progress_callback:
+            estimated_total = seen_items + max(pending_dirs, 0) * (
+                seen_items / scanned_dirs
+            )
+            progress_callback(processed_items, estimated_total)
+
+    while held_files:
+        yield from held_files.pop()[1]
+    if progress_callback:
+        progress_callback(processed_items, processed_items)
+
+
 def generate_file_hierarchy(
-    start_path, output_file, translations, lang, progress_callback=None
+    start_path,
+    output_file,
+    translations,
+    lang,
+    progress_callback=None,
+    workers=1,
+    buffer_size=DEFAULT_BUFFER_SIZE,
+    use_cache=False,
+    max_depth=None,
+    exclude=(),
+    show_sizes=False,
+    top_folders=0,
+    gitignore=False,
+    max_entries=None,
+    job=None,
+    backend="threads",
+    output_format="txt",
+    compression=None,
+    order=None,
+    stats=None,
+    stats_sidecar=False,
+    sort_memory=None,
+    tmp_dir=None,
+    duplicates=False,
+    hash_processes=None,
 ):
+    """
+    Write the map of ``start_path`` to ``output_file`` and return the number
+    of entries in it. ``output_format`` is a key of ``MAP_WRITERS``: the
+    box-drawing ``txt`` map, ``jsonl``, ``csv`` or the compact ``bin``.
+    ``compression`` (``gz``, ``bz2`` or ``xz``; by default taken from the
+    extension of ``output_file``) compresses the map as it is written, so
+    no uncompressed copy ever reaches the disk. The structured formats
+    record every entry's size and mtime, so their runs stat every entry
+    (taken from the scan itself) and skip the snapshot cache, which holds
+    neither.
+
+    With ``show_sizes`` the tree is first scanned into a ``CompactTree``
+    (one stat per entry, taken from the scan itself) so every folder line
+    can show its total size, file count and newest change; ``top_folders``
+    then lists that many of the largest folders at the end. File sizes
+    aren't part of the snapshot cache, so ``use_cache`` is ignored then.
+
+    ``max_depth`` and ``max_entries`` bound the cost of a preview of a huge
+    tree, and ``order`` sorts every folder; see ``iter_tree``. The snapshot
+    cache has no sizes or times either, so it is also ignored when sorting
+    by size or modification time. ``sort_memory`` bounds the memory used to
+    sort the folders being walked, sorting larger ones on disk in
+    ``tmp_dir``, so sorted maps of huge trees fit on small servers; the
+    cache is skipped then too. The bound doesn't apply with ``show_sizes``,
+    which keeps the whole tree in memory.
+
+    With ``stats``, a ``MappingStats``, the run is instrumented: directory
+    reads, progress callbacks and writes to the map are counted and timed,
+    and the summary is logged at the end; ``stats_sidecar`` also saves it
+    as JSON next to the map (see ``stats_path``). Without it nothing is
+    measured at all.
+
+    With ``duplicates``, the files the map lists are also searched for
+    identical content once the map is written, and the sets found are
+    reported next to it (see ``duplicates_path``); ``hash_processes``
+    worker processes hash the candidates. See ``DuplicateFinder``.
+
+    If ``job`` is cancelled, ``MappingCancelled`` is raised and the partial
+    map is deleted, or closed with a cancellation marker when the job asks
+    to keep it.
+    """
+    cache = None
+    finder = None
+    completed = False
+    partial_kept = False
+    if stats is not None:
+        stats.start()
+        progress_callback = stats.wrap_callback(progress_callback)
     try:
-        total_items = sum(
-            [len(files) + len(dirs) for _, dirs, files in os.walk(start_path)]
+        writer_class = MAP_WRITERS[output_format]
+        with_stats = duplicates or writer_class.with_stats
+        # The cache holds no sizes or times, and its listings are whole lists.
+        cache_usable = (
+            order not in STAT_ORDERS and not (order and sort_memory) and not with_stats
         )
+        if use_cache and not show_sizes and cache_usable:
+            from utils.snapshot_cache import CACHE_FILE_NAME, SnapshotCache
+
+            cache_file = os.path.join(os.path.dirname(output_file), CACHE_FILE_NAME)
+            cache = SnapshotCache(cache_file)
+        if duplicates:
+            from utils.duplicates import DuplicateFinder
+
+            finder = DuplicateFinder(hash_processes, tmp_dir=tmp_dir, job=job)
+        tree = None
+        if show_sizes:
+            from utils.tree_model import CompactTree
 
-        if total_items == 0:
+            entries = iter_tree(
+                start_path,
+                workers,
+                None,
+                max_depth,
+                exclude,
+                with_stats=True,
+                progress_callback=progress_callback,
+                gitignore=gitignore,
+                max_entries=max_entries,
+                job=job,
+                backend=backend,
+                order=order,
+                stats=stats,
+                sort_memory=sort_memory,
+                tmp_dir=tmp_dir,
+            )
+            if finder is not None:
+                entries = finder.collect(entries)
+            head = list(islice(entries, 2))
+            if len(head) == 2:
+                tree = CompactTree.from_entries(chain(head, entries), with_stats=True)
+                tree.aggregate()
+                entries = tree.iter_entries()
+                head = []
+        else:
+            entries = iter_tree(
+                start_path,
+                workers,
+                cache.read_directory if cache else None,
+                max_depth,
+                exclude,
+                with_stats=with_stats,
+                progress_callback=progress_callback,
+                gitignore=gitignore,
+                max_entries=max_entries,
+                job=job,
+                backend=backend,
+                order=order,
+                stats=stats,
+                sort_memory=sort_memory,
+                tmp_dir=tmp_dir,
+            )
+            if finder is not None:
+                entries = finder.collect(entries)
+            head = list(islice(entries, 2))
+        if len(head) < 2 and tree is None:
             raise EmptyFolderError(translations[lang]["empty_folder_error"])
 
-        processed_items = 0
-
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(f"{translations[lang]['folder_map_of']} {start_path}\n")
-            f.write("=" * 50 + "\n")
-            for root, dirs, files in os.walk(start_path):
-                level = root.replace(start_path, "").count(os.sep)
-                indent = "│   " * (level - 1) + "├── " if level > 0 else ""
-                f.write(f"{indent}{os.path.basename(root)}/\n")
-                processed_items += 1
-                if progress_callback:
-                    progress_callback(processed_items / total_items * 100)
-
-                for i, file in enumerate(files):
-                    sub_indent = "│   " * level
-                    if i == len(files) - 1 and len(dirs) == 0:
-                        sub_indent += "└── "
-                    else:
-                        sub_indent += "├── "
-                    f.write(f"{sub_indent}{file}\n")
-                    processed_items += 1
-                    if progress_callback:
-                        progress_callback(processed_items / total_items * 100)
+        if compression is None:
+            compression = compression_for(output_file)
+        with writer_class.open(output_file, buffer_size, compression) as f:
+            stream = stats.wrap_stream(f) if stats is not None else f
+            writer = writer_class(stream, buffer_size, translations[lang])
+            writer.write_header(translations[lang]["folder_map_of"], start_path)
+            try:
+                written = writer.write_entries(chain(head, entries))
+            except MappingCancelled:
+                if job.keep_partial:
+                    writer.write_footer(translations[lang]["map_cancelled"])
+                    writer.close()
+                    partial_kept = True
+                raise
+            if tree is not None and top_folders:
+                writer.write_largest_folders(
+                    (tree.path(i), tree.totals(i))
+                    for i in tree.largest_folders(top_folders)
+                )
+            writer.close()
+
+        completed = True
+        if stats is not None:
+            stats.entries = written - 1
+            stats.bytes_written = os.path.getsize(output_file)
+        if finder is not None:
+            _report_duplicates(finder, start_path, output_file, translations[lang])
+        return written - 1
 
     except EmptyFolderError as e:
         raise
+    except MappingCancelled:
+        # A map already written stays, even if its duplicate search stopped.
+        if not partial_kept and not completed:
+            try:
+                os.remove(output_file)
+            except OSError:
+                pass
+        raise
     except Exception as e:
         raise Exception(f"{translations[lang]['error_generating_map']}: {str(e)}")
+    finally:
+        if cache:
+            cache.close(start_path if completed else None)
+        if finder is not None:
+            finder.close()
+        if stats is not None:
+            _report_stats(stats, start_path, output_file, completed, stats_sidecar)
+
+
+def _report_duplicates(finder, start_path, output_file, labels):
+    from utils.duplicates import duplicates_path, format_summary
+
+    report_file = duplicates_path(output_file)
+    try:
+        summary = finder.write_report(report_file, start_path, labels)
+    except MappingCancelled:
+        try:
+            os.remove(report_file)
+        except OSError:
+            pass
+        raise
+    logging.info(f"Duplicates in {start_path}: {format_summary(summary, labels)}")
+
+
+def _report_stats(stats, start_path, output_file, completed, sidecar):
+    stats.stop("completed" if completed else "stopped")
+    stats.log(f"Mapping statistics: {start_path} -> {output_file}")
+    if sidecar and completed:
+        try:
+            stats.save(stats_path(output_file))
+        except OSError as e:
+            logging.error(f"Error saving mapping statistics: {e}")
 
 
 def generate_file_hierarchy_threaded(
@@ -57,17 +827,26 @@ def generate_file_hierarchy_threaded(
     lang,
     progress_callback=None,
     completion_callback=None,
+    **options,
 ):
     def target():
         try:
             generate_file_hierarchy(
-                start_path, output_file, translations, lang, progress_callback
+                start_path,
+                output_file,
+                translations,
+                lang,
+                progress_callback,
+                **options,
             )
             if completion_callback:
                 completion_callback(True, None)
         except EmptyFolderError as e:
             if completion_callback:
                 completion_callback(False, str(e))
+        except MappingCancelled:
+            if completion_callback:
+                completion_callback(False, translations[lang]["map_cancelled"])
         except Exception as e:
             if completion_callback:
                 completion_callback(
@@ -0,0 +1,182 @@
+import json
+import logging
+import threading
+from bisect import bisect_right
+from time import perf_counter
+
+from utils.writers import map_stem
+
+# Upper bounds, in microseconds, of the directory read latency buckets; a
+# last bucket holds everything slower.
+LATENCY_BOUNDS_US = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def stats_path(output_file):
+    """Sidecar of a map: ``a.b_map_1.txt.gz`` -> ``a.b_map_1_stats.json``."""
+    return map_stem(output_file) + "_stats.json"
+
+
+def _latency_label(index):
+    if index == len(LATENCY_BOUNDS_US):
+        return f">= {_format_us(LATENCY_BOUNDS_US[-1])}"
+    return f"< {_format_us(LATENCY_BOUNDS_US[index])}"
+
+
+def _format_us(us):
+    if us >= 1_000_000:
+        return f"{us // 1_000_000} s"
+    if us >= 1_000:
+        return f"{us // 1_000} ms"
+    return f"{us} us"
+
+
+class MappingStats:
+    """
+    Counters and timers of one mapping run.
+
+    Nothing is measured unless a ``MappingStats`` is handed to
+    ``generate_file_hierarchy``: it then wraps the directory reader, the
+    progress callback and the output stream with the timed versions below,
+    so an uninstrumented run executes exactly the code it did before.
+
+    Directory reads may run on several threads at once, so their counters
+    are updated under a lock and ``read_time`` is summed over all threads;
+    with concurrent readers it can exceed the run's wall time.
+    """
+
+    def __init__(self):
+        self.directories = 0
+        self.entries_read = 0
+        self.read_time = 0.0
+        self.latency_counts = [0] * (len(LATENCY_BOUNDS_US) + 1)
+        self.writes = 0
+        self.write_time = 0.0
+        self.bytes_written = 0
+        self.callbacks = 0
+        self.callback_time = 0.0
+        self.entries = 0
+        self.elapsed = 0.0
+        self.outcome = None
+        self._start = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._start = perf_counter()
+
+    def stop(self, outcome):
+        self.elapsed = perf_counter() - self._start
+        self.outcome = outcome
+
+    def wrap_reader(self, reader):
+        """Time every call of the directory ``reader`` and count its entries."""
+        lock = self._lock
+        counts = self.latency_counts
+
+        def read(path):
+            start = perf_counter()
+            result = reader(path)
+            elapsed = perf_counter() - start
+            bucket = bisect_right(LATENCY_BOUNDS_US, elapsed * 1e6)
+            with lock:
+                self.read_time += elapsed
+                counts[bucket] += 1
+                if result is not None:
+                    self.directories += 1
+                    self.entries_read += len(result[0]) + len(result[1])
+                    if len(result) > 4:
+                        self.entries_read += result[4]
+            return result
+
+        return read
+
+    def wrap_callback(self, callback):
+        """Time the progress ``callback``; ``None`` stays ``None``."""
+        if callback is None:
+            return None
+
+        def timed(*args):
+            start = perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                self.callback_time += perf_counter() - start
+                self.callbacks += 1
+
+        return timed
+
+    def wrap_stream(self, stream):
+        return _TimedStream(stream, self)
+
+    def as_dict(self):
+        elapsed = self.elapsed or 1e-9
+        accounted = self.read_time + self.write_time + self.callback_time
+        return {
+            "outcome": self.outcome,
+            "elapsed_s": round(self.elapsed, 6),
+            "entries": self.entries,
+            "entries_per_s": round(self.entries / elapsed, 1),
+            "directories": self.directories,
+            "entries_read": self.entries_read,
+            "read_s": round(self.read_time, 6),
+            "read_latency": {
+                _latency_label(i): count for i, count in enumerate(self.latency_counts)
+            },
+            "writes": self.writes,
+            "write_s": round(self.write_time, 6),
+            "bytes_written": self.bytes_written,
+            "callbacks": self.callbacks,
+            "callback_s": round(self.callback_time, 6),
+            "other_s": round(max(self.elapsed - accounted, 0.0), 6),
+        }
+
+    def summary(self, title):
+        return format_summary(title, self.as_dict())
+
+    def log(self, title):
+        logging.info(self.summary(title))
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write("\n")
+
+
+class _TimedStream:
+    """Output stream proxy timing the writers' (large, buffered) writes."""
+
+    __slots__ = ("_stream", "_stats")
+
+    def __init__(self, stream, stats):
+        self._stream = stream
+        self._stats = stats
+
+    def write(self, data):
+        start = perf_counter()
+        result = self._stream.write(data)
+        self._stats.write_time += perf_counter() - start
+        self._stats.writes += 1
+        return result
+
+
+def format_summary(title, stats):
+    """The log block of a ``MappingStats.as_dict()``."""
+    directories = stats["directories"]
+    mean_read = stats["read_s"] / directories * 1000 if directories else 0.0
+    lines = [
+        f"{title} ({stats['outcome']})",
+        f"  entries in map      {stats['entries']:,}"
+        f" ({stats['entries_per_s']:,.0f}/s)",
+        f"  wall time           {stats['elapsed_s']:.3f} s",
+        f"  reading folders     {stats['read_s']:.3f} s: {directories:,} folders,"
+        f" {stats['entries_read']:,} entries, {mean_read:.3f} ms each",
+        f"  writing the map     {stats['write_s']:.3f} s: {stats['writes']:,}"
+        f" writes, {stats['bytes_written']:,} bytes on disk",
+        f"  progress callbacks  {stats['callback_s']:.3f} s:"
+        f" {stats['callbacks']:,} calls",
+        f"  everything else     {stats['other_s']:.3f} s"
+        " (walking, filtering, sorting, formatting)",
+        "  folder read latency",
+    ]
+    for label, count in stats["read_latency"].items():
+        lines.append(f"    {label:<10} {count:>12,}")
+    return "\n".join(lines)
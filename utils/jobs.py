@@ -0,0 +1,48 @@
+import threading
+
+
+class MappingCancelled(Exception):
+    """Raised inside a mapping run whose ``MappingJob`` was cancelled."""
+
+    pass
+
+
+class MappingJob:
+    """
+    Control handle for one mapping run: cancel it, or pause and resume it.
+
+    The run calls ``checkpoint`` between directories. While the job is
+    running that is a single ``Event.is_set`` call; when paused it blocks
+    until resumed, and once cancelled it raises ``MappingCancelled`` so the
+    run unwinds and cleans up. With ``keep_partial`` a cancelled map keeps
+    what was written so far, ending with a cancellation marker, instead of
+    being deleted.
+    """
+
+    def __init__(self, keep_partial=False):
+        self.keep_partial = keep_partial
+        self.cancelled = False
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set() and not self.cancelled
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self.cancelled = True
+        # Wake a paused run so it notices the cancellation.
+        self._running.set()
+
+    def checkpoint(self):
+        if not self._running.is_set():
+            self._running.wait()
+        if self.cancelled:
+            raise MappingCancelled()
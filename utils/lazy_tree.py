@@ -0,0 +1,159 @@
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.file_operations import TreeEntry, read_directory
+
+DEFAULT_CACHE_SIZE = 2048
+
+
+class DirectoryCache:
+    """
+    The ``capacity`` most recently used directory listings, by path.
+
+    Only touched from the Tk thread, so it needs no locking.
+    """
+
+    def __init__(self, capacity=DEFAULT_CACHE_SIZE):
+        self.capacity = capacity
+        self._listings = OrderedDict()
+
+    def __len__(self):
+        return len(self._listings)
+
+    def __contains__(self, path):
+        return path in self._listings
+
+    def get(self, path):
+        listing = self._listings.get(path)
+        if listing is not None:
+            self._listings.move_to_end(path)
+        return listing
+
+    def put(self, path, listing):
+        self._listings[path] = listing
+        self._listings.move_to_end(path)
+        while len(self._listings) > self.capacity:
+            self._listings.popitem(last=False)
+
+    def discard(self, path):
+        self._listings.pop(path, None)
+
+
+class DirectoryLoader:
+    """
+    Read directories on demand for an interactive browser.
+
+    ``request`` hands a path to a small thread pool and returns at once;
+    results go through a queue that ``start_polling`` drains on the Tk
+    thread, where they land in ``cache`` before ``on_loaded(path, result)``
+    is called. ``result`` is what ``reader`` returned, ``None`` for a
+    directory that can't be read. A path already cached is answered from
+    the cache, and one already being read is not read twice.
+    """
+
+    def __init__(self, reader=None, cache=None, workers=4, interval_ms=30):
+        self.reader = reader or read_directory
+        self.cache = cache if cache is not None else DirectoryCache()
+        self.interval_ms = interval_ms
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="folder-mapper-browse"
+        )
+        self._results = queue.SimpleQueue()
+        self._pending = set()
+        self._closed = False
+
+    # ===== Tk side =====
+
+    def request(self, path, force=False):
+        """
+        Load ``path`` in the background; ``force`` re-reads it even if cached.
+        Returns the listing at once when it is cached, else ``None``.
+        """
+        if force:
+            self.cache.discard(path)
+        else:
+            listing = self.cache.get(path)
+            if listing is not None:
+                return listing
+        if path not in self._pending:
+            self._pending.add(path)
+            self._executor.submit(self._read, path)
+        return None
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def start_polling(self, widget, on_loaded):
+        """Deliver results on ``widget``'s event loop until ``close``."""
+
+        def poll():
+            if self._closed:
+                return
+            while True:
+                try:
+                    path, result = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._pending.discard(path)
+                if result is not None:
+                    self.cache.put(path, result)
+                on_loaded(path, result)
+            widget.after(self.interval_ms, poll)
+
+        widget.after(self.interval_ms, poll)
+
+    def close(self):
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ===== Worker side =====
+
+    def _read(self, path):
+        try:
+            result = self.reader(path)
+        except Exception:
+            result = None
+        self._results.put((path, result))
+
+
+def iter_expanded(start_path, listing_of):
+    """
+    Yield ``TreeEntry`` records, in map order, for the part of the tree a
+    browser has expanded. ``listing_of(path)`` returns the ``(dirs, files,
+    omitted)`` shown for an expanded folder and ``None`` for a collapsed
+    one, which is written like a folder at the depth limit.
+    """
+    yield TreeEntry(start_path, os.path.basename(start_path), 0, True, True)
+    listing = listing_of(start_path)
+    if listing is None:
+        return
+    # Folders still to write: (path, depth, is_last), next one last.
+    stack = []
+
+    def push_children(path, depth, listing):
+        dirs, files, omitted = listing
+        last = len(files) - 1 if not dirs and not omitted else -1
+        for i, name in enumerate(files):
+            yield TreeEntry(os.path.join(path, name), name, depth, False, i == last)
+        if omitted:
+            yield TreeEntry(path, "…", depth, False, not dirs, omitted=omitted)
+        for i, name in reversed(list(enumerate(dirs))):
+            stack.append((os.path.join(path, name), depth, i == len(dirs) - 1))
+
+    yield from push_children(start_path, 1, listing)
+    while stack:
+        path, depth, is_last = stack.pop()
+        listing = listing_of(path)
+        yield TreeEntry(
+            path,
+            os.path.basename(path),
+            depth,
+            True,
+            is_last,
+            truncated=listing is None,
+        )
+        if listing is not None:
+            yield from push_children(path, depth + 1, listing)
@@ -0,0 +1,171 @@
+import mmap
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+CHUNK_SIZE = 1 << 20
+CACHED_CHUNKS = 8
+
+
+class LineIndex:
+    """
+    Random access to the lines of a large text file through ``mmap``.
+
+    Indexing is one pass that counts newlines chunk by chunk (``bytes.count``
+    runs in C), recording only where each ~``chunk_size`` chunk starts and
+    which line it starts with: a few KB of index for a multi-GB map. A line
+    is then found by bisecting the chunks and splitting a single chunk, whose
+    line offsets are cached for the next lookups nearby.
+
+    With ``build=False`` the index starts empty and grows with each call to
+    ``index_more``, so a viewer can show the first lines at once and index
+    the rest between events; until ``complete``, ``line_count`` only covers
+    the part indexed so far.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, build=True):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._file = open(path, "rb")
+        self.size = self._file.seek(0, 2)
+        # mmap can't map an empty file.
+        self.data = b""
+        if self.size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.chunk_starts = array("q")
+        self.chunk_lines = array("q")
+        self.line_count = 0
+        self.indexed = 0
+        self.complete = False
+        self._cache = {}
+        if build:
+            self.index_more()
+
+    def __len__(self):
+        return self.line_count
+
+    def index_more(self, max_chunks=None):
+        """Index ``max_chunks`` more chunks (all by default); ``True`` once done."""
+        data = self.data
+        size = self.size
+        start = self.indexed
+        lines = self.line_count
+        chunks = 0
+        while start < size and (max_chunks is None or chunks < max_chunks):
+            end = data.find(b"\n", min(start + self.chunk_size, size) - 1)
+            end = size if end == -1 else end + 1
+            self.chunk_starts.append(start)
+            self.chunk_lines.append(lines)
+            lines += data[start:end].count(b"\n")
+            start = end
+            chunks += 1
+        self.indexed = start
+        if start >= size and not self.complete:
+            if size and data[size - 1 : size] != b"\n":
+                lines += 1
+            self.complete = True
+        self.line_count = lines
+        return self.complete
+
+    def _chunk_offsets(self, chunk):
+        """Start offsets of the lines of ``chunk``, cached."""
+        offsets = self._cache.get(chunk)
+        if offsets is None:
+            start = self.chunk_starts[chunk]
+            end = (
+                self.chunk_starts[chunk + 1]
+                if chunk + 1 < len(self.chunk_starts)
+                else self.indexed
+            )
+            lines = self.data[start:end].split(b"\n")[:-1]
+            offsets = array(
+                "q", accumulate((len(line) + 1 for line in lines), initial=start)
+            )
+            if len(self._cache) >= CACHED_CHUNKS:
+                del self._cache[next(iter(self._cache))]
+            self._cache[chunk] = offsets
+        return offsets
+
+    def offset(self, line):
+        """Byte offset where ``line`` (0-based) starts."""
+        chunk = bisect_right(self.chunk_lines, line) - 1
+        return self._chunk_offsets(chunk)[line - self.chunk_lines[chunk]]
+
+    def line_at(self, offset):
+        """Number of the line holding byte ``offset``."""
+        chunk = bisect_right(self.chunk_starts, offset) - 1
+        start = self.chunk_starts[chunk]
+        return self.chunk_lines[chunk] + self.data[start:offset].count(b"\n")
+
+    def lines(self, first, count):
+        """Decoded text of ``count`` lines from ``first`` on."""
+        if first >= self.line_count or count <= 0:
+            return []
+        start = self.offset(first)
+        last = min(first + count, self.line_count)
+        end = self.offset(last) if last < self.line_count else self.indexed
+        text = self.data[start:end].decode("utf-8", "replace")
+        return [line.rstrip("\r") for line in text.split("\n")[: last - first]]
+
+    def _find(self, needle, start, end, ignore_case, backwards):
+        """Offset of ``needle`` within ``[start, end)``, or -1."""
+        data = self.data
+        if not ignore_case:
+            # mmap's own find/rfind scan the mapping without copying it.
+            if backwards:
+                return data.rfind(needle, start, end)
+            return data.find(needle, start, end)
+        # Lower-case one chunk at a time; the overlap catches matches that
+        # straddle two chunks.
+        needle = needle.lower()
+        overlap = len(needle) - 1
+        if backwards:
+            window_end = end
+            while window_end > start:
+                window_start = max(start, window_end - CHUNK_SIZE)
+                window = data[window_start : min(end, window_end + overlap)]
+                found = window.lower().rfind(needle)
+                if found != -1:
+                    return window_start + found
+                window_end = window_start
+        else:
+            window_start = start
+            while window_start < end:
+                window_end = min(end, window_start + CHUNK_SIZE + overlap)
+                found = data[window_start:window_end].lower().find(needle)
+                if found != -1:
+                    return window_start + found
+                window_start += CHUNK_SIZE
+        return -1
+
+    def search(self, text, start_line=0, ignore_case=False, backwards=False):
+        """
+        Line number of the next line containing ``text`` after
+        ``start_line`` (before it with ``backwards``), wrapping around the
+        end of the file; ``None`` if there is none. ``ignore_case`` only
+        folds ASCII letters. Searches the whole file, so it finishes the
+        index first.
+        """
+        self.index_more()
+        if not text or not self.size:
+            return None
+        needle = text.encode("utf-8")
+        if backwards:
+            split = self.offset(min(start_line, self.line_count - 1))
+            ranges = ((0, split), (split, self.size))
+        else:
+            split = 0
+            if start_line + 1 < self.line_count:
+                split = self.offset(start_line + 1)
+            ranges = ((split, self.size), (0, split))
+        for start, end in ranges:
+            found = self._find(needle, start, end, ignore_case, backwards)
+            if found != -1:
+                return self.line_at(found)
+        return None
+
+    def close(self):
+        self._cache.clear()
+        if self.size:
+            self.data.close()
+        self._file.close()
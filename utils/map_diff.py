@@ -0,0 +1,441 @@
+import csv
+import importlib
+import json
+import mmap
+import re
+import shutil
+import tempfile
+from operator import itemgetter
+
+from utils.external_sort import DEFAULT_RUN_SIZE, ExternalSorter
+from utils.writers import (
+    BINARY_MAGIC,
+    COMPRESSIONS,
+    CSV_COLUMNS,
+    DEFAULT_BUFFER_SIZE,
+    KIND_DIR,
+    KIND_FILE,
+    KIND_TRUNCATED,
+    MAP_WRITERS,
+    ROOT_LENGTH,
+    TYPE_DIR,
+    TYPE_FILE,
+    TYPE_MAP,
+    compression_for,
+    iter_binary_map,
+    map_stem,
+)
+
+ADDED = "+"
+REMOVED = "-"
+MODIFIED = "~"
+
+# Path separator inside sort keys: below any character of a name, so every
+# folder sorts right before its own content and the sorted stream is a
+# pre-order walk.
+KEY_SEPARATOR = "\0"
+
+# Fields of the structured formats compared to tell a modified entry.
+SIGNATURE_FIELDS = ("size", "mtime", "total_size", "file_count", "newest_mtime")
+
+_TOTALS = re.compile(r"(.*)/  \[(.*)\]")
+# Inside the brackets: "<size>, <file count> <files label>, <newest change>".
+_TOTALS_FIELDS = re.compile(r"(.+?), ([\d,]+) [^,]+, ([^,]+)")
+
+
+class TextTotals(tuple):
+    """
+    Totals of a folder in a text map, ``(size, file count, newest change)``
+    with size and time as the map wrote them: parsed rather than kept as
+    text, so maps written in different languages compare equal.
+    """
+
+    __slots__ = ()
+
+
+def map_format(path):
+    """The ``MAP_WRITERS`` key of a map file, from its extension."""
+    compression = compression_for(path)
+    if compression:
+        path = path[: -len(compression) - 1]
+    for output_format, writer_class in MAP_WRITERS.items():
+        if path.endswith(writer_class.extension):
+            return output_format
+    raise ValueError(f"not a map file: {path}")
+
+
+def diff_report_path(new_map):
+    """Default report of a diff: ``a.b_map_1.txt.gz`` -> ``a.b_map_1_diff.txt``."""
+    return map_stem(new_map) + "_diff.txt"
+
+
+def _open(path, binary, newline=None):
+    compression = compression_for(path)
+    if compression:
+        module = importlib.import_module(COMPRESSIONS[compression][0])
+        if binary:
+            return module.open(path, "rb")
+        return module.open(path, "rt", encoding="utf-8", newline=newline)
+    if binary:
+        return open(path, "rb")
+    return open(path, encoding="utf-8", newline=newline, buffering=DEFAULT_BUFFER_SIZE)
+
+
+def _signature(values):
+    return values if any(value is not None for value in values) else None
+
+
+def _key(path):
+    return path.replace("/", KEY_SEPARATOR)
+
+
+def _summary_pattern(translations):
+    """Regex matching the "… and N more" line of any language."""
+    labels = {
+        re.escape(labels["more_entries"]).replace(r"\{count:,\}", r"[\d,.]+")
+        for labels in translations.values()
+        if "more_entries" in labels
+    }
+    labels.add(r"… and [\d,.]+ more")
+    return re.compile("|".join(sorted(labels)))
+
+
+def _read_text(f, translations):
+    header = f.readline().rstrip("\n")
+    root = header
+    for labels in translations.values():
+        title = labels.get("folder_map_of", "") + " "
+        if header.startswith(title):
+            root = header[len(title) :]
+    f.readline()
+    return root, _iter_text(f, _summary_pattern(translations))
+
+
+def _iter_text(f, summary):
+    with f:
+        yield from _parse_text(f, summary)
+
+
+def _parse_text(f, summary):
+    # Every line but the root's is an indent of "│   "/"    " groups and a
+    # "├── "/"└── " branch, so the first "── " ends the prefix.
+    folders = [""]
+    next(f, None)
+    for line in f:
+        line = line.rstrip("\n")
+        # A blank line starts the largest folders or the footer.
+        if not line:
+            return
+        i = line.find("── ") + 3
+        depth = i // 4
+        text = line[i:]
+        parent = folders[depth - 1]
+        signature = None
+        if text[-1] == "/":
+            name = text[:-1]
+        elif text[-1] == "]" and (match := _TOTALS.fullmatch(text)):
+            name, totals = match.groups()
+            signature = _text_totals(totals)
+        elif text[0] == "…" and summary.fullmatch(text):
+            continue
+        else:
+            path = f"{parent}/{text}" if parent else text
+            yield path.replace("/", KEY_SEPARATOR), False, None
+            continue
+        path = f"{parent}/{name}" if parent else name
+        del folders[depth:]
+        folders.append(path)
+        yield path.replace("/", KEY_SEPARATOR), True, signature
+
+
+def _text_totals(totals):
+    fields = _TOTALS_FIELDS.fullmatch(totals)
+    if fields is None:
+        return totals
+    size, files, newest = fields.groups()
+    return TextTotals((size, int(files.replace(",", "")), newest))
+
+
+def _read_jsonl(f):
+    first = json.loads(f.readline() or "{}")
+    root = first.get("root", "") if first.get("type") == TYPE_MAP else ""
+    return root, _iter_jsonl(f)
+
+
+def _iter_jsonl(f):
+    loads = json.loads
+    with f:
+        for line in f:
+            record = loads(line)
+            kind = record["type"]
+            if kind in (TYPE_DIR, TYPE_FILE) and record["depth"]:
+                signature = _signature(tuple(map(record.get, SIGNATURE_FIELDS)))
+                yield _key(record["path"]), kind == TYPE_DIR, signature
+
+
+def _read_csv(f):
+    rows = csv.reader(f)
+    next(rows, None)
+    first = next(rows, [])
+    root = first[1] if first[:1] == [TYPE_MAP] else ""
+    return root, _iter_csv(f, rows)
+
+
+def _iter_csv(f, rows):
+    column = CSV_COLUMNS.index
+    kind_, path_, depth_ = column("type"), column("path"), column("depth")
+    fields = [column(name) for name in SIGNATURE_FIELDS]
+    with f:
+        for row in rows:
+            kind = row[kind_]
+            if kind in (TYPE_DIR, TYPE_FILE) and row[depth_] != "0":
+                signature = _signature(tuple(row[i] or None for i in fields))
+                yield _key(row[path_]), kind == TYPE_DIR, signature
+
+
+def _read_binary(path):
+    if compression_for(path):
+        # mmap needs a real file: inflate the map into a temporary one.
+        f = tempfile.TemporaryFile()
+        with _open(path, True) as compressed:
+            shutil.copyfileobj(compressed, f, DEFAULT_BUFFER_SIZE)
+    else:
+        f = open(path, "rb")
+    f.seek(0, 2)
+    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if f.tell() else b""
+    if data[: len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise ValueError("not a Folder Mapper binary map")
+    offset = len(BINARY_MAGIC)
+    (root_length,) = ROOT_LENGTH.unpack_from(data, offset)
+    offset += ROOT_LENGTH.size
+    root = data[offset : offset + root_length].decode("utf-8", "surrogateescape")
+    return root, _iter_binary(f, data)
+
+
+def _iter_binary(f, data):
+    try:
+        for kind, depth, name, path, stat, totals, omitted in iter_binary_map(data):
+            if kind in (KIND_DIR, KIND_TRUNCATED, KIND_FILE) and depth:
+                signature = _signature((stat or (None, None)) + (totals or ()))
+                yield _key(path), kind != KIND_FILE, signature
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+        f.close()
+
+
+def read_map(path, translations):
+    """
+    Open a map of any format, compressed or not, for diffing.
+
+    Returns ``(root, records)``: the folder the map was made of, and a
+    stream of ``(key, is_dir, signature)`` tuples in map order, one per
+    file and folder below the root. ``key`` is the relative path with
+    ``KEY_SEPARATOR`` between names; ``signature`` holds whatever the map
+    recorded about the entry (sizes, times, folder totals) or is ``None``.
+    ``translations`` is needed to read back the text maps of every language.
+    """
+    output_format = map_format(path)
+    if output_format == "bin":
+        return _read_binary(path)
+    if output_format == "csv":
+        return _read_csv(_open(path, False, newline=""))
+    f = _open(path, False)
+    if output_format == "jsonl":
+        return _read_jsonl(f)
+    return _read_text(f, translations)
+
+
+def sorted_records(records, run_size=DEFAULT_RUN_SIZE, tmp_dir=None):
+    """``read_map`` records sorted by key, spilling to disk past ``run_size``."""
+    sorter = ExternalSorter(itemgetter(0), run_size, tmp_dir)
+    sorter.extend(records)
+    return iter(sorter)
+
+
+def iter_changes(old, new):
+    """
+    Merge two key-sorted record streams into ``(status, key, is_dir,
+    old_signature, new_signature)`` for every entry that was added, removed
+    or modified. An entry is modified when it changed between file and
+    folder, or when both maps recorded a signature of the same kind and
+    they differ.
+    """
+    old_record = next(old, None)
+    new_record = next(new, None)
+    while old_record is not None or new_record is not None:
+        if new_record is None or (
+            old_record is not None and old_record[0] < new_record[0]
+        ):
+            key, is_dir, signature = old_record
+            yield REMOVED, key, is_dir, signature, None
+            old_record = next(old, None)
+        elif old_record is None or new_record[0] < old_record[0]:
+            key, is_dir, signature = new_record
+            yield ADDED, key, is_dir, None, signature
+            new_record = next(new, None)
+        else:
+            key, old_dir, old_signature = old_record
+            _, new_dir, new_signature = new_record
+            # Text maps record formatted totals, the other formats numbers:
+            # only signatures of the same kind can be compared.
+            if old_dir != new_dir or (
+                type(old_signature) is type(new_signature)
+                and old_signature is not None
+                and old_signature != new_signature
+            ):
+                yield MODIFIED, key, new_dir, old_signature, new_signature
+            old_record = next(old, None)
+            new_record = next(new, None)
+
+
+class DiffSummary:
+    """Counts of a diff; ``folders`` is how many folders had changes below."""
+
+    __slots__ = ("added", "removed", "modified", "folders")
+
+    def __init__(self, added=0, removed=0, modified=0, folders=0):
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+        self.folders = folders
+
+    @property
+    def changes(self):
+        return self.added + self.removed + self.modified
+
+
+class FolderRollups:
+    """
+    Roll the changes of a key-sorted diff up into per-folder counts.
+
+    ``add`` is called with each change in order; every folder with changes
+    anywhere below it is handed to ``sink.add`` as ``(key, added, removed,
+    modified)`` once the diff has moved past its subtree. Only the chain of
+    folders above the current change is held in memory.
+    """
+
+    _SLOTS = {ADDED: 1, REMOVED: 2, MODIFIED: 3}
+
+    def __init__(self, sink):
+        self.sink = sink
+        # [key, added, removed, modified] of the folders above the last change.
+        self._stack = [["", 0, 0, 0]]
+
+    def _pop(self):
+        folder = self._stack.pop()
+        top = self._stack[-1]
+        for i in (1, 2, 3):
+            top[i] += folder[i]
+        self.sink.add(tuple(folder))
+
+    def add(self, status, key):
+        stack = self._stack
+        parent = key.rpartition(KEY_SEPARATOR)[0]
+        while len(stack) > 1 and not (
+            parent == stack[-1][0] or parent.startswith(stack[-1][0] + KEY_SEPARATOR)
+        ):
+            self._pop()
+        top = stack[-1][0]
+        if parent != top:
+            rest = parent[len(top) + 1 :] if top else parent
+            for name in rest.split(KEY_SEPARATOR):
+                top = f"{top}{KEY_SEPARATOR}{name}" if top else name
+                stack.append([top, 0, 0, 0])
+        stack[-1][self._SLOTS[status]] += 1
+
+    def finish(self):
+        """Flush the remaining folders; return the counts of the whole diff."""
+        while len(self._stack) > 1:
+            self._pop()
+        return DiffSummary(*self._stack[0][1:])
+
+
+def _describe(signature, labels):
+    if isinstance(signature, TextTotals):
+        size, files, newest = signature
+        return f"{size}, {files:,} {labels.get('files', 'files')}, {newest}"
+    if isinstance(signature, tuple):
+        return ", ".join(str(value) for value in signature if value is not None)
+    return signature or ""
+
+
+def diff_maps(
+    old_map,
+    new_map,
+    output_file,
+    translations,
+    lang,
+    run_size=DEFAULT_RUN_SIZE,
+    rollup_depth=None,
+    tmp_dir=None,
+):
+    """
+    Compare two maps of the same folder and write what changed to
+    ``output_file``; return a ``DiffSummary``.
+
+    Both maps are streamed through ``ExternalSorter`` into path order and
+    merged, so no more than about ``run_size`` entries of each are ever in
+    memory, however large the maps. The report lists every added (+),
+    removed (-) and modified (~) entry, then the counts of every folder
+    with changes below it, down to ``rollup_depth`` levels when given.
+    Modified entries can only be told from unchanged ones when the maps
+    record sizes or times (folder totals, or the structured formats).
+    """
+    labels = translations[lang]
+    old_root, old_records = read_map(old_map, translations)
+    new_root, new_records = read_map(new_map, translations)
+    rollups = ExternalSorter(itemgetter(0), run_size, tmp_dir)
+    changes = iter_changes(
+        sorted_records(old_records, run_size, tmp_dir),
+        sorted_records(new_records, run_size, tmp_dir),
+    )
+    try:
+        with open(
+            output_file, "w", encoding="utf-8", buffering=DEFAULT_BUFFER_SIZE
+        ) as f:
+            f.write(
+                f"{labels['map_diff']} {old_map} ({old_root})\n"
+                f"→ {new_map} ({new_root})\n" + "=" * 50 + "\n"
+            )
+            lines = []
+            tracker = FolderRollups(rollups)
+            for status, key, is_dir, old, new in changes:
+                tracker.add(status, key)
+                line = f"{status} {key.replace(KEY_SEPARATOR, '/')}"
+                if is_dir:
+                    line += "/"
+                if status == MODIFIED and (old or new):
+                    line += (
+                        f"  [{_describe(old, labels)} → {_describe(new, labels)}]"
+                    )
+                lines.append(line + "\n")
+                if len(lines) >= 10_000:
+                    f.write("".join(lines))
+                    lines.clear()
+            f.write("".join(lines))
+            summary = tracker.finish()
+
+            counts = labels["diff_summary"].format(
+                added=summary.added, removed=summary.removed, modified=summary.modified
+            )
+            f.write(f"\n{counts}\n")
+            f.write(f"\n{labels['changed_folders']}\n" + "=" * 50 + "\n")
+            lines.clear()
+            for key, added, removed, modified in rollups:
+                depth = key.count(KEY_SEPARATOR) + 1
+                if rollup_depth is not None and depth > rollup_depth:
+                    continue
+                summary.folders += 1
+                lines.append(
+                    f"+{added:<7,} -{removed:<7,} ~{modified:<7,}"
+                    f" {key.replace(KEY_SEPARATOR, '/')}/\n"
+                )
+                if len(lines) >= 10_000:
+                    f.write("".join(lines))
+                    lines.clear()
+            f.write("".join(lines))
+    finally:
+        rollups.close()
+    return summary
+
@@ -0,0 +1,257 @@
+import os
+import re
+from functools import lru_cache
+from itertools import islice
+
+from utils.external_sort import ExternalSorter
+
+NAME = "name"
+NATURAL = "natural"
+SIZE = "size"
+MTIME = "mtime"
+DIRS_FIRST = "dirs-first"
+
+# Orders a map can be drawn in; ``None`` keeps the filesystem's own order.
+SORT_ORDERS = (NAME, NATURAL, SIZE, MTIME, DIRS_FIRST)
+# Orders that need every entry's stat result.
+STAT_ORDERS = (SIZE, MTIME)
+
+_DIGITS = re.compile(r"[0-9]+")
+# Numbers up to this many digits compare by value in the natural order.
+NUMBER_WIDTH = 20
+# Rough memory held per file by an external sort: the record tuple, its key
+# string and list slot, plus RECORD_CHAR_BYTES per character of the name.
+RECORD_BYTES = 200
+RECORD_CHAR_BYTES = 4
+# Extra memory of a record that also carries the file's stat result.
+STAT_RECORD_BYTES = 650
+
+
+def _pad(match):
+    return match[0].zfill(NUMBER_WIDTH)
+
+
+@lru_cache(maxsize=1 << 16)
+def natural_key(name):
+    """
+    Order ``file2`` before ``file10``: the case-folded name with every run
+    of digits zero-padded to ``NUMBER_WIDTH``, so plain string comparison
+    (in C) orders numbers by value. Cached, since the same names
+    (``index.js``, ``IMG_0001.jpg``…) recur all over a tree.
+    """
+    return _DIGITS.sub(_pad, name.casefold())
+
+
+def _sort_names(names, order, stats):
+    # Every key is a single string or number compared in C. The sorts are
+    # stable, so sorting by the exact name first settles the ties of the
+    # case-insensitive sort, which in turn settles those of size and time.
+    names = sorted(names)
+    names.sort(key=natural_key if order == NATURAL else str.casefold)
+    if order in STAT_ORDERS and stats is not None:
+        # Largest or newest first; entries without a stat go last.
+        field = "st_size" if order == SIZE else "st_mtime"
+        get = stats.get
+
+        def key(name):
+            stat = get(name)
+            return -getattr(stat, field) if stat is not None else 0
+
+        names.sort(key=key)
+    return names
+
+
+def sorting_reader(reader, order, keep_stats=True):
+    """
+    Wrap ``reader`` so every listing comes back in ``order`` (one of
+    ``SORT_ORDERS``). Sizes and times come from the stats ``reader``
+    collected, which are dropped again unless ``keep_stats``. Folders are
+    sorted by name in the ``size`` order, since their own size says nothing
+    about their content; in the ``mtime`` order they are newest first too.
+    """
+
+    def read(path):
+        result = reader(path)
+        if result is None:
+            return None
+        dirs, files, descend = result[:3]
+        stats = result[3] if len(result) > 3 else None
+        dir_order = NAME if order in (SIZE, DIRS_FIRST) else order
+        file_order = NAME if order == DIRS_FIRST else order
+        sorted_dirs = _sort_names(dirs, dir_order, stats)
+        if descend is dirs:
+            descend = sorted_dirs
+        else:
+            followed = set(descend)
+            descend = [name for name in sorted_dirs if name in followed]
+        files = _sort_names(files, file_order, stats)
+        rest = result[3:]
+        if not keep_stats and rest:
+            rest = (None,) + rest[1:] if len(rest) > 1 else ()
+        return (sorted_dirs, files, descend) + rest
+
+    return read
+
+
+def sort_record(order):
+    """
+    ``record(name, stat)``: a tuple per file that sorts, compared as is,
+    exactly like ``_sort_names`` sorts the names, with the name last. Used
+    where names are sorted on disk and a key function can't be applied.
+    """
+    if order == NATURAL:
+        return lambda name, stat: (natural_key(name), name)
+    if order in STAT_ORDERS:
+        field = "st_size" if order == SIZE else "st_mtime"
+
+        def record(name, stat):
+            value = -getattr(stat, field) if stat is not None else 0
+            return (value, name.casefold(), name)
+
+        return record
+    return lambda name, stat: (name.casefold(), name)
+
+
+def _record_size(record):
+    return RECORD_BYTES + RECORD_CHAR_BYTES * len(record[-1])
+
+
+def _stat_record_size(record):
+    return RECORD_BYTES + STAT_RECORD_BYTES + RECORD_CHAR_BYTES * len(record[-2])
+
+
+class SortedNames:
+    """
+    The sorted file names of one folder, held by an ``ExternalSorter``:
+    ``len`` is known up front, and the names can be iterated once. With
+    ``with_stats`` every record ends with the file's stat result after its
+    name, and ``items`` yields ``(name, stat)`` pairs instead.
+    """
+
+    __slots__ = ("_sorter", "with_stats")
+
+    def __init__(self, sorter, with_stats=False):
+        self._sorter = sorter
+        self.with_stats = with_stats
+
+    def __len__(self):
+        return self._sorter.count
+
+    @property
+    def held_bytes(self):
+        return self._sorter.held_bytes
+
+    def spill(self):
+        self._sorter.spill()
+
+    def __iter__(self):
+        if self.with_stats:
+            return (record[-2] for record in self._sorter)
+        return (record[-1] for record in self._sorter)
+
+    def items(self):
+        return ((record[-2], record[-1]) for record in self._sorter)
+
+
+def external_sorting_reader(
+    start_path,
+    order,
+    memory_limit,
+    rules=None,
+    max_entries=None,
+    tmp_dir=None,
+    with_stats=False,
+):
+    """
+    Directory reader for sorted maps of folders too large to sort in memory.
+
+    Like ``read_directory`` wrapped by the exclusion ``rules``,
+    ``sorting_reader`` and a ``max_entries`` cap, but each folder's files
+    stream from ``os.scandir`` into an ``ExternalSorter`` that spills sorted
+    runs to ``tmp_dir`` whenever they take about ``memory_limit`` bytes,
+    and come back as ``SortedNames``. Subfolders are still listed in
+    memory, since the walk keeps them anyway. The sizes and times the
+    ``size`` and ``mtime`` orders need go into the records; with
+    ``with_stats`` the files' stat results do too, and listings carry the
+    subfolders' stats.
+    """
+    make_record = sort_record(order)
+    needs_stats = with_stats or order in STAT_ORDERS
+    sizeof = _stat_record_size if with_stats else _record_size
+    dir_order = NAME if order in (SIZE, DIRS_FIRST) else order
+
+    def read(path):
+        excluded = rules.folder_filter(path, start_path) if rules else None
+        dirs = []
+        symlinks = set()
+        dir_stats = {} if needs_stats else None
+        sorter = ExternalSorter(
+            tmp_dir=tmp_dir, memory_limit=memory_limit, sizeof=sizeof
+        )
+        add = sorter.add
+        spill_error = None
+        try:
+            with os.scandir(path) as scan:
+                for entry in scan:
+                    name = entry.name
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if excluded is not None and excluded(name, is_dir):
+                        continue
+                    stat = None
+                    if needs_stats:
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            pass
+                    if is_dir:
+                        dirs.append(name)
+                        if entry.is_symlink():
+                            symlinks.add(name)
+                        if stat is not None:
+                            dir_stats[name] = stat
+                    else:
+                        record = make_record(name, stat)
+                        if with_stats:
+                            record += (stat,)
+                        try:
+                            add(record)
+                        except OSError as e:
+                            spill_error = e
+                            break
+        except OSError:
+            sorter.close()
+            return None
+        if spill_error is not None:
+            # The temporary files failed, not the folder: don't skip it.
+            sorter.close()
+            raise spill_error
+
+        dirs = _sort_names(dirs, dir_order, dir_stats)
+        descend = [d for d in dirs if d not in symlinks] if symlinks else dirs
+        files = SortedNames(sorter, with_stats)
+        listing_stats = dir_stats if with_stats else None
+        excess = len(dirs) + len(files) - max_entries if max_entries else 0
+        if excess <= 0:
+            return dirs, files, descend, listing_stats
+        # Capped like ``capping_reader``: only the first names are read back.
+        if order == DIRS_FIRST:
+            kept_dirs = dirs[:max_entries]
+            kept_files = max_entries - len(kept_dirs)
+        else:
+            kept_files = min(len(files), max_entries)
+            kept_dirs = dirs[: max_entries - kept_files]
+        names = files.items() if with_stats else iter(files)
+        files = list(islice(names, kept_files))
+        names.close()
+        sorter.close()
+        if with_stats:
+            listing_stats.update(files)
+            files = [name for name, _ in files]
+        kept = set(kept_dirs)
+        descend = [d for d in descend if d in kept]
+        return kept_dirs, files, descend, listing_stats, excess
+
+    return read
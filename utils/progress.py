@@ -0,0 +1,84 @@
+import time
+
+
+class ProgressSnapshot:
+    """Progress as seen by the UI: counts, percentage, rate and ETA."""
+
+    __slots__ = ("processed", "total", "percent", "rate", "eta")
+
+    def __init__(self, processed, total, percent, rate, eta):
+        self.processed = processed
+        self.total = total
+        self.percent = percent
+        self.rate = rate
+        self.eta = eta
+
+
+class ProgressChannel:
+    """
+    Carry progress from the mapping thread to the Tk thread.
+
+    The worker only calls ``report``/``finish``, which store the latest value
+    in a slot without locking or touching Tk. The UI drains the channel from
+    ``root.after`` with ``start_polling``, so updates are coalesced to the
+    poll rate and only forwarded when the whole percentage changes.
+    """
+
+    def __init__(self, interval_ms=50):
+        self.interval_ms = interval_ms
+        self._latest = None
+        self._result = None
+        self._started = time.monotonic()
+        self._last_percent = -1
+        self._detached = False
+
+    # ===== Worker side =====
+
+    def report(self, processed, total):
+        self._latest = (processed, total)
+
+    def finish(self, success, error_message):
+        self._result = (success, error_message)
+
+    # ===== Tk side =====
+
+    def snapshot(self):
+        latest = self._latest
+        if latest is None:
+            return None
+        processed, total = latest
+        percent = min(processed / total * 100, 100) if total else 100
+        elapsed = time.monotonic() - self._started
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        eta = (total - processed) / rate if rate > 0 and total > processed else 0.0
+        return ProgressSnapshot(processed, total, percent, rate, eta)
+
+    def start_polling(self, widget, on_progress, on_complete):
+        """Poll every ``interval_ms`` on ``widget``'s event loop until finished."""
+
+        def poll():
+            if self._detached:
+                return
+            result = self._result
+            snapshot = self.snapshot()
+            if snapshot is not None and (
+                result is not None or int(snapshot.percent) != self._last_percent
+            ):
+                self._last_percent = int(snapshot.percent)
+                on_progress(snapshot)
+            if result is not None:
+                on_complete(*result)
+            else:
+                widget.after(self.interval_ms, poll)
+
+        widget.after(self.interval_ms, poll)
+
+    def detach(self):
+        """Stop polling: nothing more is forwarded, even once the run finishes."""
+        self._detached = True
+
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
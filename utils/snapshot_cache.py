@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils.file_operations import read_directory
+
+CACHE_FILE_NAME = ".folder_mapper_cache.sqlite"
+
+# A directory changed within the same timestamp tick as the scan that cached
+# it would keep its old mtime, so recent snapshots are never trusted.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def _join(names):
+    return "\0".join(names)
+
+
+def _split(value):
+    return value.split("\0") if value else []
+
+
+class SnapshotCache:
+    """
+    Persistent per-directory snapshot of a previous mapping run.
+
+    Stores each directory's mtime and entry list in a SQLite file kept next
+    to the maps. ``read_directory`` is a drop-in reader for the walkers: it
+    costs one ``stat`` for a directory whose mtime hasn't changed since it was
+    cached, and falls back to a real ``scandir`` otherwise. Safe to share
+    between the threads of ``parallel_walk``.
+    """
+
+    def __init__(self, cache_file):
+        self.connection = sqlite3.connect(cache_file, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS directories ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " scanned_ns INTEGER NOT NULL,"
+            " run INTEGER NOT NULL,"
+            " dirs TEXT NOT NULL,"
+            " files TEXT NOT NULL,"
+            " links TEXT NOT NULL)"
+        )
+        self.run = time.time_ns()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = []
+        self._updates = []
+
+    def read_directory(self, path):
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT mtime_ns, scanned_ns, dirs, files, links"
+                " FROM directories WHERE path = ?",
+                (path,),
+            ).fetchone()
+        if (
+            row is not None
+            and row[0] == mtime_ns
+            and mtime_ns < row[1] - RACY_WINDOW_NS
+        ):
+            dirs, files, links = _split(row[2]), _split(row[3]), _split(row[4])
+            descend = [d for d in dirs if d not in links] if links else dirs
+            with self._lock:
+                self.hits += 1
+                self._touched.append((self.run, path))
+            return dirs, files, descend
+
+        scanned_ns = time.time_ns()
+        result = read_directory(path)
+        if result is None:
+            return None
+        dirs, files, descend = result
+        links = []
+        if descend is not dirs:
+            followed = set(descend)
+            links = [d for d in dirs if d not in followed]
+        row = (path, mtime_ns, scanned_ns, self.run, _join(dirs), _join(files))
+        with self._lock:
+            self.misses += 1
+            self._updates.append(row + (_join(links),))
+        return result
+
+    def close(self, start_path=None):
+        """
+        Save this run's snapshots. With ``start_path``, entries below it that
+        the run didn't visit (deleted directories) are dropped as well.
+        """
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._updates,
+            )
+            self.connection.executemany(
+                "UPDATE directories SET run = ? WHERE path = ?", self._touched
+            )
+            if start_path is not None:
+                prefix = os.path.join(start_path, "")
+                self.connection.execute(
+                    "DELETE FROM directories WHERE run != ?"
+                    " AND (path = ? OR substr(path, 1, ?) = ?)",
+                    (self.run, start_path, len(prefix), prefix),
+                )
+            self._updates = []
+            self._touched = []
+        self.connection.close()
@@ -0,0 +1,305 @@
+import heapq
+import os
+import sys
+from array import array
+
+from utils.file_operations import TreeEntry, iter_tree
+
+NO_NODE = -1
+
+# Values of ``CompactTree.is_dir``: anything but FILE is drawn as a folder,
+# except SUMMARY, which stands for the entries a per-directory cap left out.
+FILE = 0
+FOLDER = 1
+TRUNCATED = 2
+SUMMARY = 3
+
+
+class StoredStat:
+    """The size and mtime a ``CompactTree`` kept, standing in for a ``stat``."""
+
+    __slots__ = ("st_size", "st_mtime")
+
+    def __init__(self, size, mtime):
+        self.st_size = size
+        self.st_mtime = mtime
+
+
+class Node:
+    """Lightweight view of one node of a ``CompactTree``."""
+
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def name(self):
+        return self.tree.names[self.tree.name_ids[self.index]]
+
+    @property
+    def is_dir(self):
+        return self.tree.is_dir[self.index] in (FOLDER, TRUNCATED)
+
+    @property
+    def parent(self):
+        parent = self.tree.parents[self.index]
+        return Node(self.tree, parent) if parent != NO_NODE else None
+
+    @property
+    def path(self):
+        return self.tree.path(self.index)
+
+    def children(self):
+        tree = self.tree
+        child = tree.first_child[self.index]
+        while child != NO_NODE:
+            yield Node(tree, child)
+            child = tree.next_sibling[child]
+
+    def __repr__(self):
+        return f"<Node {self.index} {self.name!r}{'/' if self.is_dir else ''}>"
+
+
+class CompactTree:
+    """
+    In-memory folder tree sized for millions of entries.
+
+    Nodes are plain integers. Structure lives in parallel ``array('l')``
+    columns (parent, first child, next sibling), the folder flag in an
+    ``array('B')``, and names are stored once each in ``names`` and
+    referenced by id, so the thousands of ``index.js`` or ``.DS_Store``
+    entries of a big share cost one string between them. ``Node`` gives a
+    ``__slots__`` view over a single index. Node 0 is the root. Folders
+    at the depth limit and the summaries of capped directories are kinds of
+    their own in ``is_dir``; a summary's count lives in ``omitted``.
+
+    With ``with_stats`` each node also keeps its own size and mtime, which
+    ``aggregate`` rolls up into per-folder totals.
+    """
+
+    def __init__(self, root_path, with_stats=False):
+        self.root_path = root_path
+        self.parents = array("l")
+        self.first_child = array("l")
+        self.next_sibling = array("l")
+        self.name_ids = array("l")
+        self.is_dir = array("B")
+        self.names = []
+        self.omitted = {}
+        self.sizes = array("q") if with_stats else None
+        self.mtimes = array("d") if with_stats else None
+        self.total_sizes = None
+        self.file_counts = None
+        self.newest_mtimes = None
+        self._name_index = {}
+        self._last_child = {}
+
+    @classmethod
+    def from_entries(cls, entries, with_stats=False):
+        """
+        Build a tree from ``iter_tree`` entries (root first, pre-order).
+        ``with_stats`` keeps the size and mtime of entries' ``stat``.
+        """
+        entries = iter(entries)
+        root = next(entries, None)
+        if root is None:
+            raise ValueError("no entries")
+        tree = cls(root.path, with_stats)
+        add = tree.add
+        stack = [add(NO_NODE, root.name, True, root.stat)]
+        for entry in entries:
+            depth = entry.depth
+            del stack[depth:]
+            if entry.omitted:
+                node = add(stack[-1], entry.name, SUMMARY)
+                tree.omitted[node] = entry.omitted
+                continue
+            kind = TRUNCATED if entry.truncated else entry.is_dir
+            node = add(stack[-1], entry.name, kind, entry.stat)
+            if entry.is_dir:
+                stack.append(node)
+        tree.seal()
+        return tree
+
+    def add(self, parent, name, is_dir, stat=None):
+        """
+        Append a node as the last child of ``parent`` and return its index.
+        ``is_dir`` is a bool or one of the node kinds (``FOLDER``, ...).
+        """
+        index = len(self.parents)
+        name_id = self._name_index.get(name)
+        if name_id is None:
+            name_id = self._name_index[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        self.parents.append(parent)
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.name_ids.append(name_id)
+        self.is_dir.append(int(is_dir))
+        if self.sizes is not None:
+            self.sizes.append(stat.st_size if stat is not None and not is_dir else 0)
+            self.mtimes.append(stat.st_mtime if stat is not None else 0.0)
+        if parent != NO_NODE:
+            previous = self._last_child.get(parent)
+            if previous is None:
+                self.first_child[parent] = index
+            else:
+                self.next_sibling[previous] = index
+            self._last_child[parent] = index
+        return index
+
+    def seal(self):
+        """Drop the bookkeeping only needed while nodes are being added."""
+        self._name_index = {}
+        self._last_child = {}
+
+    def aggregate(self):
+        """
+        Compute each folder's total bytes, file count and newest mtime in one
+        bottom-up pass. Children always come after their parent, so walking
+        the nodes backwards visits every subtree before its root.
+        """
+        if self.sizes is None:
+            raise ValueError("tree was built without stats")
+        count = len(self)
+        totals = array("q", self.sizes)
+        newest = array("d", self.mtimes)
+        files = array("q", bytes(8 * count))
+        parents = self.parents
+        is_dir = self.is_dir
+        for index in range(count - 1, 0, -1):
+            parent = parents[index]
+            totals[parent] += totals[index]
+            files[parent] += files[index] if is_dir[index] else 1
+            if newest[index] > newest[parent]:
+                newest[parent] = newest[index]
+        self.total_sizes = totals
+        self.file_counts = files
+        self.newest_mtimes = newest
+
+    def largest_folders(self, n):
+        """Indexes of the ``n`` folders with the biggest totals, largest first."""
+        totals = self.total_sizes
+        is_dir = self.is_dir
+        folders = (i for i in range(1, len(self)) if is_dir[i] == FOLDER)
+        return heapq.nlargest(n, folders, key=totals.__getitem__)
+
+    def totals(self, index):
+        """``(bytes, files, newest mtime)`` of a node after ``aggregate``."""
+        return (
+            self.total_sizes[index],
+            self.file_counts[index],
+            self.newest_mtimes[index],
+        )
+
+    def __len__(self):
+        return len(self.parents)
+
+    @property
+    def root(self):
+        return Node(self, 0)
+
+    def node(self, index):
+        return Node(self, index)
+
+    def path(self, index):
+        parts = []
+        parents = self.parents
+        while index > 0:
+            parts.append(self.names[self.name_ids[index]])
+            index = parents[index]
+        return os.path.join(self.root_path, *reversed(parts))
+
+    def iter_entries(self):
+        """
+        Yield ``TreeEntry`` records in map order, as ``iter_tree`` does. A
+        tree built with stats gives every file and folder a ``StoredStat``.
+        """
+        names = self.names
+        name_ids = self.name_ids
+        is_dir = self.is_dir
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        sep = os.sep
+        totals = self.totals if self.total_sizes is not None else None
+        sizes = self.sizes
+        mtimes = self.mtimes
+        yield TreeEntry(
+            self.root_path,
+            names[name_ids[0]],
+            0,
+            True,
+            True,
+            StoredStat(0, mtimes[0]) if sizes is not None else None,
+            totals=totals(0) if totals else None,
+        )
+        # (next node to visit, its depth, parent path + separator), deepest last.
+        stack = [(first_child[0], 1, os.path.join(self.root_path, ""))]
+        while stack:
+            node, depth, prefix = stack.pop()
+            if node == NO_NODE:
+                continue
+            sibling = next_sibling[node]
+            stack.append((sibling, depth, prefix))
+            name = names[name_ids[node]]
+            path = prefix + name
+            kind = is_dir[node]
+            stat = None
+            if sizes is not None and kind != SUMMARY:
+                stat = StoredStat(sizes[node], mtimes[node])
+            if kind == FILE:
+                yield TreeEntry(path, name, depth, False, sibling == NO_NODE, stat)
+            elif kind == SUMMARY:
+                yield TreeEntry(
+                    prefix[:-1],
+                    name,
+                    depth,
+                    False,
+                    sibling == NO_NODE,
+                    omitted=self.omitted[node],
+                )
+            else:
+                yield TreeEntry(
+                    path,
+                    name,
+                    depth,
+                    True,
+                    sibling == NO_NODE,
+                    stat,
+                    totals=totals(node) if totals else None,
+                    truncated=kind == TRUNCATED,
+                )
+                stack.append((first_child[node], depth + 1, path + sep))
+
+    def nbytes(self):
+        """Approximate memory held by the tree, names included."""
+        arrays = (
+            self.parents,
+            self.first_child,
+            self.next_sibling,
+            self.name_ids,
+            self.is_dir,
+        )
+        arrays += tuple(
+            a
+            for a in (
+                self.sizes,
+                self.mtimes,
+                self.total_sizes,
+                self.file_counts,
+                self.newest_mtimes,
+            )
+            if a is not None
+        )
+        size = sum(a.itemsize * len(a) for a in arrays)
+        size += sys.getsizeof(self.names)
+        size += sum(sys.getsizeof(name) for name in self.names)
+        return size
+
+
+def scan_tree(start_path, with_stats=False, **options):
+    """Scan ``start_path`` into a ``CompactTree``; ``options`` go to ``iter_tree``."""
+    entries = iter_tree(start_path, with_stats=with_stats, **options)
+    return CompactTree.from_entries(entries, with_stats)
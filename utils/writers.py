@@ -0,0 +1,586 @@
+import importlib
+import os
+import re
+import struct
+import time
+from json.encoder import encode_basestring_ascii as encode_string
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
+# Streaming compressors, by file suffix: (stdlib module, options for open).
+COMPRESSIONS = {
+    "gz": ("gzip", {"compresslevel": 6}),
+    "bz2": ("bz2", {"compresslevel": 9}),
+    "xz": ("lzma", {"preset": 1}),
+}
+
+# Record types of the structured formats.
+TYPE_MAP = "map"
+TYPE_DIR = "dir"
+TYPE_FILE = "file"
+TYPE_MORE = "more"
+TYPE_LARGEST = "largest_folder"
+TYPE_NOTE = "note"
+
+
+def format_size(size):
+    """Human-readable size, e.g. ``format_size(1536)`` -> ``"1.5 KB"``."""
+    for unit in SIZE_UNITS[:-1]:
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = SIZE_UNITS[-1]
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+def format_mtime(mtime):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime)) if mtime else "-"
+
+
+class MapWriter:
+    """
+    Base of the map writers: ``write_header``, then ``write_entries`` with
+    ``iter_tree`` entries, optionally ``write_largest_folders`` and
+    ``write_footer``, then ``close``. ``open`` creates the output stream in
+    the mode the format needs, compressed on the fly when ``compression``
+    is a key of ``COMPRESSIONS``. Formats with ``with_stats`` record every
+    entry's size and mtime, so their entries must come with stats.
+    """
+
+    extension = ".txt"
+    binary = False
+    newline = None
+    with_stats = False
+
+    @classmethod
+    def open(cls, output_file, buffer_size=DEFAULT_BUFFER_SIZE, compression=None):
+        if compression:
+            # The writers already hand over large chunks, so the compressor
+            # needs no buffer of its own in front of it.
+            module_name, options = COMPRESSIONS[compression]
+            module = importlib.import_module(module_name)
+            if cls.binary:
+                return module.open(output_file, "wb", **options)
+            return module.open(
+                output_file, "wt", encoding="utf-8", newline=cls.newline, **options
+            )
+        if cls.binary:
+            return open(output_file, "wb", buffering=buffer_size)
+        return open(
+            output_file,
+            "w",
+            encoding="utf-8",
+            newline=cls.newline,
+            buffering=buffer_size,
+        )
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE, labels=None):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.labels = labels or {}
+        self._root_length = 0
+
+    def write_header(self, title, start_path):
+        self._root_length = len(os.path.join(start_path, ""))
+
+    def relative_path(self, path):
+        """``path`` relative to the mapped folder, ``/``-separated."""
+        path = path[self._root_length :]
+        return path.replace(os.sep, "/") if os.sep != "/" else path
+
+    def write_entries(self, entries):
+        raise NotImplementedError
+
+    def write_largest_folders(self, folders):
+        pass
+
+    def write_footer(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class TextMapWriter(MapWriter):
+    """
+    Write the box-drawing text map from ``iter_tree`` entries.
+
+    Tree prefixes are rebuilt only when the depth changes, from one shared
+    run of ``│   `` columns, so a tree thousands of levels deep doesn't keep
+    a prefix string per level. Lines are handed to the stream in chunks of
+    about ``buffer_size`` characters instead of one by one. Folders carrying
+    ``totals`` get them appended to their line, and the summary of a capped
+    directory reads "… and N more"; ``labels`` is the language's
+    translations entry.
+    """
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE, labels=None):
+        super().__init__(stream, buffer_size, labels)
+        self._chunks = []
+        self._pending = 0
+        self._columns = ""
+        self._prefix_depth = 0
+        self._dir_prefix = ""
+        self._file_prefixes = ("", "")
+
+    def _set_depth(self, depth):
+        """Build the prefixes of the entries at ``depth``."""
+        width = 4 * (depth - 1)
+        if width > len(self._columns):
+            # Doubled, so a deep chain of folders grows it only a few times.
+            self._columns = "│   " * max(depth - 1, len(self._columns) // 2)
+        self._prefix_depth = depth
+        if depth == 0:
+            self._dir_prefix = ""
+            self._file_prefixes = ("", "")
+        else:
+            indent = self._columns[:width]
+            self._dir_prefix = indent + "├── "
+            self._file_prefixes = (indent + "├── ", indent + "└── ")
+
+    def write_header(self, title, start_path):
+        self._chunks.append(f"{title} {start_path}\n" + "=" * 50 + "\n")
+
+    def write_entries(self, entries):
+        """Write every ``TreeEntry`` from ``entries``; return how many."""
+        chunks = self._chunks
+        append = chunks.append
+        buffer_size = self.buffer_size
+        more_entries = self.labels.get("more_entries", "… and {count:,} more")
+        depth = self._prefix_depth
+        dir_prefix = self._dir_prefix
+        file_prefixes = self._file_prefixes
+        pending = self._pending
+        count = 0
+        for entry in entries:
+            if entry.depth != depth:
+                depth = entry.depth
+                self._set_depth(depth)
+                dir_prefix = self._dir_prefix
+                file_prefixes = self._file_prefixes
+            name = entry.name
+            if entry.is_dir:
+                append(dir_prefix)
+                append(name)
+                if entry.totals is None or entry.truncated:
+                    append("/\n")
+                else:
+                    append(f"/  [{self._format_totals(entry.totals)}]\n")
+                pending += len(dir_prefix) + len(name) + 2
+            else:
+                prefix = file_prefixes[entry.is_last]
+                append(prefix)
+                if entry.omitted:
+                    name = more_entries.format(count=entry.omitted)
+                append(name)
+                append("\n")
+                pending += len(prefix) + len(name) + 1
+            count += 1
+            if pending >= buffer_size:
+                self.flush()
+                pending = 0
+        self._pending = pending
+        return count
+
+    def _format_totals(self, totals):
+        size, files, newest = totals
+        files_label = self.labels.get("files", "files")
+        return f"{format_size(size)}, {files:,} {files_label}, {format_mtime(newest)}"
+
+    def write_largest_folders(self, folders):
+        """Append the ``(path, totals)`` pairs of ``folders`` as a final section."""
+        lines = [f"\n{self.labels.get('largest_folders', 'Largest folders:')}\n"]
+        lines.append("=" * 50 + "\n")
+        for path, totals in folders:
+            lines.append(f"{self._format_totals(totals)}  {path}\n")
+        self._chunks.append("".join(lines))
+
+    def write_footer(self, text):
+        self._chunks.append(f"\n{text}\n")
+
+    def flush(self):
+        if self._chunks:
+            self.stream.write("".join(self._chunks))
+            self._chunks.clear()
+        self._pending = 0
+
+
+class JsonLinesWriter(MapWriter):
+    """
+    Write one JSON object per line, streamed as entries come in.
+
+    The first line is ``{"type": "map", "root": ...}``; every entry follows
+    as ``{"type": "dir" | "file" | "more", "path", "name", "depth", ...}``
+    with its path relative to the root, plus ``size`` (files only) and
+    ``mtime`` from its stat, ``total_size``/``file_count``/``newest_mtime`` for
+    folders with totals, ``omitted`` for the summary of a capped folder and
+    ``truncated`` for folders at the depth limit. Lines are formatted by
+    hand around the C string encoder of ``json``, which is several times
+    faster than a ``json.dumps`` per entry; it escapes everything outside
+    ASCII, so names that aren't valid UTF-8 still make valid JSON.
+    """
+
+    extension = ".jsonl"
+    with_stats = True
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE, labels=None):
+        super().__init__(stream, buffer_size, labels)
+        self._lines = []
+        self._flush_lines = max(buffer_size // 100, 1)
+
+    def write_header(self, title, start_path):
+        super().write_header(title, start_path)
+        self._lines.append(
+            f'{{"type":"{TYPE_MAP}","root":{encode_string(start_path)}}}\n'
+        )
+
+    def write_entries(self, entries):
+        lines = self._lines
+        append = lines.append
+        flush_lines = self._flush_lines
+        relative_path = self.relative_path
+        count = 0
+        for entry in entries:
+            if entry.is_dir:
+                kind = TYPE_DIR
+            elif entry.omitted:
+                kind = TYPE_MORE
+            else:
+                kind = TYPE_FILE
+            path = encode_string(relative_path(entry.path))
+            line = (
+                f'{{"type":"{kind}","path":{path}'
+                f',"name":{encode_string(entry.name)},"depth":{entry.depth}'
+            )
+            stat = entry.stat
+            if stat is not None:
+                if not entry.is_dir:
+                    line += f',"size":{stat.st_size}'
+                line += f',"mtime":{stat.st_mtime}'
+            if entry.totals is not None and not entry.truncated:
+                size, files, newest = entry.totals
+                line += (
+                    f',"total_size":{size},"file_count":{files}'
+                    f',"newest_mtime":{newest}'
+                )
+            if entry.omitted:
+                line += f',"omitted":{entry.omitted}'
+            if entry.truncated:
+                line += ',"truncated":true'
+            append(line + "}\n")
+            count += 1
+            if len(lines) >= flush_lines:
+                self.flush()
+        return count
+
+    def write_largest_folders(self, folders):
+        for path, (size, files, newest) in folders:
+            self._lines.append(
+                f'{{"type":"{TYPE_LARGEST}"'
+                f',"path":{encode_string(self.relative_path(path))}'
+                f',"total_size":{size},"file_count":{files}'
+                f',"newest_mtime":{newest}}}\n'
+            )
+
+    def write_footer(self, text):
+        self._lines.append(
+            f'{{"type":"{TYPE_NOTE}","text":{encode_string(text)}}}\n'
+        )
+
+    def flush(self):
+        if self._lines:
+            self.stream.write("".join(self._lines))
+            self._lines.clear()
+
+
+class CsvMapWriter(MapWriter):
+    """
+    Write one CSV row per entry, under a header row of ``CSV_COLUMNS``.
+
+    Rows carry the same fields as the JSON Lines records; fields that don't
+    apply to an entry are left empty. The first row after the header is the
+    ``map`` record, whose ``path`` is the mapped folder itself. Rows are
+    formatted directly rather than through ``csv.writer``, quoting only the
+    names that need it, which is several times faster; the result reads back
+    with any CSV parser.
+    """
+
+    extension = ".csv"
+    newline = ""
+    with_stats = True
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE, labels=None):
+        super().__init__(stream, buffer_size, labels)
+        self._lines = []
+        self._flush_lines = max(buffer_size // 100, 1)
+
+    def _row(self, *fields):
+        self._lines.append(",".join(map(_csv_field, fields)) + "\r\n")
+
+    def write_header(self, title, start_path):
+        super().write_header(title, start_path)
+        self._row(*CSV_COLUMNS)
+        self._row(TYPE_MAP, start_path)
+
+    def write_entries(self, entries):
+        lines = self._lines
+        append = lines.append
+        flush_lines = self._flush_lines
+        relative_path = self.relative_path
+        needs_quotes = _CSV_SPECIAL
+        count = 0
+        for entry in entries:
+            path = relative_path(entry.path)
+            name = entry.name
+            if needs_quotes(path):
+                path = _csv_field(path)
+                name = _csv_field(name)
+            if entry.is_dir:
+                kind = TYPE_DIR
+            elif entry.omitted:
+                kind = TYPE_MORE
+            else:
+                kind = TYPE_FILE
+            stat = entry.stat
+            totals = entry.totals
+            if stat is None and totals is None:
+                # The common case: a bare name, no optional columns.
+                tail = f",,,,,{entry.omitted or ''},{'1' if entry.truncated else ''}"
+            else:
+                tail = ""
+                if stat is not None:
+                    if not entry.is_dir:
+                        tail += str(stat.st_size)
+                    tail += f",{stat.st_mtime},"
+                else:
+                    tail += ",,"
+                if totals is not None and not entry.truncated:
+                    tail += f"{totals[0]},{totals[1]},{totals[2]},"
+                else:
+                    tail += ",,,"
+                tail += f"{entry.omitted or ''},{'1' if entry.truncated else ''}"
+            append(f"{kind},{path},{name},{entry.depth},{tail}\r\n")
+            count += 1
+            if len(lines) >= flush_lines:
+                self.flush()
+        return count
+
+    def write_largest_folders(self, folders):
+        for path, totals in folders:
+            self._row(TYPE_LARGEST, self.relative_path(path), "", "", "", "", *totals)
+
+    def write_footer(self, text):
+        self._row(TYPE_NOTE, "", text)
+
+    def flush(self):
+        if self._lines:
+            self.stream.write("".join(self._lines))
+            self._lines.clear()
+
+
+# A name can only hold a special character if its path does, so checking
+# the path is enough to decide whether both need quoting.
+_CSV_SPECIAL = re.compile(r'[",\r\n]').search
+
+
+def _csv_field(value):
+    value = str(value)
+    if _CSV_SPECIAL(value):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+CSV_COLUMNS = (
+    "type",
+    "path",
+    "name",
+    "depth",
+    "size",
+    "mtime",
+    "total_size",
+    "file_count",
+    "newest_mtime",
+    "omitted",
+    "truncated",
+)
+
+# Compact binary map: BINARY_MAGIC, the root path as a uint32 length and
+# UTF-8 bytes, then one record per entry: RECORD (kind, depth, name length),
+# the UTF-8 name, then the optional parts flagged in ``kind``.
+BINARY_MAGIC = b"FMAP\x01"
+RECORD = struct.Struct("<BHH")
+STAT = struct.Struct("<qd")
+TOTALS = struct.Struct("<qqd")
+COUNT = struct.Struct("<q")
+ROOT_LENGTH = struct.Struct("<I")
+KIND_FILE = 0
+KIND_DIR = 1
+KIND_TRUNCATED = 2
+KIND_MORE = 3
+KIND_LARGEST = 4
+KIND_NOTE = 5
+HAS_STAT = 0x10
+HAS_TOTALS = 0x20
+KIND_MASK = 0x0F
+
+
+class BinaryMapWriter(MapWriter):
+    """
+    Write the compact length-prefixed binary map read by ``iter_binary_map``.
+
+    Records hold names and depths rather than full paths, which are rebuilt
+    while loading, so a map is a fraction of the size of the other formats
+    and loads back with a few ``unpack_from`` calls per entry.
+    """
+
+    extension = ".fmap"
+    binary = True
+    with_stats = True
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE, labels=None):
+        super().__init__(stream, buffer_size, labels)
+        self._buffer = bytearray()
+
+    def write_header(self, title, start_path):
+        super().write_header(title, start_path)
+        root = start_path.encode("utf-8", "surrogateescape")
+        self._buffer += BINARY_MAGIC + ROOT_LENGTH.pack(len(root)) + root
+
+    def write_entries(self, entries):
+        buffer = self._buffer
+        buffer_size = self.buffer_size
+        pack_record = RECORD.pack
+        pack_stat = STAT.pack
+        pack_totals = TOTALS.pack
+        pack_count = COUNT.pack
+        count = 0
+        for entry in entries:
+            name = entry.name.encode("utf-8", "surrogateescape")
+            stat = entry.stat
+            totals = entry.totals
+            if entry.is_dir:
+                kind = KIND_TRUNCATED if entry.truncated else KIND_DIR
+            elif entry.omitted:
+                kind = KIND_MORE
+            else:
+                kind = KIND_FILE
+            if stat is not None:
+                kind |= HAS_STAT
+            if totals is not None and not entry.truncated:
+                kind |= HAS_TOTALS
+            buffer += pack_record(kind, entry.depth, len(name))
+            buffer += name
+            if stat is not None:
+                size = 0 if entry.is_dir else stat.st_size
+                buffer += pack_stat(size, stat.st_mtime)
+            if kind & HAS_TOTALS:
+                buffer += pack_totals(*totals)
+            if entry.omitted:
+                buffer += pack_count(entry.omitted)
+            count += 1
+            if len(buffer) >= buffer_size:
+                self.flush()
+        return count
+
+    def write_largest_folders(self, folders):
+        for path, totals in folders:
+            name = self.relative_path(path).encode("utf-8", "surrogateescape")
+            self._buffer += RECORD.pack(KIND_LARGEST | HAS_TOTALS, 0, len(name))
+            self._buffer += name + TOTALS.pack(*totals)
+
+    def write_footer(self, text):
+        text = text.encode("utf-8")
+        self._buffer += RECORD.pack(KIND_NOTE, 0, len(text)) + text
+
+    def flush(self):
+        if self._buffer:
+            self.stream.write(self._buffer)
+            self._buffer.clear()
+
+
+def iter_binary_map(data):
+    """
+    Yield ``(kind, depth, name, path, stat, totals, omitted)`` tuples from
+    the bytes of a binary map, with ``path`` rebuilt relative to the root
+    (``/``-separated). ``stat`` is ``(size, mtime)`` or ``None``, ``totals``
+    is ``(bytes, files, newest mtime)`` or ``None``; ``kind`` is one of the
+    ``KIND_*`` constants. ``data`` is any buffer, e.g. an ``mmap``.
+    """
+    view = memoryview(data)
+    if bytes(view[: len(BINARY_MAGIC)]) != BINARY_MAGIC:
+        raise ValueError("not a Folder Mapper binary map")
+    offset = len(BINARY_MAGIC)
+    (root_length,) = ROOT_LENGTH.unpack_from(view, offset)
+    offset += ROOT_LENGTH.size + root_length
+    unpack_record = RECORD.unpack_from
+    record_size = RECORD.size
+    end = len(view)
+    # Relative path of the last folder seen at each depth.
+    folders = [""]
+    while offset < end:
+        flags, depth, name_length = unpack_record(view, offset)
+        offset += record_size
+        name = str(view[offset : offset + name_length], "utf-8", "surrogateescape")
+        offset += name_length
+        stat = totals = None
+        omitted = 0
+        if flags & HAS_STAT:
+            stat = STAT.unpack_from(view, offset)
+            offset += STAT.size
+        if flags & HAS_TOTALS:
+            totals = TOTALS.unpack_from(view, offset)
+            offset += TOTALS.size
+        kind = flags & KIND_MASK
+        if kind == KIND_MORE:
+            (omitted,) = COUNT.unpack_from(view, offset)
+            offset += COUNT.size
+            path = folders[depth - 1]
+        elif kind in (KIND_LARGEST, KIND_NOTE) or depth == 0:
+            path = name if kind == KIND_LARGEST else ""
+        else:
+            parent = folders[depth - 1]
+            path = f"{parent}/{name}" if parent else name
+            if kind != KIND_FILE:
+                del folders[depth:]
+                folders.append(path)
+        yield kind, depth, name, path, stat, totals, omitted
+
+
+MAP_WRITERS = {
+    "txt": TextMapWriter,
+    "jsonl": JsonLinesWriter,
+    "csv": CsvMapWriter,
+    "bin": BinaryMapWriter,
+}
+
+
+def map_extension(output_format="txt", compression=None):
+    """File extension of a map, e.g. ``.jsonl.gz`` for compressed JSON Lines."""
+    extension = MAP_WRITERS[output_format].extension
+    return f"{extension}.{compression}" if compression else extension
+
+
+def map_stem(path):
+    """
+    ``path`` without its map extension, the base of the files written next
+    to a map: ``my.project_map_1.txt.gz`` -> ``my.project_map_1``. Other
+    paths are returned unchanged.
+    """
+    compression = compression_for(path)
+    if compression:
+        path = path[: -len(compression) - 1]
+    for writer_class in MAP_WRITERS.values():
+        if path.endswith(writer_class.extension):
+            return path[: -len(writer_class.extension)]
+    return path
+
+
+def compression_for(path):
+    """The ``COMPRESSIONS`` key matching the suffix of ``path``, or ``None``."""
+    suffix = path.rpartition(".")[2]
+    return suffix if suffix in COMPRESSIONS else None